@@ -0,0 +1,59 @@
+"""Tempo de arranque a frio (importação do Excel) e a quente (cache colunar).
+
+Uso: python benchmarks/bench_armazenamento.py [n_jogadores ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ligarecord.armazenamento import FORMATO_CACHE, caminhos_cache, carregar_jogadores  # noqa: E402
+
+
+def gerar_liga(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Nome': [f"Jogador {i}" for i in range(n)],
+        'Equipa': rng.integers(0, 18, size=n).astype(str),
+        'Posição': rng.choice(['Goleiro', 'Defesa', 'Médio', 'Avançado'], size=n),
+        'Preço': rng.integers(10, 180, size=n) * 50_000,
+        'Pontos Última Jornada': rng.integers(-3, 16, size=n),
+        'Pontos Totais': rng.integers(0, 160, size=n),
+        'Titular': rng.random(n) < 0.02,
+        'Suplente': rng.random(n) < 0.01,
+        'Reserva': rng.random(n) < 0.01,
+        'Próximo Adversário': rng.integers(0, 18, size=n).astype(str),
+        'Dificuldade do Jogo': rng.integers(1, 6, size=n),
+        'Lesionado': rng.random(n) < 0.05,
+        'Expulso': rng.random(n) < 0.01,
+    })
+
+
+def main(tamanhos):
+    print(f"cache: {FORMATO_CACHE}")
+    print(f"{'jogadores':>10} {'frio (s)':>10} {'quente (s)':>11} {'ganho':>8}")
+    with tempfile.TemporaryDirectory() as pasta:
+        for n in tamanhos:
+            caminho = os.path.join(pasta, f"liga_{n}.xlsx")
+            gerar_liga(n).to_excel(caminho, index=False)
+
+            for ficheiro in caminhos_cache(caminho):
+                if os.path.exists(ficheiro):
+                    os.remove(ficheiro)
+            inicio = time.perf_counter()
+            carregar_jogadores(caminho)
+            frio = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            carregar_jogadores(caminho)
+            quente = time.perf_counter() - inicio
+            print(f"{n:>10} {frio:>10.3f} {quente:>11.4f} {frio / quente:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1_000, 10_000, 50_000])
@@ -0,0 +1,86 @@
+"""Várias equipas na mesma liga: uma cópia do DataFrame por equipa vs. estados int8 em lote.
+
+Para cada número de equipas compara o ciclo atual (copiar o DataFrame,
+marcar o plantel e chamar o `motor`) com as consultas de `ligarecord.equipas`
+sobre um pool partilhado: melhor onze, táticas, capitão e transferências
+numa posição. A memória é a das cópias vs. a da matriz de estados.
+
+Uso: python benchmarks/bench_equipas.py [n_equipas ...]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ligarecord import motor  # noqa: E402
+from ligarecord.armazenamento import sanitizar  # noqa: E402
+from ligarecord.equipas import (Equipas, PoolJogadores, comparar_taticas_equipas, melhores_onzes,  # noqa: E402
+                                sugerir_capitaes, sugerir_transferencias_equipas)
+from ligarecord.otimizador import QUOTAS_PLANTEL  # noqa: E402
+from ligarecord.sintetico import gerar_liga  # noqa: E402
+
+JOGADORES = 10_000
+FORMACAO = '4-4-2'
+ORCAMENTO = 3_000_000
+
+
+def gerar_equipas(pool, n, seed=0):
+    """`n` planteis aleatórios de 15 (quotas por posição), 11 titulares num 4-4-2"""
+    rng = np.random.default_rng(seed)
+    equipas = Equipas(pool)
+    posicoes = pool.df['Posição'].to_numpy()
+    por_posicao = {pos: pool.ids[posicoes == pos] for pos in QUOTAS_PLANTEL}
+    titulares_442 = {'Goleiro': 1, 'Defesa': 4, 'Médio': 4, 'Avançado': 2}
+    for i in range(n):
+        titulares, banco = [], []
+        for pos, quantidade in QUOTAS_PLANTEL.items():
+            ids = rng.choice(por_posicao[pos], size=quantidade, replace=False)
+            titulares.extend(ids[:titulares_442[pos]])
+            banco.extend(ids[titulares_442[pos]:])
+        equipas.adicionar(f"Equipa {i}", titulares, banco[:2], banco[2:])
+    return equipas
+
+
+def por_equipa(equipas):
+    memoria = 0
+    for nome in equipas.nomes:
+        df = equipas.dataframe(nome)
+        memoria += df.memory_usage(deep=True).sum()
+        motor.selecionar_melhor_onze(df, FORMACAO)
+        motor.comparar_taticas(df)
+        motor.sugerir_capitao(df)
+        motor.sugerir_transferencias(df, 'Médio', ORCAMENTO)
+    return memoria
+
+
+def em_lote(equipas):
+    melhores_onzes(equipas, FORMACAO)
+    comparar_taticas_equipas(equipas)
+    sugerir_capitaes(equipas)
+    sugerir_transferencias_equipas(equipas, 'Médio', ORCAMENTO)
+    return equipas.estados.nbytes
+
+
+def main(tamanhos):
+    df = sanitizar(gerar_liga(JOGADORES))
+    inicio = time.perf_counter()
+    pool = PoolJogadores(df)
+    print(f"pool de {JOGADORES} jogadores: {(time.perf_counter() - inicio) * 1e3:.1f} ms")
+    print(f"{'equipas':>8} {'por equipa ms':>14} {'cópias MB':>10} {'lote ms':>9} {'estados MB':>11}")
+    for n in tamanhos:
+        equipas = gerar_equipas(pool, n)
+        inicio = time.perf_counter()
+        memoria_copias = por_equipa(equipas)
+        t_equipa = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        memoria_estados = em_lote(equipas)
+        t_lote = time.perf_counter() - inicio
+        print(f"{n:>8} {t_equipa * 1e3:>14.1f} {memoria_copias / 1e6:>10.1f} {t_lote * 1e3:>9.1f} "
+              f"{memoria_estados / 1e6:>11.2f}")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [10, 50, 200])
@@ -0,0 +1,60 @@
+"""Histórico por jornada: custo de acrescentar uma jornada e de calcular a forma.
+
+O tempo de acrescentar deve depender só das linhas novas, não do tamanho já
+guardado; a forma (últimas N, EWMA, casa/fora) é calculada sobre tudo.
+
+Uso: python benchmarks/bench_historico.py [n_jogadores ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ligarecord.historico import HistoricoJornadas, caminho_historico, caracteristicas_forma  # noqa: E402
+
+EPOCAS = 3
+JORNADAS = 34
+
+
+def gerar_jornada(n, jornada, rng):
+    return pd.DataFrame({
+        'ID': np.arange(n),
+        'Jornada': jornada,
+        'Pontos': rng.integers(-2, 16, size=n).astype(float),
+        'Dificuldade do Jogo': rng.integers(1, 6, size=n),
+        'Casa': rng.random(n) < 0.5,
+    })
+
+
+def main(tamanhos):
+    rng = np.random.default_rng(0)
+    print(f"{'jogadores':>10} {'linhas':>10} {'1.ª jornada ms':>15} {'última ms':>10} "
+          f"{'ler s':>8} {'forma s':>8}")
+    for n in tamanhos:
+        with tempfile.TemporaryDirectory() as pasta:
+            historico = HistoricoJornadas(caminho_historico(os.path.join(pasta, 'liga.xlsx')))
+            tempos = []
+            for epoca in range(EPOCAS):
+                for jornada in range(1, JORNADAS + 1):
+                    registos = gerar_jornada(n, jornada, rng)
+                    inicio = time.perf_counter()
+                    historico.acrescentar(f"{2023 + epoca}-{24 + epoca}", registos)
+                    tempos.append(time.perf_counter() - inicio)
+
+            inicio = time.perf_counter()
+            dados = historico.ler()
+            tempo_ler = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            caracteristicas_forma(dados)
+            tempo_forma = time.perf_counter() - inicio
+            print(f"{n:>10} {len(dados):>10} {tempos[0] * 1e3:>15.2f} {tempos[-1] * 1e3:>10.2f} "
+                  f"{tempo_ler:>8.3f} {tempo_forma:>8.3f}")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [500, 5_000, 50_000])
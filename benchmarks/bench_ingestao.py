@@ -0,0 +1,108 @@
+"""Ingestão de dados de jornada: linhas/s e pico de memória por formato e origem.
+
+Gera um ficheiro com uma linha por jogador (CSV, array JSON e JSON Lines) e
+ingere-o de disco e de um servidor HTTP local. O pico de memória
+(tracemalloc) deve manter-se perto do de um lote, seja qual for o tamanho
+do ficheiro.
+
+Uso: python benchmarks/bench_ingestao.py [n_jogadores ...]
+"""
+import csv
+import functools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_planeamento import gerar_liga  # noqa: E402
+from ligarecord.ingestao import ingerir  # noqa: E402
+from ligarecord.pontuacao import MotorPontuacao  # noqa: E402
+
+ADVERSARIOS = ['Benfica', 'Porto', 'Sporting', 'Braga', 'Vitória', 'Estoril']
+
+
+def gerar_feed(n, seed=1):
+    rng = np.random.default_rng(seed)
+    ids = rng.permutation(n)
+    dificuldades = rng.integers(1, 6, size=n)
+    lesionados = rng.random(n) < 0.05
+    for i in range(n):
+        yield {
+            'ID': int(ids[i]),
+            'Próximo Adversário': ADVERSARIOS[i % len(ADVERSARIOS)],
+            'Dificuldade do Jogo': int(dificuldades[i]),
+            'Lesionado': bool(lesionados[i]),
+            'Expulso': False,
+        }
+
+
+def escrever_feeds(pasta, n):
+    caminhos = {}
+    caminhos['csv'] = os.path.join(pasta, 'jornada.csv')
+    with open(caminhos['csv'], 'w', newline='', encoding='utf-8') as f:
+        escritor = None
+        for linha in gerar_feed(n):
+            if escritor is None:
+                escritor = csv.DictWriter(f, fieldnames=list(linha))
+                escritor.writeheader()
+            escritor.writerow(linha)
+    caminhos['json'] = os.path.join(pasta, 'jornada.json')
+    with open(caminhos['json'], 'w', encoding='utf-8') as f:
+        f.write('[\n')
+        for i, linha in enumerate(gerar_feed(n)):
+            f.write((',\n' if i else '') + json.dumps(linha, ensure_ascii=False))
+        f.write('\n]\n')
+    caminhos['jsonl'] = os.path.join(pasta, 'jornada.jsonl')
+    with open(caminhos['jsonl'], 'w', encoding='utf-8') as f:
+        for linha in gerar_feed(n):
+            f.write(json.dumps(linha, ensure_ascii=False) + '\n')
+    return caminhos
+
+
+def servir(pasta):
+    handler = functools.partial(type('Silencioso', (SimpleHTTPRequestHandler,),
+                                     {'log_message': lambda *a: None}), directory=pasta)
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def main(tamanhos):
+    print(f"{'jogadores':>10} {'fonte':>12} {'MB':>7} {'tempo s':>8} {'linhas/s':>10} "
+          f"{'pico MB':>8} {'scores':>8}")
+    for n in tamanhos:
+        with tempfile.TemporaryDirectory() as pasta:
+            caminhos = escrever_feeds(pasta, n)
+            servidor = servir(pasta)
+            url = f"http://127.0.0.1:{servidor.server_address[1]}/"
+            fontes = [(f"disco/{formato}", caminho) for formato, caminho in caminhos.items()]
+            fontes += [(f"http/{formato}", url + os.path.basename(caminho)) for formato, caminho in caminhos.items()]
+            for nome, fonte in fontes:
+                df = gerar_liga(n)
+                pontuacao = MotorPontuacao(df)
+                pontuacao.escrever(df)
+                inicio = time.perf_counter()
+                _, relatorio = ingerir(df, [fonte], pontuacao)
+                tempo = time.perf_counter() - inicio
+
+                df = gerar_liga(n)
+                tracemalloc.start()
+                ingerir(df, [fonte])
+                pico = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                tamanho = os.path.getsize(caminhos[nome.split('/')[1]]) / 1e6
+                print(f"{n:>10} {nome:>12} {tamanho:>7.1f} {tempo:>8.2f} {relatorio['linhas'] / tempo:>10.0f} "
+                      f"{pico / 1e6:>8.1f} {relatorio['scores_recalculados']:>8}")
+            servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [10_000, 100_000])
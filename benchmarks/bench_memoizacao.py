@@ -0,0 +1,52 @@
+"""Cache de resultados: custo de uma consulta sem cache, com acerto em memória e em disco.
+
+O acerto custa a impressão digital das colunas lidas pela consulta mais a
+reconstrução das linhas; o acerto em disco é o de uma nova sessão sobre os
+mesmos dados.
+
+Uso: python benchmarks/bench_memoizacao.py [n_jogadores ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ligarecord import motor  # noqa: E402
+from ligarecord.armazenamento import sanitizar  # noqa: E402
+from ligarecord.memoizacao import CacheResultados  # noqa: E402
+from ligarecord.sintetico import gerar_liga  # noqa: E402
+
+CONSULTAS = {
+    'melhor onze': (motor.selecionar_melhor_onze, ('4-4-2',)),
+    'melhor onze (orçamento)': (motor.selecionar_melhor_onze, ('4-4-2', 100_000_000)),
+    'táticas': (motor.comparar_taticas, ()),
+    'capitão': (motor.sugerir_capitao, ()),
+    'simulação capitão': (motor.simular_capitaes, ()),
+    'transferências': (motor.sugerir_transferencias, ('Médio', 3_000_000)),
+}
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    funcao()
+    return time.perf_counter() - inicio
+
+
+def main(tamanhos):
+    print(f"{'jogadores':>10} {'consulta':<24} {'sem cache ms':>13} {'memória ms':>11} {'disco ms':>9}")
+    for n in tamanhos:
+        df = sanitizar(gerar_liga(n))
+        with tempfile.TemporaryDirectory() as pasta:
+            cache = CacheResultados(pasta=pasta)
+            for nome, (funcao, args) in CONSULTAS.items():
+                t_falha = cronometrar(lambda: cache.chamar(funcao, df, *args))
+                t_memoria = cronometrar(lambda: cache.chamar(funcao, df, *args))
+                t_disco = cronometrar(lambda: CacheResultados(pasta=pasta).chamar(funcao, df, *args))
+                print(f"{n:>10} {nome:<24} {t_falha * 1e3:>13.1f} {t_memoria * 1e3:>11.1f} {t_disco * 1e3:>9.1f}")
+            print(f"{'':>10} {cache.estatisticas()}")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1_000, 100_000])
@@ -0,0 +1,50 @@
+"""Trocas para todas as posições via índice de mercado vs. sugerir_transferencias por posição.
+
+Uso: python benchmarks/bench_mercado.py [n_jogadores ...]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_planeamento import gerar_liga  # noqa: E402
+from ligarecord import motor  # noqa: E402
+from ligarecord.mercado import melhores_trocas, melhorias_por_euro  # noqa: E402
+from ligarecord.taticas import POSICOES  # noqa: E402
+
+ORCAMENTOS = np.linspace(0, 5_000_000, 11)
+
+
+def main(tamanhos):
+    print(f"{len(ORCAMENTOS)} orçamentos")
+    print(f"{'jogadores':>10} {'por posição ms':>15} {'índice ms':>10} {'trocas ms':>10} {'por euro ms':>12}")
+    for n in tamanhos:
+        df = motor.calcular_metricas(gerar_liga(n))
+        plantel = motor.plantel_atual(df)
+
+        inicio = time.perf_counter()
+        for orcamento in ORCAMENTOS:
+            for posicao in POSICOES:
+                motor.sugerir_transferencias(df, posicao, orcamento)
+        t_antigo = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        indice = motor.indice_mercado(df)
+        t_indice = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        melhores_trocas(indice, plantel, ORCAMENTOS)
+        t_trocas = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        melhorias_por_euro(indice, plantel, ORCAMENTOS[-1])
+        t_euro = time.perf_counter() - inicio
+
+        print(f"{n:>10} {t_antigo * 1000:>15.1f} {t_indice * 1000:>10.1f} {t_trocas * 1000:>10.2f} {t_euro * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1_000, 10_000, 100_000])
@@ -0,0 +1,106 @@
+"""Escalabilidade das operações principais numa liga sintética de 1k a 1M jogadores.
+
+Cada caso mede o melhor de algumas repetições e, numa execução à parte, o
+pico de memória (tracemalloc). A liga vem de `ligarecord.sintetico`, com as
+mesmas colunas que jogadores.xlsx. O carregamento é medido pela cache
+colunar (o caminho habitual) e, até `LIMITE_EXCEL` jogadores, também pela
+importação do Excel; a tabela virtual só é medida se houver um ecrã.
+
+Uso: python benchmarks/bench_motor.py [n_jogadores ...]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ligarecord import motor  # noqa: E402
+from ligarecord.armazenamento import caminhos_cache, carregar_jogadores, guardar_cache, sanitizar  # noqa: E402
+from ligarecord.sintetico import gerar_liga  # noqa: E402
+
+LIMITE_EXCEL = 10_000
+ORCAMENTO_PLANTEL = 100_000_000
+ORCAMENTO_TRANSFERENCIA = 5_000_000
+
+
+def medir(funcao, repeticoes=3):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    tracemalloc.start()
+    funcao()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(tempos), pico
+
+
+def tabela_virtual():
+    """Raiz Tk escondida para medir `preencher_tabela`, ou None sem ecrã"""
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None
+    root.withdraw()
+    return root
+
+
+def casos(df, pasta, root):
+    """Nome -> função sem argumentos, pela ordem em que a aplicação as usa"""
+    from main import LigaRecordApp
+    from tabela_virtual import TabelaVirtual
+
+    excel = os.path.join(pasta, 'jogadores.xlsx')
+    if len(df) <= LIMITE_EXCEL:
+        df.drop(columns='ID').to_excel(excel, index=False)
+    else:
+        # Sem Excel real: o ficheiro só serve de origem à cache
+        open(excel, 'wb').close()
+    guardar_cache(df, excel, associar=True)
+    app = SimpleNamespace(df=df)
+
+    resultado = {
+        'carregar_dados (cache)': lambda: carregar_jogadores(excel),
+    }
+    if len(df) <= LIMITE_EXCEL:
+        # Sem os metadados a cache deixa de ser válida e o Excel é importado de novo
+        resultado['carregar_dados (Excel)'] = lambda: (os.remove(caminhos_cache(excel)[1]),
+                                                       carregar_jogadores(excel))
+    resultado.update({
+        'calcular_metricas': lambda: motor.calcular_metricas(df),
+        'preparar_colunas_filtro': lambda: LigaRecordApp.preparar_colunas_filtro(app),
+    })
+    if root is not None:
+        LigaRecordApp.preparar_colunas_filtro(app)
+        app.tabela_jogadores = TabelaVirtual(root, ('Nome', 'Posição', 'Status'),
+                                             lambda p: LigaRecordApp.valores_linha(app, p))
+        resultado['preencher_tabela'] = lambda: (LigaRecordApp.preencher_tabela(app), root.update_idletasks())
+    resultado.update({
+        'selecionar_melhor_onze': lambda: motor.selecionar_melhor_onze(df, '4-4-2'),
+        'selecionar_melhor_onze (orçamento)': lambda: motor.selecionar_melhor_onze(df, '4-4-2', ORCAMENTO_PLANTEL),
+        'comparar_taticas': lambda: motor.comparar_taticas(df),
+        'sugerir_transferencias': lambda: motor.sugerir_transferencias(df, 'Médio', ORCAMENTO_TRANSFERENCIA),
+    })
+    return resultado
+
+
+def main(tamanhos):
+    root = tabela_virtual()
+    if root is None:
+        print("(sem ecrã: preencher_tabela não é medido)")
+    print(f"{'jogadores':>10} {'operação':<36} {'ms':>10} {'pico MB':>9}")
+    for n in tamanhos:
+        df = sanitizar(gerar_liga(n))
+        with tempfile.TemporaryDirectory() as pasta:
+            for nome, funcao in casos(df, pasta, root).items():
+                tempo, pico = medir(funcao)
+                print(f"{n:>10} {nome:<36} {tempo * 1e3:>10.1f} {pico / 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1_000, 10_000, 100_000, 1_000_000])
@@ -0,0 +1,63 @@
+"""Otimizador de plantel numa liga sintética, com orçamentos do mínimo ao folgado.
+
+Para cada tamanho da liga (`ligarecord.sintetico`) os orçamentos vão do
+custo do plantel mais barato possível ao custo do plantel guloso (os
+melhores scores por posição, sem olhar ao preço), acima do qual o orçamento
+deixa de pesar. Compara o tempo e o score do onze com a escolha gulosa.
+
+Uso: python benchmarks/bench_otimizador.py [n_jogadores ...]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ligarecord.armazenamento import sanitizar  # noqa: E402
+from ligarecord.otimizador import QUOTAS_PLANTEL, otimizar_plantel  # noqa: E402
+from ligarecord.sintetico import gerar_liga  # noqa: E402
+from ligarecord.taticas import quotas_formacao  # noqa: E402
+
+FORMACOES = ['4-4-2', '3-5-2']
+# Frações do intervalo entre o plantel mais barato e o guloso
+FRACOES_ORCAMENTO = [0.05, 0.25, 0.5, 0.75, 1.0]
+
+
+def guloso(df, formacao):
+    """Top-N por posição sem olhar ao preço: (score do onze, custo do plantel)"""
+    plantel = pd.concat([df[df['Posição'] == pos].nlargest(qtd, 'Score Ajustado')
+                         for pos, qtd in QUOTAS_PLANTEL.items()])
+    onze = pd.concat([plantel[plantel['Posição'] == pos].nlargest(qtd, 'Score Ajustado')
+                      for pos, qtd in quotas_formacao(formacao).items()])
+    return onze['Score Ajustado'].sum(), plantel['Preço'].sum()
+
+
+def orcamentos(df):
+    minimo = sum(df.loc[df['Posição'] == pos, 'Preço'].nsmallest(qtd).sum() for pos, qtd in QUOTAS_PLANTEL.items())
+    folgado = guloso(df, FORMACOES[0])[1]
+    # Múltiplos de 50 mil, como os preços
+    return [np.ceil((minimo + f * (folgado - minimo)) / 50_000) * 50_000 for f in FRACOES_ORCAMENTO]
+
+
+def main(tamanhos):
+    print(f"{'jogadores':>10} {'formação':>8} {'orçamento M€':>13} {'ótimo ms':>10} {'score':>7} "
+          f"{'custo M€':>9} {'guloso':>7}")
+    for n in tamanhos:
+        df = sanitizar(gerar_liga(n))
+        df = df[~df['Lesionado']]
+        for formacao in FORMACOES:
+            score_g, _ = guloso(df, formacao)
+            for orcamento in orcamentos(df):
+                inicio = time.perf_counter()
+                res = otimizar_plantel(df, quotas_formacao(formacao), orcamento)
+                tempo = time.perf_counter() - inicio
+                score_o = df.loc[res['onze'], 'Score Ajustado'].sum()
+                print(f"{n:>10} {formacao:>8} {orcamento / 1e6:>13.2f} {tempo * 1000:>10.1f} {score_o:>7.3f} "
+                      f"{res['custo'] / 1e6:>9.2f} {score_g:>7.3f}")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1_000, 10_000, 100_000])
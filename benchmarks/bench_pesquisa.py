@@ -0,0 +1,51 @@
+"""Construção e consultas do índice de nomes vs. pesquisa linear.
+
+Uso: python benchmarks/bench_pesquisa.py [n_jogadores ...]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ligarecord.pesquisa import IndiceNomes  # noqa: E402
+
+PRIMEIROS = ['João', 'José', 'Tomás', 'Gonçalo', 'Rúben', 'André', 'Álvaro', 'Diogo', 'Nuno', 'Pedro',
+             'Vitinha', 'Bruma', 'Sérgio', 'Fábio', 'Otávio', 'Iker', 'Zé', 'Chiquinho']
+APELIDOS = ['Silva', 'Santos', 'Gonçalves', 'Araújo', 'Fernandes', 'Mendes', 'Simões', 'Conceição',
+            'Gyökeres', 'Kökçü', 'Pavlidis', 'Otamendi', 'Carvalho', 'Brás', 'Sá', 'Guedes']
+CONSULTAS = ['joao', 'gyokeres', 'conceicao', 'tomas sim', 'ze', 'xyz']
+
+
+def gerar_nomes(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [f"{PRIMEIROS[a]} {APELIDOS[b]} {c}" for a, b, c in
+            zip(rng.integers(0, len(PRIMEIROS), n), rng.integers(0, len(APELIDOS), n), rng.integers(0, 10_000, n))]
+
+
+def medir(funcao, repeticoes=20):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado = funcao()
+    return (time.perf_counter() - inicio) / repeticoes, resultado
+
+
+def main(tamanhos):
+    for n in tamanhos:
+        nomes = gerar_nomes(n)
+        inicio = time.perf_counter()
+        indice = IndiceNomes(np.arange(n), nomes)
+        print(f"\n{n} jogadores: índice construído em {time.perf_counter() - inicio:.2f}s")
+        minusculos = [nome.lower() for nome in nomes]
+        print(f"{'consulta':>12} {'linear ms':>10} {'índice ms':>10} {'resultados':>11} {'aprox. ms':>10}")
+        for consulta in CONSULTAS:
+            t_linear, _ = medir(lambda: [i for i, nome in enumerate(minusculos) if consulta in nome], 3)
+            t_indice, ids = medir(lambda: indice.procurar(consulta))
+            t_aprox, _ = medir(lambda: indice.procurar_aproximado(consulta))
+            print(f"{consulta:>12} {t_linear * 1000:>10.2f} {t_indice * 1000:>10.3f} {len(ids):>11} {t_aprox * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [10_000, 100_000])
@@ -0,0 +1,71 @@
+"""Planeamento de transferências: tempo e ganho face a não transferir, por horizonte.
+
+Uso: python benchmarks/bench_planeamento.py [n_jogadores ...]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ligarecord.otimizador import QUOTAS_PLANTEL  # noqa: E402
+from ligarecord.planeamento import planear_transferencias  # noqa: E402
+
+HORIZONTES = [1, 3, 5, 8]
+TEMPOS_LIMITE = [0.5, 2.0]
+ORCAMENTO = 2_000_000
+
+
+def gerar_liga(n, seed=0):
+    rng = np.random.default_rng(seed)
+    posicoes = rng.choice(list(QUOTAS_PLANTEL), size=n, p=[0.11, 0.35, 0.26, 0.28])
+    df = pd.DataFrame({
+        'ID': np.arange(n),
+        'Nome': [f"Jogador {i}" for i in range(n)],
+        'Equipa': rng.integers(0, 18, size=n).astype(str),
+        'Posição': posicoes,
+        'Preço': rng.integers(10, 180, size=n) * 50_000,
+        'Pontos Última Jornada': rng.integers(-3, 16, size=n),
+        'Pontos Totais': rng.integers(0, 160, size=n),
+        'Titular': False,
+        'Suplente': False,
+        'Reserva': False,
+        'Dificuldade do Jogo': rng.integers(1, 6, size=n),
+        'Lesionado': rng.random(n) < 0.05,
+        'Expulso': rng.random(n) < 0.01,
+    })
+    plantel = np.concatenate([rng.choice(np.flatnonzero(posicoes == pos), qtd, replace=False)
+                              for pos, qtd in QUOTAS_PLANTEL.items()])
+    df.loc[plantel, 'Titular'] = True
+    return df
+
+
+def gerar_calendario(df, jornadas, seed=0):
+    rng = np.random.default_rng(seed)
+    equipas = df['Equipa'].unique()
+    return pd.DataFrame({
+        'Equipa': np.tile(equipas, jornadas),
+        'Jornada': np.repeat(np.arange(1, jornadas + 1), len(equipas)),
+        'Dificuldade do Jogo': rng.integers(1, 6, size=jornadas * len(equipas)),
+    })
+
+
+def main(tamanhos):
+    print(f"{'jogadores':>10} {'jornadas':>9} {'limite s':>9} {'tempo s':>8} {'ganho':>7} {'completo':>9}")
+    for n in tamanhos:
+        df = gerar_liga(n)
+        for jornadas in HORIZONTES:
+            calendario = gerar_calendario(df, jornadas)
+            for limite in TEMPOS_LIMITE:
+                inicio = time.perf_counter()
+                plano = planear_transferencias(df, ORCAMENTO, jornadas, calendario, tempo_limite=limite)
+                tempo = time.perf_counter() - inicio
+                ganho = plano['pontos'] - plano['pontos_sem_transferencias']
+                print(f"{n:>10} {jornadas:>9} {limite:>9.1f} {tempo:>8.2f} {ganho:>7.1f} {str(plano['completo']):>9}")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1_000, 100_000])
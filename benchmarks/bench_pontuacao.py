@@ -0,0 +1,70 @@
+"""Scores de vários perfis numa só operação vs. um cálculo pandas por perfil.
+
+Uso: python benchmarks/bench_pontuacao.py [n_jogadores ...]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ligarecord.pontuacao import MotorPontuacao, completar_perfil  # noqa: E402
+
+N_PERFIS = 16
+N_ALTERADOS = 10
+
+
+def gerar_estatisticas(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Pontos Totais': rng.integers(0, 150, n),
+        'Pontos Última Jornada': rng.integers(-3, 20, n),
+        'Dificuldade do Jogo': rng.integers(1, 6, n),
+    })
+
+
+def gerar_perfis(k, seed=0):
+    rng = np.random.default_rng(seed)
+    return {f"p{i}": {'total': rng.random(), 'ultima': rng.random(), 'dificuldade': rng.random()}
+            for i in range(k)}
+
+
+def por_perfil(df, perfis):
+    """Cálculo antigo, repetido para cada perfil"""
+    for perfil in perfis.values():
+        p = completar_perfil(perfil)
+        score = (df['Pontos Totais'] * p['total'] + df['Pontos Última Jornada'] * p['ultima'] +
+                 1 / (df['Dificuldade do Jogo'] + 1) * p['dificuldade'])
+        ajustado = (score - score.min()) / (score.max() - score.min())
+        _ = ajustado * p['capitao'] + 1 / (df['Dificuldade do Jogo'] + 1) * p['capitao_dificuldade']
+
+
+def main(tamanhos):
+    print(f"{N_PERFIS} perfis, {N_ALTERADOS} jogadores alterados na atualização incremental")
+    print(f"{'jogadores':>10} {'por perfil ms':>14} {'matriz ms':>10} {'incremental ms':>15}")
+    for n in tamanhos:
+        df = gerar_estatisticas(n)
+        perfis = gerar_perfis(N_PERFIS)
+
+        inicio = time.perf_counter()
+        por_perfil(df, perfis)
+        t_pandas = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        motor = MotorPontuacao(df, perfis)
+        t_matriz = time.perf_counter() - inicio
+
+        posicoes = np.random.default_rng(1).integers(0, n, N_ALTERADOS)
+        df.iloc[posicoes, 1] = 5
+        inicio = time.perf_counter()
+        motor.atualizar(df, posicoes)
+        t_incremental = time.perf_counter() - inicio
+
+        print(f"{n:>10} {t_pandas * 1000:>14.1f} {t_matriz * 1000:>10.1f} {t_incremental * 1000:>15.3f}")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1_000, 10_000, 100_000, 1_000_000])
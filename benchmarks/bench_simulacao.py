@@ -0,0 +1,35 @@
+"""Simulação Monte Carlo do capitão: tempo por número de sorteios, bloco e processos.
+
+Uso: python benchmarks/bench_simulacao.py [amostras ...]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ligarecord.simulacao import simular_capitao  # noqa: E402
+
+TITULARES = 11
+BLOCOS = [5_000, 20_000, 100_000]
+PROCESSOS = [1, 4]
+
+
+def main(tamanhos):
+    rng = np.random.default_rng(0)
+    media = rng.uniform(1, 8, TITULARES)
+    desvio = rng.uniform(1, 4, TITULARES)
+    print(f"{'amostras':>10} {'bloco':>8} {'processos':>10} {'tempo s':>8} {'máx P(ótimo)':>13}")
+    for amostras in tamanhos:
+        for bloco in BLOCOS:
+            for processos in PROCESSOS:
+                inicio = time.perf_counter()
+                resultado = simular_capitao(media, desvio, amostras, bloco, semente=1, processos=processos)
+                tempo = time.perf_counter() - inicio
+                print(f"{amostras:>10} {bloco:>8} {processos:>10} {tempo:>8.3f} {resultado['prob_otimo'].max():>13.4f}")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [100_000, 1_000_000])
@@ -0,0 +1,5 @@
+"""Liga Record: motor de cálculo, armazenamento e otimização.
+
+Os submódulos são importados à medida que são precisos, para que
+`python -m ligarecord` arranque sem carregar o que a consulta não usa.
+"""
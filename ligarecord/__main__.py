@@ -0,0 +1,156 @@
+"""Linha de comandos: `python -m ligarecord jornada1.xlsx jornada2.xlsx ...`
+
+Corre as consultas do motor sobre vários ficheiros (ligas ou jornadas) sem
+abrir a interface gráfica e escreve os resultados em JSON ou CSV. Com mais
+de um ficheiro e `--processos` > 1 os ficheiros são distribuídos por um
+conjunto de processos. Com `--ingerir` os dados de jornada (CSV/JSON, de
+ficheiros, pastas ou URLs) são gravados em cada ficheiro antes das consultas
+e, com `--historico` e `--epoca`, os pontos da jornada entram no histórico.
+Com `--equipas` as consultas onze, taticas, capitao e transferencias correm
+também, todas as equipas de uma vez, para as equipas de um ficheiro JSON.
+Com LIGARECORD_PERF=1 no ambiente o tempo de cada operação vai para stderr.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+
+def _argumentos(argv):
+    from .lote import CONSULTAS, POSICOES
+    from .simulacao import AMOSTRAS
+
+    parser = argparse.ArgumentParser(prog='python -m ligarecord', description=__doc__.splitlines()[0])
+    parser.add_argument('ficheiros', nargs='+', help="ficheiros .xlsx de jogadores")
+    parser.add_argument('--consultas', default='onze,taticas,capitao',
+                        help=f"lista separada por vírgulas de: {', '.join(CONSULTAS)}")
+    parser.add_argument('--formacao', default='4-4-2')
+    parser.add_argument('--orcamento', type=float, default=None,
+                        help="orçamento do plantel; sem ele o onze sai do plantel atual")
+    parser.add_argument('--orcamento-transferencias', type=float, default=None)
+    parser.add_argument('--posicao', action='append', choices=POSICOES,
+                        help="posição para as transferências (repetível; por omissão todas)")
+    parser.add_argument('--perfil', default='padrao',
+                        help="perfil de pesos: nome de um perfil predefinido ou ficheiro .json")
+    parser.add_argument('--amostras', type=int, default=AMOSTRAS,
+                        help="sorteios Monte Carlo da consulta 'simulacao'")
+    parser.add_argument('--jornadas', type=int, default=5, help="horizonte da consulta 'plano'")
+    parser.add_argument('--tempo-limite', type=float, default=1.0,
+                        help="segundos para a pesquisa da consulta 'plano'")
+    parser.add_argument('--calendario', default=None,
+                        help="CSV/JSON (ficheiro ou URL) com Equipa, Jornada (1 = próxima) e Dificuldade do Jogo "
+                             "para a consulta 'plano'")
+    parser.add_argument('--historico', default=None,
+                        help="pasta do histórico por jornada (forma recente e modelo da simulação)")
+    parser.add_argument('--epoca', default=None,
+                        help="época em que os pontos ingeridos são acrescentados ao histórico (com --historico)")
+    parser.add_argument('--jornada', type=int, default=None,
+                        help="jornada dos pontos ingeridos, para as linhas sem a coluna 'Jornada'")
+    parser.add_argument('--ingerir', action='append', default=[], metavar='FONTE',
+                        help="CSV/JSON, pasta ou URL com dados de jornada a gravar antes das consultas (repetível)")
+    parser.add_argument('--equipas', default=None,
+                        help="JSON {equipa: {'Titular': [IDs], 'Suplente': [...], 'Reserva': [...]}} "
+                             "a avaliar em lote sobre a mesma liga")
+    parser.add_argument('--saida', default='-', help="ficheiro .json ou .csv (por omissão JSON no stdout)")
+    parser.add_argument('--processos', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    args.consultas = tuple(c.strip() for c in args.consultas.split(',') if c.strip())
+    invalidas = set(args.consultas) - set(CONSULTAS)
+    if invalidas:
+        parser.error(f"consultas desconhecidas: {', '.join(sorted(invalidas))}")
+    for consulta in ('transferencias', 'plano', 'mercado'):
+        if consulta in args.consultas and args.orcamento_transferencias is None:
+            parser.error(f"a consulta '{consulta}' precisa de --orcamento-transferencias")
+    if args.epoca is not None:
+        if not (args.historico and args.ingerir):
+            parser.error("--epoca precisa de --historico e --ingerir")
+        if len(args.ficheiros) > 1:
+            parser.error("--epoca grava o histórico a partir de um só ficheiro")
+    args.posicao = tuple(args.posicao or POSICOES)
+    try:
+        args.perfil = _perfil(args.perfil)
+    except (OSError, ValueError) as e:
+        parser.error(f"perfil inválido: {e}")
+    return args
+
+
+def _perfil(valor):
+    from .pontuacao import PERFIS, completar_perfil
+
+    if valor in PERFIS:
+        return completar_perfil(PERFIS[valor])
+    with open(valor, encoding='utf-8') as f:
+        return completar_perfil(json.load(f))
+
+
+def _escrever(resultados, saida):
+    from .lote import linhas_planas
+
+    if saida.endswith('.csv'):
+        linhas = list(linhas_planas(resultados))
+        colunas = list(dict.fromkeys(c for linha in linhas for c in linha))
+        with open(saida, 'w', newline='', encoding='utf-8') as f:
+            escritor = csv.DictWriter(f, fieldnames=colunas)
+            escritor.writeheader()
+            escritor.writerows(linhas)
+        return
+
+    texto = json.dumps(resultados, ensure_ascii=False, indent=2, default=str)
+    if saida == '-':
+        sys.stdout.write(texto + '\n')
+    else:
+        with open(saida, 'w', encoding='utf-8') as f:
+            f.write(texto)
+
+
+def main(argv=None):
+    args = _argumentos(argv)
+
+    from functools import partial
+    from .lote import processar_ficheiro
+
+    tarefa = partial(
+        processar_ficheiro,
+        consultas=args.consultas,
+        formacao=args.formacao,
+        orcamento=args.orcamento,
+        posicoes=args.posicao,
+        orcamento_transferencias=args.orcamento_transferencias,
+        perfil=args.perfil,
+        amostras=args.amostras,
+        jornadas=args.jornadas,
+        tempo_limite=args.tempo_limite,
+        pasta_historico=args.historico,
+        fontes=tuple(args.ingerir),
+        caminho_equipas=args.equipas,
+        epoca=args.epoca,
+        jornada=args.jornada,
+        calendario=args.calendario,
+    )
+
+    processos = min(args.processos, len(args.ficheiros))
+    if processos <= 1:
+        resultados = [tarefa(caminho) for caminho in args.ficheiros]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            resultados = list(executor.map(tarefa, args.ficheiros))
+
+    for resultado in resultados:
+        if 'ingestao' in resultado:
+            r = resultado['ingestao']
+            print(f"{resultado['ficheiro']}: {r['linhas']} linhas ({r['invalidas']} inválidas, "
+                  f"{r['atualizadas']} atualizadas, {r['inseridas']} inseridas, "
+                  f"{r['historico']} no histórico) "
+                  f"em {r['segundos']:.2f} s, {r['linhas_por_segundo']:.0f} linhas/s", file=sys.stderr)
+            for erro in r['erros']:
+                print(f"  {erro}", file=sys.stderr)
+
+    _escrever(resultados, args.saida)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
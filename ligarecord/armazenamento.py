@@ -0,0 +1,278 @@
+import hashlib
+import importlib.util
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .historico import COLUNAS_FORMA
+from .perf import medir
+
+COLUNAS_BOOL = ['Titular', 'Suplente', 'Reserva', 'Lesionado', 'Expulso']
+COLUNAS_NECESSARIAS = ['Nome', 'Posição', 'Titular', 'Suplente', 'Reserva',
+                       'Pontos Totais', 'Pontos Última Jornada', 'Dificuldade do Jogo',
+                       'Preço', 'Lesionado', 'Expulso', 'Próximo Adversário']
+
+# Feather quando o pyarrow está instalado; caso contrário pickle do pandas
+FORMATO_CACHE = 'feather' if importlib.util.find_spec('pyarrow') else 'pickle'
+
+# A partir deste número de registos o diário é compactado (um por jogador)
+COMPACTAR_DIARIO_APOS = 1000
+
+
+def caminhos_cache(caminho_excel):
+    """Ficheiro de dados e ficheiro de metadados da cache de um Excel"""
+    base = f"{caminho_excel}.cache"
+    return f"{base}.{FORMATO_CACHE}", f"{base}.json"
+
+
+def caminho_diario(caminho_excel):
+    return f"{caminho_excel}.cache.diario.jsonl"
+
+
+def _assinatura(caminho):
+    estado = os.stat(caminho)
+    return {'mtime': estado.st_mtime_ns, 'tamanho': estado.st_size}
+
+
+def _hash_ficheiro(caminho):
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def sanitizar(df):
+    """Garante as colunas obrigatórias, os tipos booleanos e um ID por jogador.
+
+    Linhas sem ID (ou um Excel sem a coluna) recebem IDs novos, a seguir ao
+    maior já usado; só ficam estáveis depois de gravados no Excel (ver
+    carregar_jogadores).
+    """
+    if 'ID' not in df.columns:
+        df.insert(0, 'ID', np.arange(len(df)))
+    elif df['ID'].isna().any():
+        ids = pd.to_numeric(df['ID'], errors='coerce')
+        em_falta = ids.isna().to_numpy()
+        inicio = int(ids.max()) + 1 if not em_falta.all() else 0
+        ids[em_falta] = np.arange(inicio, inicio + em_falta.sum())
+        df['ID'] = ids.astype(np.int64)
+    for col in COLUNAS_NECESSARIAS:
+        if col not in df.columns:
+            df[col] = False if col in COLUNAS_BOOL else 0
+    for col in COLUNAS_BOOL:
+        df[col] = df[col].astype(bool)
+    return df
+
+
+def _ler_cache(caminho_dados):
+    if FORMATO_CACHE == 'feather':
+        return pd.read_feather(caminho_dados)
+    return pd.read_pickle(caminho_dados)
+
+
+def _ler_meta(caminho_meta):
+    try:
+        with open(caminho_meta, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _escrever_meta(caminho_meta, meta):
+    with open(caminho_meta, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+
+def guardar_cache(df, caminho_excel, associar=False):
+    """Grava o DataFrame na cache colunar associada ao Excel de origem.
+
+    A cache passa a ser a cópia de trabalho: as alterações ficam aqui até
+    serem exportadas com exportar_excel. O diário fica consolidado mas não
+    é apagado: até à exportação é o registo das alterações que o Excel não
+    tem, reaplicado se o Excel for importado de novo.
+
+    Só com `associar` (importação ou exportação do Excel) a cache passa a
+    corresponder à versão atual do ficheiro. Sem ele, se o Excel mudou desde
+    que a cache foi associada (editado fora da aplicação), a cache é
+    invalidada em vez de ficar ligada à nova versão: a próxima leitura
+    importa o Excel. Devolve False nesse caso.
+    """
+    caminho_dados, caminho_meta = caminhos_cache(caminho_excel)
+    associada = associar or cache_valida(caminho_excel)
+    df = df.reset_index(drop=True)
+    if FORMATO_CACHE == 'feather':
+        df.to_feather(caminho_dados)
+    else:
+        df.to_pickle(caminho_dados)
+
+    if not associada:
+        if os.path.exists(caminho_meta):
+            os.remove(caminho_meta)
+    else:
+        assinatura = _assinatura(caminho_excel)
+        meta = _ler_meta(caminho_meta)
+        if not meta or any(meta.get(chave) != valor for chave, valor in assinatura.items()):
+            meta = dict(assinatura, sha256=_hash_ficheiro(caminho_excel))
+        _escrever_meta(caminho_meta, meta)
+    return associada
+
+
+def cache_valida(caminho_excel):
+    """Indica se a cache corresponde à versão atual do Excel.
+
+    Compara primeiro mtime e tamanho; se diferirem, confirma pelo hash (por
+    exemplo após uma cópia que só mudou a data) e atualiza os metadados.
+    """
+    caminho_dados, caminho_meta = caminhos_cache(caminho_excel)
+    meta = _ler_meta(caminho_meta)
+    if not meta or not os.path.exists(caminho_dados):
+        return False
+
+    assinatura = _assinatura(caminho_excel)
+    if all(meta.get(chave) == valor for chave, valor in assinatura.items()):
+        return True
+    if meta.get('sha256') != _hash_ficheiro(caminho_excel):
+        return False
+    meta.update(assinatura)
+    _escrever_meta(caminho_meta, meta)
+    return True
+
+
+@medir()
+def carregar_jogadores(caminho_excel):
+    """Carrega os jogadores, importando o Excel só quando a cache está
+    desatualizada ou não existe.
+
+    Numa nova importação (o Excel foi editado fora da aplicação) as
+    alterações do diário ainda não exportadas são reaplicadas por ID. Se a
+    importação tiver de atribuir IDs, a coluna ID é escrita no Excel para
+    que o diário, o histórico e as equipas continuem a reconhecer os
+    jogadores nas importações seguintes.
+    """
+    if not os.path.exists(caminho_excel):
+        raise FileNotFoundError(f"Arquivo {caminho_excel} não encontrado!")
+
+    if cache_valida(caminho_excel):
+        try:
+            df = _ler_cache(caminhos_cache(caminho_excel)[0])
+        except Exception:
+            df = None
+        if df is not None and 'ID' in df.columns:
+            registos = aplicar_diario(df, caminho_excel)
+            if registos >= COMPACTAR_DIARIO_APOS:
+                compactar_diario(caminho_excel)
+            return df
+
+    bruto = pd.read_excel(caminho_excel)
+    df = sanitizar(bruto.copy())
+    if 'ID' not in bruto.columns or bruto['ID'].isna().any():
+        # Só a coluna ID muda no Excel; o resto fica como o utilizador o deixou
+        if 'ID' in bruto.columns:
+            bruto['ID'] = df['ID'].to_numpy()
+        else:
+            bruto.insert(0, 'ID', df['ID'].to_numpy())
+        bruto.to_excel(caminho_excel, index=False)
+    aplicar_diario(df, caminho_excel)
+    guardar_cache(df, caminho_excel, associar=True)
+    return df
+
+
+def _ler_diario(caminho):
+    """Registos {'id', 'valores'} do diário, pela ordem em que foram escritos"""
+    registos = []
+    with open(caminho, encoding='utf-8') as f:
+        for linha in f:
+            try:
+                registos.append(json.loads(linha))
+            except ValueError:
+                # Última linha incompleta (escrita interrompida)
+                continue
+    return registos
+
+
+def aplicar_diario(df, caminho_excel):
+    """Reaplica sobre df as alterações registadas no diário.
+
+    Devolve o número de registos lidos.
+    """
+    caminho = caminho_diario(caminho_excel)
+    if not os.path.exists(caminho):
+        return 0
+
+    posicoes = pd.Index(df['ID'])
+    registos = _ler_diario(caminho)
+    for registo in registos:
+        # Jogadores entretanto retirados do Excel ficam de fora
+        if registo['id'] not in posicoes:
+            continue
+        linha_df = df.index[posicoes.get_loc(registo['id'])]
+        for coluna, valor in registo['valores'].items():
+            df.loc[linha_df, coluna] = valor
+    return len(registos)
+
+
+def compactar_diario(caminho_excel):
+    """Reescreve o diário com um só registo por jogador (os valores mais recentes)"""
+    caminho = caminho_diario(caminho_excel)
+    por_jogador = {}
+    for registo in _ler_diario(caminho):
+        por_jogador.setdefault(registo['id'], {}).update(registo['valores'])
+    temporario = f"{caminho}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        for id_jogador, valores in por_jogador.items():
+            f.write(json.dumps({'id': id_jogador, 'valores': valores}, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, caminho)
+
+
+class DiarioAlteracoes:
+    """Diário append-only das alterações feitas sobre a cache.
+
+    As alterações ficam marcadas como sujas em memória e só as linhas sujas
+    são acrescentadas ao ficheiro em gravar().
+    """
+
+    def __init__(self, caminho_excel):
+        self.caminho = caminho_diario(caminho_excel)
+        self.sujos = {}
+
+    def registar(self, id_jogador, valores):
+        self.sujos.setdefault(int(id_jogador), {}).update(
+            {coluna: valor.item() if hasattr(valor, 'item') else valor for coluna, valor in valores.items()})
+
+    def gravar(self):
+        """Acrescenta as linhas sujas ao diário e devolve quantas foram gravadas"""
+        if not self.sujos:
+            return 0
+        with open(self.caminho, 'a', encoding='utf-8') as f:
+            for id_jogador, valores in self.sujos.items():
+                f.write(json.dumps({'id': id_jogador, 'valores': valores}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        gravados = len(self.sujos)
+        self.sujos.clear()
+        return gravados
+
+    def descartar(self):
+        self.sujos.clear()
+
+
+def exportar_excel(df, caminho_excel):
+    """Escreve o Excel e volta a associar a cache à nova versão do ficheiro.
+
+    O Excel passa a ter todas as alterações: o diário é apagado. As colunas
+    de forma (`historico.COLUNAS_FORMA`) são calculadas do histórico a cada
+    arranque e não são exportadas.
+    """
+    df = df.drop(columns=COLUNAS_FORMA, errors='ignore')
+    df.to_excel(caminho_excel, index=False)
+    caminho_meta = caminhos_cache(caminho_excel)[1]
+    if os.path.exists(caminho_meta):
+        os.remove(caminho_meta)
+    guardar_cache(df, caminho_excel, associar=True)
+    if os.path.exists(caminho_diario(caminho_excel)):
+        os.remove(caminho_diario(caminho_excel))
@@ -0,0 +1,281 @@
+"""Várias equipas sobre a mesma liga: um conjunto de jogadores partilhado e
+um estado por equipa.
+
+`PoolJogadores` guarda uma vez as colunas da liga de que os motores precisam,
+como arrays só de leitura. Cada equipa é apenas uma linha int8 de
+`Equipas.estados`, alinhada com as linhas do pool (e por isso indexada pelo
+ID através de `PoolJogadores.indice_id`): 0 não utilizado, 1 titular,
+2 suplente, 3 reserva, os mesmos códigos de `STATUS` na GUI.
+
+As consultas (`melhores_onzes`, `comparar_taticas_equipas`,
+`sugerir_capitaes`, `sugerir_transferencias_equipas`) avaliam todas as
+equipas de uma vez e dão os mesmos resultados que as funções de `motor`
+aplicadas a cada equipa. Devolvem linhas do pool, com -1 nas vagas.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+from .pontuacao import PERFIL_PADRAO, score_avancado
+from .taticas import POSICOES, quotas_formacao, todas_formacoes
+
+NAO_UTILIZADO, TITULAR, SUPLENTE, RESERVA = 0, 1, 2, 3
+CODIGOS_STATUS = {'Titular': TITULAR, 'Suplente': SUPLENTE, 'Reserva': RESERVA}
+# Candidatos examinados de cada vez na procura de transferências
+BLOCO = 1024
+
+
+def _so_leitura(valores):
+    valores = np.array(valores)
+    valores.setflags(write=False)
+    return valores
+
+
+class PoolJogadores:
+    """Colunas da liga partilhadas, só de leitura, por todas as equipas"""
+
+    def __init__(self, df, perfil=PERFIL_PADRAO):
+        self.df = df
+        self.indice_id = pd.Index(df['ID'])
+        self.ids = _so_leitura(df['ID'].to_numpy())
+        posicoes = df['Posição'].to_numpy(dtype=object)
+        codigos = np.full(len(df), len(POSICOES), dtype=np.int8)
+        for codigo, posicao in enumerate(POSICOES):
+            codigos[posicoes == posicao] = codigo
+        self.posicao = _so_leitura(codigos)
+        self.preco = _so_leitura(df['Preço'].to_numpy(dtype=float))
+        self.ajustado = _so_leitura(df['Score Ajustado'].to_numpy(dtype=float))
+        self.capitao = _so_leitura(df['Score Capitão'].to_numpy(dtype=float))
+        self.lesionado = _so_leitura(df['Lesionado'].to_numpy(dtype=bool))
+        self.avancado = _so_leitura(score_avancado(
+            df['Pontos Última Jornada'].to_numpy(dtype=float),
+            df['Dificuldade do Jogo'].to_numpy(dtype=float),
+            self.ajustado,
+            perfil,
+        ))
+        # Candidatos de cada posição por Score Avançado decrescente (empates pela ordem do DataFrame)
+        self.por_avancado = [
+            _so_leitura(linhas[np.argsort(-self.avancado[linhas], kind='stable')])
+            for linhas in (np.flatnonzero(codigos == c) for c in range(len(POSICOES)))
+        ]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def linhas(self, ids):
+        """Linhas do pool dos IDs dados (KeyError se algum não existir)"""
+        linhas = self.indice_id.get_indexer(np.asarray(ids))
+        if (linhas < 0).any():
+            em_falta = np.asarray(ids)[linhas < 0]
+            raise KeyError(f"IDs desconhecidos: {', '.join(map(str, em_falta[:10]))}")
+        return linhas
+
+
+class Equipas:
+    """Estado (int8 por jogador do pool) de cada equipa, por nome"""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.nomes = []
+        self.estados = np.zeros((0, len(pool)), dtype=np.int8)
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def linha(self, nome):
+        return self.nomes.index(nome)
+
+    def adicionar(self, nome, titulares=(), suplentes=(), reservas=()):
+        """Nova equipa com os IDs de cada estado; devolve a linha em `estados`"""
+        if nome in self.nomes:
+            raise ValueError(f"Equipa repetida: {nome}")
+        self.nomes.append(nome)
+        self.estados = np.vstack([self.estados, np.zeros((1, len(self.pool)), dtype=np.int8)])
+        linha = len(self.nomes) - 1
+        for ids, codigo in ((titulares, TITULAR), (suplentes, SUPLENTE), (reservas, RESERVA)):
+            self.definir(nome, ids, codigo)
+        return linha
+
+    def adicionar_dataframe(self, nome, df):
+        """Nova equipa a partir das colunas Titular/Suplente/Reserva de um DataFrame"""
+        return self.adicionar(nome, *(df.loc[df[coluna].astype(bool), 'ID'] for coluna in CODIGOS_STATUS))
+
+    def definir(self, nome, ids, codigo):
+        self.estados[self.linha(nome), self.pool.linhas(list(ids))] = codigo
+
+    def dataframe(self, nome):
+        """Cópia do DataFrame do pool com as colunas de estado da equipa (para o `motor`)"""
+        estado = self.estados[self.linha(nome)]
+        df = self.pool.df.copy()
+        for coluna, codigo in CODIGOS_STATUS.items():
+            df[coluna] = estado == codigo
+        return df
+
+    def para_dict(self):
+        return {
+            nome: {coluna: self.pool.ids[self.estados[linha] == codigo].tolist()
+                   for coluna, codigo in CODIGOS_STATUS.items()}
+            for linha, nome in enumerate(self.nomes)
+        }
+
+
+def caminho_equipas(caminho_excel):
+    return f"{caminho_excel}.equipas.json"
+
+
+def carregar_equipas(caminho, pool, equipas=None):
+    """Equipas de um JSON {nome: {'Titular': [IDs], 'Suplente': [...], 'Reserva': [...]}}.
+
+    Com `equipas` as do ficheiro são acrescentadas a esse conjunto.
+    """
+    with open(caminho, encoding='utf-8') as f:
+        dados = json.load(f)
+    equipas = Equipas(pool) if equipas is None else equipas
+    for nome, estados in dados.items():
+        equipas.adicionar(nome, *(estados.get(coluna, ()) for coluna in CODIGOS_STATUS))
+    return equipas
+
+
+def guardar_equipas(equipas, caminho, nomes=None):
+    """Escreve as equipas `nomes` (todas por omissão) no formato de `carregar_equipas`"""
+    dados = equipas.para_dict()
+    if nomes is not None:
+        dados = {nome: dados[nome] for nome in nomes}
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
+
+
+def _planteis(equipas, selecao):
+    """Linhas do pool selecionadas por equipa, numa matriz (equipas x máximo) com -1 nas vagas"""
+    equipa, linhas = np.nonzero(selecao)
+    contagem = np.bincount(equipa, minlength=len(equipas))
+    planteis = np.full((len(equipas), max(contagem.max(initial=0), 1)), -1, dtype=np.intp)
+    inicio = np.concatenate(([0], np.cumsum(contagem)[:-1]))
+    planteis[equipa, np.arange(len(equipa)) - inicio[equipa]] = linhas
+    return planteis
+
+
+def _ordenar_por(planteis, scores, mascara):
+    """Ordena cada linha por score decrescente (empates pela ordem do pool); fora da máscara vai para o fim"""
+    valores = np.where(mascara, scores[planteis], -np.inf)
+    ordem = np.argsort(-valores, axis=1, kind='stable')
+    return np.take_along_axis(planteis, ordem, axis=1), np.take_along_axis(valores, ordem, axis=1)
+
+
+def _prefixos(equipas):
+    """Jogadores disponíveis (plantel sem lesionados) de cada equipa por posição, ordenados por score"""
+    pool = equipas.pool
+    planteis = _planteis(equipas, (equipas.estados > NAO_UTILIZADO) & ~pool.lesionado)
+    valido = planteis >= 0
+    return [
+        _ordenar_por(planteis, pool.ajustado, valido & (pool.posicao[planteis] == codigo))
+        for codigo in range(len(POSICOES))
+    ]
+
+
+def melhores_onzes(equipas, formacao):
+    """Melhor onze da formação para cada equipa, a partir do próprio plantel.
+
+    Devolve (linhas, totais): linhas é uma matriz (equipas x 11) por ordem
+    de posição e de score, com -1 onde o plantel não chega para a quota.
+    """
+    quotas = quotas_formacao(formacao)
+    partes = []
+    for (ordenados, valores), posicao in zip(_prefixos(equipas), POSICOES):
+        q = quotas[posicao]
+        escolhidos = np.full((len(equipas), q), -1, dtype=np.intp)
+        n = min(q, ordenados.shape[1])
+        escolhidos[:, :n] = np.where(np.isfinite(valores[:, :n]), ordenados[:, :n], -1)
+        partes.append(escolhidos)
+    linhas = np.hstack(partes)
+    totais = np.where(linhas >= 0, equipas.pool.ajustado[linhas], 0.0).sum(axis=1)
+    return linhas, totais
+
+
+def comparar_taticas_equipas(equipas, formacoes=None):
+    """Pontuação de cada formação para cada equipa.
+
+    Devolve (formações, totais) com totais (equipas x formações); NaN nas
+    formações que o plantel não consegue preencher.
+    """
+    formacoes = todas_formacoes() if formacoes is None else list(formacoes)
+    quotas = np.array([[quotas_formacao(f)[pos] for pos in POSICOES] for f in formacoes], dtype=np.intp)
+    totais = np.zeros((len(equipas), len(formacoes)))
+    validas = np.ones((len(equipas), len(formacoes)), dtype=bool)
+    for coluna, (_, valores) in enumerate(_prefixos(equipas)):
+        finitos = np.where(np.isfinite(valores), valores, 0.0)
+        prefixos = np.hstack([np.zeros((len(equipas), 1)), np.cumsum(finitos, axis=1)])
+        disponiveis = np.isfinite(valores).sum(axis=1)
+        validas &= quotas[None, :, coluna] <= disponiveis[:, None]
+        k = np.minimum(quotas[None, :, coluna], disponiveis[:, None])
+        totais += np.take_along_axis(prefixos, k, axis=1)
+    return formacoes, np.where(validas, totais, np.nan)
+
+
+def sugerir_capitaes(equipas, n=5):
+    """Titulares de cada equipa com maior Score Capitão: matriz (equipas x n), -1 nas vagas"""
+    planteis = _planteis(equipas, equipas.estados == TITULAR)
+    ordenados, valores = _ordenar_por(planteis, equipas.pool.capitao, planteis >= 0)
+    resultado = np.full((len(equipas), n), -1, dtype=np.intp)
+    k = min(n, ordenados.shape[1])
+    resultado[:, :k] = np.where(np.isfinite(valores[:, :k]), ordenados[:, :k], -1)
+    return resultado
+
+
+def _primeiros(equipas, candidatos, limite_preco, limiar, k=3):
+    """Primeiros `k` candidatos (já ordenados) de cada equipa que não são seus
+    titulares, com preço <= limite e Score Avançado > limiar.
+
+    Os candidatos são vistos por blocos e cada equipa sai assim que tem `k`
+    ou que o score do bloco desce abaixo do seu limiar.
+    """
+    pool = equipas.pool
+    escolhidos = np.full((len(equipas), k), -1, dtype=np.intp)
+    encontrados = np.zeros(len(equipas), dtype=np.intp)
+    pendentes = np.arange(len(equipas))
+    for inicio in range(0, len(candidatos), BLOCO):
+        if len(pendentes) == 0:
+            break
+        bloco = candidatos[inicio:inicio + BLOCO]
+        aceites = (
+            (pool.preco[bloco][None, :] <= limite_preco[pendentes, None])
+            & (pool.avancado[bloco][None, :] > limiar[pendentes, None])
+            & (equipas.estados[np.ix_(pendentes, bloco)] != TITULAR)
+        )
+        lugar = encontrados[pendentes, None] + np.cumsum(aceites, axis=1) - 1
+        usar = aceites & (lugar < k)
+        i, j = np.nonzero(usar)
+        escolhidos[pendentes[i], lugar[i, j]] = bloco[j]
+        encontrados[pendentes] += usar.sum(axis=1)
+        pendentes = pendentes[(encontrados[pendentes] < k) & (pool.avancado[bloco[-1]] > limiar[pendentes])]
+    return escolhidos
+
+
+def sugerir_transferencias_equipas(equipas, posicao, orcamentos):
+    """`motor.sugerir_transferencias` para todas as equipas de uma vez.
+
+    `orcamentos` é um valor ou um por equipa. Devolve um dict com 'venda'
+    (linha do jogador mais substituível, -1 sem plantel na posição),
+    'orcamento_ajustado', 'top_performers' e 'custo_beneficio' (matrizes
+    equipas x 3). O Score Avançado usa o perfil do pool.
+    """
+    pool = equipas.pool
+    codigo = POSICOES.index(posicao)
+    orcamentos = np.broadcast_to(np.asarray(orcamentos, dtype=float), (len(equipas),))
+
+    planteis = _planteis(equipas, (equipas.estados > NAO_UTILIZADO) & (pool.posicao == codigo))
+    valido = planteis >= 0
+    scores = np.where(valido, pool.ajustado[planteis], np.inf)
+    tem_plantel = valido.any(axis=1)
+    venda = np.where(tem_plantel, planteis[np.arange(len(equipas)), np.argmin(scores, axis=1)], -1)
+    ajustado = orcamentos + np.where(tem_plantel, pool.preco[venda], 0.0)
+    limiar = np.where(tem_plantel, scores.min(axis=1, initial=np.inf) * 1.2, -np.inf)
+
+    candidatos = pool.por_avancado[codigo]
+    return {
+        'venda': venda,
+        'orcamento_ajustado': ajustado,
+        'top_performers': _primeiros(equipas, candidatos, ajustado, limiar),
+        'custo_beneficio': _primeiros(equipas, candidatos, np.minimum(orcamentos, ajustado), limiar),
+    }
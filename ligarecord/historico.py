@@ -0,0 +1,227 @@
+"""Histórico por jornada: armazenamento colunar append-only e forma recente.
+
+Cada época é uma pasta com um ficheiro binário por coluna (ver `ESQUEMA`),
+uma linha por (jogador, jornada). Acrescentar uma jornada escreve apenas as
+linhas novas no fim de cada ficheiro; a leitura usa np.memmap, pelo que só
+as páginas usadas são carregadas. Se uma escrita for interrompida a meio, as
+colunas ficam com comprimentos diferentes e a cauda incompleta é ignorada
+(e cortada na escrita seguinte).
+
+As características de forma (média das últimas N jornadas, EWMA, médias em
+casa e fora) são calculadas de forma vetorizada sobre o histórico ordenado
+por jogador e jornada.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+# Coluna -> (ficheiro, tipo). 'Casa': 1 em casa, 0 fora, -1 desconhecido
+ESQUEMA = {
+    'ID': ('id', '<i4'),
+    'Jornada': ('jornada', '<i2'),
+    'Pontos': ('pontos', '<f4'),
+    'Dificuldade do Jogo': ('dificuldade', '<i1'),
+    'Casa': ('casa', '<i1'),
+}
+COLUNAS_OBRIGATORIAS = ['ID', 'Jornada', 'Pontos', 'Dificuldade do Jogo']
+
+JANELA_FORMA = 5
+ALFA_EWMA = 0.3
+COLUNAS_FORMA = ['Jogos', 'Forma', 'EWMA', 'Média Casa', 'Média Fora']
+
+
+def caminho_historico(caminho_excel):
+    return f"{caminho_excel}.historico"
+
+
+class HistoricoJornadas:
+    """Histórico append-only particionado por época, com colunas em memória mapeada"""
+
+    def __init__(self, pasta):
+        self.pasta = pasta
+
+    def _pasta_epoca(self, epoca):
+        epoca = str(epoca)
+        if not epoca or os.sep in epoca or epoca in ('.', '..'):
+            raise ValueError(f"Nome de época inválido: {epoca!r}")
+        return os.path.join(self.pasta, epoca)
+
+    def _caminhos(self, epoca):
+        pasta = self._pasta_epoca(epoca)
+        return {coluna: (os.path.join(pasta, f"{ficheiro}.bin"), np.dtype(tipo))
+                for coluna, (ficheiro, tipo) in ESQUEMA.items()}
+
+    def _linhas(self, caminhos):
+        """Número de linhas completas (presentes em todas as colunas)"""
+        return min(
+            (os.path.getsize(caminho) // tipo.itemsize if os.path.exists(caminho) else 0)
+            for caminho, tipo in caminhos.values()
+        )
+
+    def epocas(self):
+        if not os.path.isdir(self.pasta):
+            return []
+        return sorted(e for e in os.listdir(self.pasta) if os.path.isdir(os.path.join(self.pasta, e)))
+
+    def acrescentar(self, epoca, registos):
+        """Acrescenta linhas à época e devolve quantas foram escritas.
+
+        `registos` tem as colunas 'ID', 'Jornada', 'Pontos' e 'Dificuldade do
+        Jogo' e, opcionalmente, 'Casa' (booleano; vazio se desconhecido). Só
+        as linhas novas são escritas; uma linha repetida para o mesmo
+        (jogador, jornada) substitui a anterior na leitura.
+        """
+        em_falta = [c for c in COLUNAS_OBRIGATORIAS if c not in registos.columns]
+        if em_falta:
+            raise ValueError(f"Colunas em falta no histórico: {', '.join(em_falta)}")
+        if len(registos) == 0:
+            return 0
+
+        caminhos = self._caminhos(epoca)
+        os.makedirs(self._pasta_epoca(epoca), exist_ok=True)
+        completas = self._linhas(caminhos)
+        for coluna, (caminho, tipo) in caminhos.items():
+            if coluna in registos.columns:
+                valores = registos[coluna]
+                if coluna == 'Casa':
+                    valores = np.where(valores.isna(), -1, valores.fillna(False).astype(bool))
+                valores = np.asarray(valores)
+            else:
+                valores = np.full(len(registos), -1)
+            with open(caminho, 'ab') as f:
+                # Corta a cauda de uma escrita anterior interrompida
+                f.truncate(completas * tipo.itemsize)
+                f.write(np.ascontiguousarray(valores, dtype=tipo).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        return len(registos)
+
+    def colunas(self, epoca):
+        """Colunas da época como arrays em memória mapeada (só leitura)"""
+        caminhos = self._caminhos(epoca)
+        n = self._linhas(caminhos)
+        if n == 0:
+            return {coluna: np.empty(0, dtype=tipo) for coluna, (_, tipo) in caminhos.items()}
+        return {coluna: np.memmap(caminho, dtype=tipo, mode='r', shape=(n,))
+                for coluna, (caminho, tipo) in caminhos.items()}
+
+    def ler(self, epocas=None):
+        """Histórico das épocas pedidas (todas por omissão) num DataFrame.
+
+        Tem as colunas 'Época' (categórica) e as de `ESQUEMA`, época a época
+        e por ordem de escrita, e serve de `historico` à simulação e ao
+        planeamento.
+        """
+        epocas = sorted(str(e) for e in (self.epocas() if epocas is None else epocas))
+        partes = [self.colunas(epoca) for epoca in epocas]
+        codigos = np.concatenate([np.full(len(p['ID']), i, dtype=np.int16) for i, p in enumerate(partes)]
+                                 or [np.empty(0, dtype=np.int16)])
+        historico = pd.DataFrame({
+            # Categórica com as épocas por ordem: os códigos são cronológicos
+            'Época': pd.Categorical.from_codes(codigos, categories=epocas),
+            **{c: np.concatenate([p[c] for p in partes] or [np.empty(0, dtype=t)])
+               for c, (_, t) in ESQUEMA.items()},
+        })
+        # Chave repetida: fica a última escrita (a ordenação estável mantém a ordem de escrita)
+        chave = _chave(historico)
+        ordem = np.argsort(chave, kind='stable')
+        repetida = np.zeros(len(chave), dtype=bool)
+        repetida[ordem[:-1][chave[ordem[1:]] == chave[ordem[:-1]]]] = True
+        if repetida.any():
+            historico = historico[~repetida].reset_index(drop=True)
+        return historico
+
+
+def _chave(historico):
+    """Chave inteira (jogador, época, jornada) de cada linha, ordenável"""
+    epoca = historico['Época'] if 'Época' in historico.columns else None
+    if epoca is None:
+        codigos = np.zeros(len(historico), dtype=np.int64)
+    elif isinstance(epoca.dtype, pd.CategoricalDtype):
+        codigos = epoca.cat.codes.to_numpy(dtype=np.int64)
+    else:
+        codigos = np.unique(epoca.to_numpy(dtype=str), return_inverse=True)[1].astype(np.int64)
+    ids = historico['ID'].to_numpy(dtype=np.int64) & 0xFFFFFFFF
+    jornadas = historico['Jornada'].to_numpy(dtype=np.int64) & 0xFFFF
+    return (ids << 31) | (codigos << 16) | jornadas
+
+
+def _ordenar(historico):
+    """Ordem cronológica por jogador, código do grupo de cada linha e início de cada grupo"""
+    ordem = np.argsort(_chave(historico), kind='stable')
+    ids = historico['ID'].to_numpy()[ordem]
+    novo = np.ones(len(ordem), dtype=bool)
+    novo[1:] = ids[1:] != ids[:-1]
+    grupo = np.cumsum(novo) - 1
+    inicios = np.flatnonzero(novo)
+    return ordem, grupo, inicios
+
+
+def forma_movel(historico, janela=JANELA_FORMA):
+    """Média dos pontos de cada jogador nas últimas `janela` jornadas até cada linha.
+
+    Devolve uma Series alinhada com as linhas de `historico`.
+    """
+    resultado = np.full(len(historico), np.nan)
+    if len(historico):
+        ordem, grupo, inicios = _ordenar(historico)
+        pontos = historico['Pontos'].to_numpy(dtype=float)[ordem]
+        acumulado = np.concatenate(([0.0], np.cumsum(pontos)))
+        i = np.arange(len(ordem))
+        desde = np.maximum(i - janela + 1, inicios[grupo])
+        resultado[ordem] = (acumulado[i + 1] - acumulado[desde]) / (i + 1 - desde)
+    return pd.Series(resultado, index=historico.index, name='Forma')
+
+
+def caracteristicas_forma(historico, janela=JANELA_FORMA, alfa=ALFA_EWMA):
+    """Características de forma por jogador (indexadas por ID).
+
+    'Jogos': jornadas no histórico; 'Forma': média das últimas `janela`;
+    'EWMA': média exponencial com fator `alfa` (a jornada mais recente pesa
+    mais); 'Média Casa' / 'Média Fora': médias por local do jogo (NaN sem
+    jogos ou com o local desconhecido).
+    """
+    if len(historico) == 0:
+        return pd.DataFrame(columns=COLUNAS_FORMA, index=pd.Index([], name='ID'), dtype=float)
+
+    ordem, grupo, inicios = _ordenar(historico)
+    pontos = historico['Pontos'].to_numpy(dtype=float)[ordem]
+    k = len(inicios)
+    jogos = np.diff(np.append(inicios, len(ordem)))
+    # Idade 0 é a jornada mais recente de cada jogador
+    idade = (inicios + jogos)[grupo] - 1 - np.arange(len(ordem))
+
+    def media(pesos):
+        total = np.bincount(grupo, weights=pesos, minlength=k)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.bincount(grupo, weights=pesos * pontos, minlength=k) / total
+
+    colunas = {
+        'Jogos': jogos.astype(float),
+        'Forma': media((idade < janela).astype(float)),
+        'EWMA': media((1 - alfa) ** idade),
+    }
+    casa = historico['Casa'].to_numpy()[ordem] if 'Casa' in historico.columns else np.full(len(ordem), -1)
+    colunas['Média Casa'] = media((casa == 1).astype(float))
+    colunas['Média Fora'] = media((casa == 0).astype(float))
+    ids = historico['ID'].to_numpy()[ordem[inicios]]
+    return pd.DataFrame(colunas, index=pd.Index(ids, name='ID'))
+
+
+def escrever_forma(df, historico, janela=JANELA_FORMA, alfa=ALFA_EWMA):
+    """Junta ao DataFrame de jogadores as colunas de `caracteristicas_forma`.
+
+    Jogadores sem histórico ficam com 'Forma' e 'EWMA' iguais aos 'Pontos
+    Última Jornada' e 0 jogos.
+    """
+    forma = caracteristicas_forma(historico, janela, alfa).reindex(df['ID'].to_numpy())
+    ultima = df['Pontos Última Jornada'].to_numpy(dtype=float)
+    for coluna in COLUNAS_FORMA:
+        valores = forma[coluna].to_numpy(dtype=float)
+        if coluna in ('Forma', 'EWMA'):
+            valores = np.where(np.isnan(valores), ultima, valores)
+        elif coluna == 'Jogos':
+            valores = np.nan_to_num(valores)
+        df[coluna] = valores
+    return df
@@ -0,0 +1,410 @@
+"""Ingestão de dados de jornada (CSV ou JSON) com atualização por ID.
+
+As fontes são ficheiros, pastas ou URLs http(s). Tudo é processado em
+fluxo, por geradores: as linhas são lidas aos bocados, validadas e agrupadas
+em lotes de `LOTE` linhas, e cada lote é aplicado ao DataFrame de jogadores
+antes de ler o seguinte, pelo que a memória depende do tamanho do lote e não
+do tamanho do ficheiro.
+
+Cada linha tem um 'ID' e qualquer subconjunto das colunas de `CAMPOS`;
+campos vazios ficam como estavam. Um ID desconhecido é inserido como
+jogador novo se a linha trouxer todas as colunas de `CAMPOS_NOVO_JOGADOR`.
+Só os scores dos jogadores cujas estatísticas mudaram são recalculados.
+
+Com um `HistoricoJornadas` os pontos da jornada ('Pontos Última Jornada')
+são também acrescentados ao histórico, com a jornada ('Jornada' na linha ou
+a dada a `ingerir`), a dificuldade do jogo que foi disputado (a que o
+jogador tinha antes da atualização) e, se vier, 'Casa'.
+
+JSON: um array de objetos ou um objeto por linha (JSON Lines).
+"""
+import codecs
+import csv
+import io
+import json
+import os
+import re
+import time
+import urllib.request
+
+import numpy as np
+import pandas as pd
+
+from .armazenamento import COLUNAS_BOOL, COLUNAS_NECESSARIAS
+from .taticas import POSICOES
+
+LOTE = 10_000
+BLOCO_LEITURA = 1 << 16
+MAX_ERROS = 20
+EXTENSOES = ('.csv', '.json', '.jsonl', '.ndjson')
+
+_BOOLEANOS = {
+    **dict.fromkeys(['1', '1.0', 'true', 'sim', 's', 'yes', 'y'], True),
+    **dict.fromkeys(['0', '0.0', 'false', 'não', 'nao', 'n', 'no'], False),
+}
+_SEPARADORES = re.compile(r'[\s\[\],]*')
+
+# Coluna -> tipo de validação
+CAMPOS = {
+    'Nome': 'texto',
+    'Equipa': 'texto',
+    'Posição': 'posicao',
+    'Preço': 'preco',
+    'Pontos Totais': 'numero',
+    'Pontos Última Jornada': 'numero',
+    'Próximo Adversário': 'texto',
+    'Dificuldade do Jogo': 'dificuldade',
+    'Lesionado': 'booleano',
+    'Expulso': 'booleano',
+}
+# Campos que só vão para o histórico: a jornada disputada e se foi em casa
+CAMPOS_HISTORICO = {
+    'Jornada': 'jornada',
+    'Casa': 'booleano',
+}
+CAMPOS_NOVO_JOGADOR = ['Nome', 'Equipa', 'Posição', 'Preço']
+# Colunas de que dependem os scores (ver pontuacao._estatisticas)
+CAMPOS_SCORE = {'Pontos Totais', 'Pontos Última Jornada', 'Dificuldade do Jogo'}
+DIFICULDADE_NEUTRA = 3
+
+
+def _valor_padrao(coluna):
+    if coluna in COLUNAS_BOOL:
+        return False
+    if CAMPOS.get(coluna) in ('texto', 'posicao'):
+        return ''
+    # Sem jogo conhecido a dificuldade é neutra, não 0 (fora da escala 1-5)
+    return DIFICULDADE_NEUTRA if CAMPOS.get(coluna) == 'dificuldade' else 0
+
+
+# ---------- Leitura em fluxo ----------
+def _objetos_json(fluxo, bloco=BLOCO_LEITURA):
+    """Objetos de um array JSON ou de JSON Lines, lidos de `fluxo` (binário) aos bocados"""
+    descodificador = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8-sig')()
+    texto = ''
+    fim = False
+    while True:
+        i = 0
+        while True:
+            i = _SEPARADORES.match(texto, i).end()
+            if i == len(texto):
+                break
+            try:
+                objeto, i = descodificador.raw_decode(texto, i)
+            except ValueError:
+                # Objeto incompleto: falta ler o resto
+                break
+            yield objeto
+        texto = texto[i:]
+        if fim:
+            break
+        dados = fluxo.read(bloco)
+        fim = not dados
+        texto += utf8.decode(dados, final=fim)
+    if texto:
+        raise ValueError(f"JSON inválido ou incompleto perto de: {texto[:40]!r}")
+
+
+def _linhas_csv(fluxo):
+    """Dicionários de um CSV lido de `fluxo` (binário)"""
+    yield from csv.DictReader(io.TextIOWrapper(fluxo, encoding='utf-8-sig', newline=''))
+
+
+def _formato(nome, tipo_conteudo=''):
+    if nome.lower().endswith('.csv') or 'csv' in tipo_conteudo:
+        return 'csv'
+    return 'json'
+
+
+def ler_fonte(fonte):
+    """Gera (origem, número, linha) de um ficheiro, pasta ou URL http(s)"""
+    if fonte.startswith(('http://', 'https://')):
+        with urllib.request.urlopen(fonte) as resposta:
+            formato = _formato(urllib.request.urlparse(fonte).path, resposta.headers.get('Content-Type', ''))
+            linhas = _linhas_csv(resposta) if formato == 'csv' else _objetos_json(resposta)
+            for numero, linha in enumerate(linhas, 1):
+                yield fonte, numero, linha
+    elif os.path.isdir(fonte):
+        for nome in sorted(os.listdir(fonte)):
+            if nome.lower().endswith(EXTENSOES):
+                yield from ler_fonte(os.path.join(fonte, nome))
+    else:
+        with open(fonte, 'rb') as f:
+            linhas = _linhas_csv(f) if _formato(fonte) == 'csv' else _objetos_json(f)
+            for numero, linha in enumerate(linhas, 1):
+                yield fonte, numero, linha
+
+
+# ---------- Validação ----------
+def _converter(serie, tipo):
+    """Valores convertidos (NaN onde vazios ou inválidos) e máscara dos inválidos"""
+    # Colunas já numéricas (JSON) dispensam as operações sobre texto
+    numerica = serie.dtype.kind in 'biuf'
+    texto = serie.astype(str) if numerica else serie.astype(str).str.strip()
+    vazio = serie.isna().to_numpy() if numerica else (serie.isna() | (texto == '')).to_numpy()
+    if tipo in ('texto', 'posicao'):
+        valores = texto
+        invalido = ~valores.isin(POSICOES).to_numpy() if tipo == 'posicao' else np.zeros(len(serie), dtype=bool)
+    elif tipo == 'booleano':
+        valores = serie if serie.dtype.kind == 'b' else texto.str.lower().map(_BOOLEANOS)
+        invalido = valores.isna().to_numpy()
+    else:
+        valores = pd.to_numeric(serie, errors='coerce')
+        numeros = valores.to_numpy(dtype=float)
+        invalido = np.isnan(numeros)
+        if tipo == 'preco':
+            invalido |= numeros < 0
+        elif tipo == 'dificuldade':
+            invalido |= (numeros % 1 != 0) | (numeros < 1) | (numeros > 5)
+        elif tipo == 'jornada':
+            invalido |= (numeros % 1 != 0) | (numeros < 1) | (numeros > np.iinfo(np.int16).max)
+    invalido = invalido & ~vazio
+    return valores.where(~(vazio | invalido)), invalido
+
+
+def _erro(relatorio, mensagem):
+    relatorio['invalidas'] += 1
+    if len(relatorio['erros']) < MAX_ERROS:
+        relatorio['erros'].append(mensagem)
+
+
+def validar_lote(bruto, origens, relatorio):
+    """Valida um lote de linhas de uma vez, coluna a coluna.
+
+    `origens` tem o (ficheiro, número) de cada linha, para as mensagens de
+    erro. Devolve as linhas válidas com 'ID' inteiro e os campos conhecidos
+    convertidos (NaN onde vazios); as inválidas são contadas e as primeiras
+    `MAX_ERROS` descritas no relatório.
+    """
+    motivos = np.full(len(bruto), None, dtype=object)
+    if 'ID' in bruto.columns:
+        ids = pd.to_numeric(bruto['ID'], errors='coerce').to_numpy(dtype=float)
+        errado = np.isnan(ids) | (ids % 1 != 0)
+        motivos[errado] = ["falta o ID" if pd.isna(v) else f"ID inválido: {v!r}"
+                           for v in bruto['ID'].to_numpy()[errado]]
+    else:
+        ids = np.zeros(len(bruto))
+        motivos[:] = "falta o ID"
+
+    validos = {}
+    for campo, tipo in {**CAMPOS, **CAMPOS_HISTORICO}.items():
+        if campo not in bruto.columns:
+            continue
+        validos[campo], invalido = _converter(bruto[campo], tipo)
+        novo = invalido & pd.isna(motivos)
+        motivos[novo] = [f"{campo}: valor inválido {v!r}" for v in bruto[campo].to_numpy()[novo]]
+
+    ok = pd.isna(motivos)
+    for i in np.flatnonzero(~ok):
+        origem, numero = origens[i]
+        _erro(relatorio, f"{origem}:{numero}: {motivos[i]}")
+    valida = pd.DataFrame({'ID': ids[ok].astype(np.int64)})
+    for campo, valores in validos.items():
+        valida[campo] = valores.to_numpy()[ok]
+    return valida
+
+
+def validar(linhas, relatorio, tamanho=LOTE):
+    """Agrupa as linhas em lotes de até `tamanho` e devolve cada lote validado"""
+    lote, origens = [], []
+    for origem, numero, linha in linhas:
+        relatorio['linhas'] += 1
+        if not isinstance(linha, dict):
+            _erro(relatorio, f"{origem}:{numero}: a linha não é um objeto")
+            continue
+        lote.append(linha)
+        origens.append((origem, numero))
+        if len(lote) == tamanho:
+            yield validar_lote(pd.DataFrame(lote), origens, relatorio)
+            lote, origens = [], []
+    if lote:
+        yield validar_lote(pd.DataFrame(lote), origens, relatorio)
+
+
+# ---------- Atualização ----------
+def _atribuir(df, coluna, posicoes, valores):
+    """Escreve `valores` nas `posicoes` da coluna; devolve onde o valor mudou"""
+    atual = df[coluna]
+    if atual.dtype.kind in 'biuf':
+        valores = np.asarray(valores, dtype=bool if atual.dtype.kind == 'b' else float)
+        if atual.dtype.kind in 'iu' and not np.array_equal(valores, np.round(valores)):
+            df[coluna] = atual = atual.astype(float)
+        valores = valores.astype(atual.dtype)
+        antigos = atual.to_numpy()[posicoes]
+    else:
+        valores = np.asarray(valores, dtype=object)
+        antigos = atual.to_numpy(dtype=object)[posicoes]
+    mudou = antigos != valores
+    if mudou.any():
+        df.iloc[posicoes[mudou], df.columns.get_loc(coluna)] = valores[mudou]
+    return mudou
+
+
+def aplicar_lote(df, lote, posicoes_id):
+    """Atualiza as linhas do lote que já existem em `df`.
+
+    `posicoes_id` é um pd.Index dos IDs de `df`. Devolve (posições cujas
+    estatísticas dos scores mudaram, número de linhas atualizadas, linhas
+    com ID desconhecido).
+    """
+    # Dentro do lote, a última linha de cada ID prevalece campo a campo
+    if lote['ID'].duplicated().any():
+        lote = lote.groupby('ID', sort=False).last().reset_index()
+    posicoes = posicoes_id.get_indexer(lote['ID'])
+    conhecidas = posicoes >= 0
+    existentes, posicoes = lote[conhecidas], posicoes[conhecidas]
+
+    mudaram = []
+    for coluna in CAMPOS:
+        if coluna not in existentes.columns:
+            continue
+        presente = existentes[coluna].notna().to_numpy()
+        if not presente.any():
+            continue
+        valores = existentes[coluna].to_numpy()[presente]
+        if coluna not in df.columns:
+            df[coluna] = _valor_padrao(coluna)
+        mudou = _atribuir(df, coluna, posicoes[presente], valores)
+        if coluna in CAMPOS_SCORE:
+            mudaram.append(posicoes[presente][mudou])
+
+    mudaram = np.unique(np.concatenate(mudaram)) if mudaram else np.empty(0, dtype=np.intp)
+    return mudaram, len(existentes), lote[~conhecidas]
+
+
+def registos_historico(df, lote, posicoes_id, jornada=None):
+    """Linhas do histórico (ver `HistoricoJornadas.acrescentar`) para um lote.
+
+    Chamada antes de `aplicar_lote`: a 'Dificuldade do Jogo' em `df` é ainda
+    a do jogo disputado (a do lote é a do próximo). Só entram as linhas com
+    'Pontos Última Jornada' e uma jornada, a da linha ou `jornada`, de
+    jogadores conhecidos ou que o lote insere; um jogador novo fica com a
+    dificuldade neutra.
+    """
+    vazia = pd.Series(np.nan, index=lote.index)
+    pontos = lote['Pontos Última Jornada'] if 'Pontos Última Jornada' in lote.columns else vazia
+    jornadas = lote['Jornada'] if 'Jornada' in lote.columns else vazia
+    if jornada is not None:
+        jornadas = jornadas.fillna(jornada)
+    com_pontos = (pontos.notna() & jornadas.notna()).to_numpy()
+    # Um ID desconhecido só conta se a linha chegar para inserir o jogador
+    posicoes = posicoes_id.get_indexer(lote['ID'])
+    inseridas = (lote[CAMPOS_NOVO_JOGADOR].notna().all(axis=1).to_numpy()
+                 if set(CAMPOS_NOVO_JOGADOR) <= set(lote.columns) else False)
+    com_pontos = com_pontos & ((posicoes >= 0) | inseridas)
+    lote, posicoes = lote[com_pontos], posicoes[com_pontos]
+
+    dificuldade = np.full(len(lote), DIFICULDADE_NEUTRA, dtype=float)
+    if 'Dificuldade do Jogo' in df.columns:
+        conhecidas = posicoes >= 0
+        dificuldade[conhecidas] = pd.to_numeric(df['Dificuldade do Jogo'], errors='coerce').to_numpy(
+            dtype=float)[posicoes[conhecidas]]
+        # Sem dificuldade válida (vazia ou 0) conta como neutra
+        dificuldade[~np.isin(dificuldade, [1, 2, 3, 4, 5])] = DIFICULDADE_NEUTRA
+    registos = pd.DataFrame({
+        'ID': lote['ID'].to_numpy(),
+        'Jornada': jornadas.to_numpy()[com_pontos].astype(np.int64),
+        'Pontos': pontos.to_numpy(dtype=float)[com_pontos],
+        'Dificuldade do Jogo': dificuldade.astype(np.int64),
+    })
+    if 'Casa' in lote.columns:
+        registos['Casa'] = lote['Casa'].to_numpy()
+    return registos
+
+
+def _novos_jogadores(df, desconhecidas, relatorio):
+    """Linhas de jogadores novos no formato de `df` (as incompletas são rejeitadas)"""
+    if set(CAMPOS_NOVO_JOGADOR) <= set(desconhecidas.columns):
+        completas = desconhecidas[CAMPOS_NOVO_JOGADOR].notna().all(axis=1).to_numpy()
+    else:
+        completas = np.zeros(len(desconhecidas), dtype=bool)
+    rejeitadas = len(desconhecidas) - int(completas.sum())
+    relatorio['desconhecidas'] += rejeitadas
+    if rejeitadas and len(relatorio['erros']) < MAX_ERROS:
+        relatorio['erros'].append(
+            f"{rejeitadas} linha(s) com ID desconhecido sem {', '.join(CAMPOS_NOVO_JOGADOR)}")
+    novos = desconhecidas[completas]
+    if novos.empty:
+        return novos
+    novos = novos.copy()
+    for coluna in COLUNAS_NECESSARIAS:
+        padrao = _valor_padrao(coluna)
+        if coluna not in novos.columns:
+            novos[coluna] = padrao
+        else:
+            novos[coluna] = novos[coluna].fillna(padrao)
+    novos = novos.reindex(columns=df.columns)
+    # Mantém os tipos de `df` quando a conversão não perde nada
+    for coluna in novos.columns:
+        tipo = df[coluna].dtype
+        if tipo.kind == 'f' or not novos[coluna].notna().all():
+            continue
+        valores = novos[coluna].to_numpy()
+        if tipo.kind in 'iu' and not np.array_equal(valores, np.round(valores.astype(float))):
+            continue
+        novos[coluna] = novos[coluna].astype(tipo)
+    return novos
+
+
+def ingerir(df, fontes, pontuacao=None, perfil='padrao', tamanho_lote=LOTE, historico=None, epoca=None,
+            jornada=None):
+    """Lê as fontes em fluxo e atualiza `df` por ID, lote a lote.
+
+    Com `pontuacao` (um MotorPontuacao de `df`) só os scores dos jogadores
+    com estatísticas alteradas são recalculados e reescritos ('Score
+    Ajustado' e 'Score Capitão' do `perfil`); se entrarem jogadores novos o
+    motor é recalculado por inteiro.
+
+    Com `historico` (um `HistoricoJornadas`) os pontos de cada linha são
+    acrescentados à `epoca` (ver `registos_historico`); `jornada` é a
+    jornada das linhas que não trazem 'Jornada'.
+
+    Devolve (df, relatório). `df` é alterado no lugar, exceto quando há
+    jogadores novos, caso em que é devolvido um DataFrame novo.
+    """
+    if historico is not None and epoca is None:
+        raise ValueError("Para gravar o histórico é preciso indicar a época")
+    relatorio = {'linhas': 0, 'invalidas': 0, 'atualizadas': 0, 'inseridas': 0,
+                 'desconhecidas': 0, 'scores_recalculados': 0, 'historico': 0, 'erros': []}
+    inicio = time.perf_counter()
+    posicoes_id = pd.Index(df['ID'])
+    mudaram = []
+    novos = []
+
+    for fonte in fontes:
+        for lote in validar(ler_fonte(fonte), relatorio, tamanho_lote):
+            if historico is not None:
+                relatorio['historico'] += historico.acrescentar(
+                    epoca, registos_historico(df, lote, posicoes_id, jornada))
+            alteradas, atualizadas, desconhecidas = aplicar_lote(df, lote, posicoes_id)
+            mudaram.append(alteradas)
+            relatorio['atualizadas'] += atualizadas
+            if not desconhecidas.empty:
+                novos.append(_novos_jogadores(df, desconhecidas, relatorio))
+
+    novos = [n for n in novos if not n.empty]
+    if novos:
+        inseridos = pd.concat(novos, ignore_index=True).groupby('ID', sort=False).last().reset_index()
+        relatorio['inseridas'] = len(inseridos)
+        df = pd.concat([df, inseridos.reindex(columns=df.columns)], ignore_index=True)
+
+    if pontuacao is not None:
+        if novos:
+            pontuacao.recalcular(df)
+            pontuacao.escrever(df, perfil)
+            relatorio['scores_recalculados'] = len(df)
+        else:
+            alteradas = np.unique(np.concatenate(mudaram)) if mudaram else np.empty(0, dtype=np.intp)
+            recalculadas = pontuacao.atualizar(df, alteradas)
+            if len(recalculadas) == len(df):
+                pontuacao.escrever(df, perfil)
+            elif len(recalculadas):
+                j = pontuacao.coluna(perfil)
+                for coluna, scores in (('Score Ajustado', pontuacao.ajustado), ('Score Capitão', pontuacao.capitao)):
+                    df.iloc[recalculadas, df.columns.get_loc(coluna)] = scores[recalculadas, j]
+            relatorio['scores_recalculados'] = len(recalculadas)
+
+    relatorio['segundos'] = time.perf_counter() - inicio
+    relatorio['linhas_por_segundo'] = relatorio['linhas'] / relatorio['segundos'] if relatorio['segundos'] else 0.0
+    return df, relatorio
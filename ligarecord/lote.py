@@ -0,0 +1,217 @@
+"""Consultas em lote sobre ficheiros de jogadores (ligas ou jornadas).
+
+Cada ficheiro é processado de forma independente por `processar_ficheiro`,
+que devolve apenas tipos JSON, para poder correr num processo à parte.
+"""
+import numpy as np
+
+from .armazenamento import carregar_jogadores, guardar_cache
+from . import motor
+from .equipas import (PoolJogadores, carregar_equipas, comparar_taticas_equipas, melhores_onzes,
+                      sugerir_capitaes, sugerir_transferencias_equipas)
+from .historico import HistoricoJornadas
+from .ingestao import ingerir
+from .mercado import melhores_trocas, melhorias_por_euro
+from .planeamento import carregar_calendario, planear_transferencias
+from .pontuacao import PERFIL_PADRAO
+from .simulacao import AMOSTRAS
+
+CONSULTAS = ('onze', 'taticas', 'capitao', 'simulacao', 'transferencias', 'plano', 'mercado')
+# Consultas avaliadas em lote para todas as equipas (ver `equipas`)
+CONSULTAS_EQUIPAS = ('onze', 'taticas', 'capitao', 'transferencias')
+POSICOES = ('Goleiro', 'Defesa', 'Médio', 'Avançado')
+COLUNAS_JOGADOR = ['ID', 'Nome', 'Equipa', 'Posição', 'Preço']
+
+
+def _registos(df, colunas_extra=()):
+    colunas = COLUNAS_JOGADOR + [c for c in colunas_extra if c in df.columns]
+    return df[colunas].to_dict('records')
+
+
+def processar_ficheiro(caminho, consultas=CONSULTAS, formacao='4-4-2', orcamento=None,
+                       posicoes=POSICOES, orcamento_transferencias=None, perfil=PERFIL_PADRAO,
+                       amostras=AMOSTRAS, jornadas=5, tempo_limite=1.0, pasta_historico=None, fontes=(),
+                       caminho_equipas=None, epoca=None, jornada=None, calendario=None):
+    """Corre as consultas pedidas sobre um ficheiro e devolve um dict serializável.
+
+    Com `pasta_historico` (um `HistoricoJornadas`) os scores usam a forma
+    recente e a simulação e o plano estimam o modelo a partir do histórico.
+    Com `fontes` (ver `ingestao.ler_fonte`) os dados de jornada são primeiro
+    ingeridos e gravados na cache do ficheiro; com `pasta_historico` e
+    `epoca` os pontos ingeridos entram também no histórico (ver
+    `ingestao.ingerir`) e a forma é recalculada. `calendario` é a fonte do
+    calendário do plano (ver `planeamento.carregar_calendario`); sem ela só
+    a próxima jornada tem dificuldade conhecida. Com `caminho_equipas` (ver
+    `equipas.carregar_equipas`) as consultas de `CONSULTAS_EQUIPAS` são
+    também corridas para cada equipa, todas de uma vez, em 'equipas'.
+    """
+    arquivo = HistoricoJornadas(pasta_historico) if pasta_historico else None
+    historico = arquivo.ler() if arquivo is not None else None
+    df = carregar_jogadores(caminho)
+    pontuacao = motor.criar_pontuacao(df, perfil, historico)
+    resultado = {'ficheiro': caminho}
+
+    if fontes:
+        df, relatorio = ingerir(df, fontes, pontuacao, 'perfil', historico=arquivo if epoca else None,
+                                epoca=epoca, jornada=jornada)
+        if relatorio['historico']:
+            # A jornada nova muda a forma de quem jogou: scores de novo
+            historico = arquivo.ler()
+            pontuacao = motor.criar_pontuacao(df, perfil, historico)
+            relatorio['scores_recalculados'] = len(df)
+        if not guardar_cache(df, caminho):
+            relatorio['erros'].append(f"{caminho} foi alterado durante a ingestão: a cache foi invalidada "
+                                      "e a próxima leitura importa o Excel sem estes dados")
+        resultado['ingestao'] = relatorio
+
+    if 'onze' in consultas:
+        try:
+            onze = motor.selecionar_melhor_onze(df, formacao, orcamento)
+            resultado['onze'] = _registos(onze, ['Score Ajustado'])
+        except ValueError as e:
+            resultado['onze'] = {'erro': str(e)}
+
+    if 'taticas' in consultas:
+        resultado['taticas'] = [
+            {'Formação': f, 'Pontuação Total': float(total)}
+            for f, total in motor.comparar_taticas(df)
+        ]
+
+    if 'capitao' in consultas:
+        resultado['capitao'] = _registos(
+            motor.sugerir_capitao(df), ['Score Capitão', 'Próximo Adversário', 'Dificuldade do Jogo']
+        )
+
+    if 'simulacao' in consultas:
+        resultado['simulacao'] = _registos(
+            motor.simular_capitaes(df, amostras, historico),
+            ['Pontos Esperados', 'Variância', 'P(Ótimo)', 'Equipa Esperada'],
+        )
+
+    if 'transferencias' in consultas:
+        resultado['transferencias'] = {}
+        for posicao in posicoes:
+            t = motor.sugerir_transferencias(df, posicao, orcamento_transferencias, perfil)
+            resultado['transferencias'][posicao] = {
+                'jogador_venda': _registos(t['jogador_venda'], ['Score Ajustado']),
+                'orcamento_ajustado': float(t['orcamento_ajustado']),
+                'top_performers': _registos(t['sugestoes']['top_performers'], ['Score Avançado']),
+                'custo_beneficio': _registos(t['sugestoes']['custo_beneficio'], ['Score Avançado']),
+            }
+
+    if 'plano' in consultas:
+        try:
+            calendario_plano = carregar_calendario(calendario) if calendario else None
+            plano = planear_transferencias(df, orcamento_transferencias, jornadas, calendario_plano,
+                                           historico=historico, tempo_limite=tempo_limite)
+        except (OSError, ValueError) as e:
+            resultado['plano'] = {'erro': str(e)}
+        else:
+            ids = df['ID']
+            resultado['plano'] = [
+                {'Jornada': jornada, 'Vendas': [int(ids[v]) for v in passo['vendas']],
+                 'Compras': [int(ids[c]) for c in passo['compras']], 'Penalização': passo['penalizacao'],
+                 'Pontos': passo['pontos'], 'Banco': passo['banco']}
+                for jornada, passo in enumerate(plano['jornadas'], 1)
+            ]
+
+    if 'mercado' in consultas:
+        indice = motor.indice_mercado(df, perfil)
+        plantel = motor.plantel_atual(df)
+        ids = df['ID'].to_numpy()
+        trocas = melhores_trocas(indice, plantel, [0.0, orcamento_transferencias])
+        melhorias = melhorias_por_euro(indice, plantel, orcamento_transferencias)
+        resultado['mercado'] = [
+            {'Tabela': 'troca', 'Venda': int(ids[t.venda]), 'Compra': int(ids[t.compra]),
+             'Banco': t.orcamento, 'Ganho': t.ganho}
+            for t in trocas.itertuples()
+        ] + [
+            {'Tabela': 'por_euro', 'Venda': int(ids[m.venda]), 'Compra': int(ids[m.compra]),
+             'Ganho': m.ganho, 'Custo': m.custo, 'Ganho por Euro': m.ganho_por_euro}
+            for m in melhorias.itertuples()
+        ]
+
+    if caminho_equipas:
+        resultado['equipas'] = _consultas_equipas(df, caminho_equipas, consultas, formacao, orcamento,
+                                                  posicoes, orcamento_transferencias, perfil)
+
+    return resultado
+
+
+def _consultas_equipas(df, caminho_equipas, consultas, formacao, orcamento, posicoes,
+                       orcamento_transferencias, perfil):
+    """Resultados por equipa, no formato das consultas de um só plantel"""
+    equipas = carregar_equipas(caminho_equipas, PoolJogadores(df, perfil))
+    resultado = {nome: {} for nome in equipas.nomes}
+
+    def registos(linhas, colunas_extra=(), origem=df):
+        return _registos(origem.iloc[linhas[linhas >= 0]], colunas_extra)
+
+    # Com orçamento o onze sai de todo o mercado e não depende da equipa
+    if 'onze' in consultas and orcamento is None:
+        try:
+            onzes, _ = melhores_onzes(equipas, formacao)
+        except ValueError as e:
+            onzes, erro = None, {'erro': str(e)}
+        for i, nome in enumerate(equipas.nomes):
+            resultado[nome]['onze'] = erro if onzes is None else registos(onzes[i], ['Score Ajustado'])
+
+    if 'taticas' in consultas:
+        formacoes, totais = comparar_taticas_equipas(equipas)
+        for i, nome in enumerate(equipas.nomes):
+            ordem = np.argsort(-np.nan_to_num(totais[i], nan=-np.inf), kind='stable')
+            resultado[nome]['taticas'] = [
+                {'Formação': formacoes[j], 'Pontuação Total': float(totais[i, j])}
+                for j in ordem if not np.isnan(totais[i, j])
+            ]
+
+    if 'capitao' in consultas:
+        capitaes = sugerir_capitaes(equipas)
+        for i, nome in enumerate(equipas.nomes):
+            resultado[nome]['capitao'] = registos(
+                capitaes[i], ['Score Capitão', 'Próximo Adversário', 'Dificuldade do Jogo'])
+
+    if 'transferencias' in consultas:
+        com_avancado = df.assign(**{'Score Avançado': equipas.pool.avancado})
+        for nome in equipas.nomes:
+            resultado[nome]['transferencias'] = {}
+        for posicao in posicoes:
+            t = sugerir_transferencias_equipas(equipas, posicao, orcamento_transferencias)
+            for i, nome in enumerate(equipas.nomes):
+                resultado[nome]['transferencias'][posicao] = {
+                    'jogador_venda': registos(t['venda'][i:i + 1], ['Score Ajustado']),
+                    'orcamento_ajustado': float(t['orcamento_ajustado'][i]),
+                    'top_performers': registos(t['top_performers'][i], ['Score Avançado'], com_avancado),
+                    'custo_beneficio': registos(t['custo_beneficio'][i], ['Score Avançado'], com_avancado),
+                }
+    return resultado
+
+
+def _linhas_consultas(base, resultado):
+    for consulta in CONSULTAS:
+        if consulta not in resultado:
+            continue
+        valor = resultado[consulta]
+        if consulta == 'transferencias':
+            for posicao, t in valor.items():
+                for lista in ('jogador_venda', 'top_performers', 'custo_beneficio'):
+                    for ordem, registo in enumerate(t[lista], 1):
+                        yield {**base, 'consulta': f"{consulta}/{posicao}/{lista}", 'ordem': ordem,
+                               'orcamento_ajustado': t['orcamento_ajustado'], **registo}
+        elif isinstance(valor, dict):
+            yield {**base, 'consulta': consulta, 'ordem': 0, **valor}
+        else:
+            for ordem, registo in enumerate(valor, 1):
+                yield {**base, 'consulta': consulta, 'ordem': ordem, **registo}
+
+
+def linhas_planas(resultados):
+    """Achata os resultados numa linha por jogador (formato longo, para CSV)"""
+    for resultado in resultados:
+        base = {'ficheiro': resultado['ficheiro']}
+        if 'ingestao' in resultado:
+            relatorio = {k: v for k, v in resultado['ingestao'].items() if k != 'erros'}
+            yield {**base, 'consulta': 'ingestao', 'ordem': 0, **relatorio}
+        yield from _linhas_consultas(base, resultado)
+        for nome, consultas in resultado.get('equipas', {}).items():
+            yield from _linhas_consultas({**base, 'equipa': nome}, consultas)
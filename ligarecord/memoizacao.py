@@ -0,0 +1,242 @@
+"""Memorização dos resultados das consultas do motor.
+
+A chave de cada resultado é uma impressão digital do que a consulta lê: as
+colunas de `COLUNAS_CONSULTA` (scores, estado do plantel, preços...) e os
+restantes argumentos, incluindo os valores por omissão (o perfil de pesos,
+por exemplo). Alterar uma coluna que a consulta não lê, como o estado de um
+suplente para o ranking de capitães, não a invalida.
+
+Os resultados ficam numa LRU limitada em bytes e, com `pasta`, também em
+disco, para que uma nova sessão sobre os mesmos dados não repita o cálculo.
+Um DataFrame que seja um subconjunto das linhas de `df` é guardado como os
+rótulos dessas linhas mais as colunas novas, e reconstruído a partir do
+`df` atual: colunas fora da impressão digital (o nome, por exemplo) vêm
+sempre atualizadas.
+"""
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Sobe quando muda o formato guardado ou o significado de uma consulta
+VERSAO = 1
+LIMITE_MEMORIA = 64 * 1024 * 1024
+LIMITE_DISCO = 256 * 1024 * 1024
+
+_ESTADO = ['Titular', 'Suplente', 'Reserva', 'Lesionado']
+COLUNAS_CONSULTA = {
+    'selecionar_melhor_onze': ['Posição', 'Score Ajustado', 'Preço', 'Equipa'] + _ESTADO,
+    'comparar_taticas': ['Posição', 'Score Ajustado'] + _ESTADO,
+    'sugerir_capitao': ['Titular', 'Score Capitão'],
+    'simular_capitaes': ['Posição', 'Titular', 'Pontos Totais', 'Pontos Última Jornada', 'Dificuldade do Jogo'],
+    'sugerir_transferencias': ['Posição', 'Preço', 'Score Ajustado', 'Pontos Última Jornada',
+                               'Dificuldade do Jogo', 'Titular', 'Suplente', 'Reserva'],
+}
+# Argumentos que não mudam o resultado
+FORA_DA_CHAVE = ('progresso',)
+
+_Linhas = namedtuple('_Linhas', 'indice extras colunas')
+
+
+def caminho_resultados(caminho_excel):
+    return f"{caminho_excel}.resultados"
+
+
+def impressao(df, colunas=None):
+    """Impressão digital (hex) do índice e das colunas dadas (todas por omissão)"""
+    h = hashlib.blake2b(digest_size=16)
+    colunas = list(df.columns) if colunas is None else [c for c in colunas if c in df.columns]
+    h.update(json.dumps([str(c) for c in colunas]).encode())
+    for serie in [pd.Series(df.index.to_numpy())] + [df[c] for c in colunas]:
+        h.update(str(serie.dtype).encode())
+        valores = serie.to_numpy()
+        if valores.dtype.kind in 'biufM':
+            h.update(np.ascontiguousarray(valores).tobytes())
+        else:
+            h.update(pd.util.hash_pandas_object(serie, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _impressao_valor(valor):
+    if isinstance(valor, pd.DataFrame):
+        return 'df:' + impressao(valor)
+    if isinstance(valor, np.ndarray):
+        return 'np:' + hashlib.blake2b(np.ascontiguousarray(valor).tobytes(), digest_size=16).hexdigest()
+    if isinstance(valor, dict):
+        return {str(k): _impressao_valor(v) for k, v in sorted(valor.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(valor, (list, tuple)):
+        return [_impressao_valor(v) for v in valor]
+    return repr(valor)
+
+
+def _compactar(valor, df):
+    if isinstance(valor, pd.DataFrame) and valor.index.isin(df.index).all():
+        novas = [c for c in valor.columns if c not in df.columns]
+        return _Linhas(valor.index.to_numpy(), valor[novas].copy(), list(valor.columns))
+    if isinstance(valor, dict):
+        return {k: _compactar(v, df) for k, v in valor.items()}
+    return valor
+
+
+def _expandir(valor, df):
+    if isinstance(valor, _Linhas):
+        linhas = df.loc[valor.indice]
+        for coluna in valor.extras.columns:
+            linhas[coluna] = valor.extras[coluna].to_numpy()
+        return linhas[valor.colunas]
+    if isinstance(valor, dict):
+        return {k: _expandir(v, df) for k, v in valor.items()}
+    return valor
+
+
+class CacheResultados:
+    """LRU de resultados por impressão digital, com limite de memória e cópia opcional em disco.
+
+    Pode ser usada a partir de várias threads (as tarefas da GUI correm num
+    conjunto de trabalhadores); duas chamadas iguais em simultâneo calculam
+    ambas o resultado.
+    """
+
+    def __init__(self, limite_bytes=LIMITE_MEMORIA, pasta=None, limite_disco=LIMITE_DISCO):
+        self.limite_bytes = limite_bytes
+        self.pasta = pasta
+        self.limite_disco = limite_disco
+        self._entradas = OrderedDict()
+        self._bloqueio = threading.Lock()
+        self.bytes = 0
+        self.acertos = 0
+        self.acertos_disco = 0
+        self.falhas = 0
+        self.despejos = 0
+
+    def chave(self, funcao, df, *args, colunas=None, **kwargs):
+        """Chave da chamada `funcao(df, *args, **kwargs)`"""
+        assinatura = inspect.signature(funcao).bind(df, *args, **kwargs)
+        assinatura.apply_defaults()
+        argumentos = list(assinatura.arguments.items())[1:]
+        if colunas is None:
+            colunas = COLUNAS_CONSULTA.get(funcao.__name__)
+        texto = json.dumps([
+            VERSAO,
+            f"{funcao.__module__}.{funcao.__qualname__}",
+            impressao(df, colunas),
+            {nome: _impressao_valor(valor) for nome, valor in argumentos if nome not in FORA_DA_CHAVE},
+        ])
+        return hashlib.blake2b(texto.encode(), digest_size=16).hexdigest()
+
+    def chamar(self, funcao, df, *args, colunas=None, **kwargs):
+        """`funcao(df, *args, **kwargs)`, ou o resultado guardado de uma chamada equivalente.
+
+        `colunas` são as colunas de `df` que a função lê; por omissão as de
+        `COLUNAS_CONSULTA` ou, se a função lá não estiver, todas.
+        """
+        chave = self.chave(funcao, df, *args, colunas=colunas, **kwargs)
+        encontrado, valor = self.obter(chave)
+        if encontrado:
+            return _expandir(valor, df)
+        resultado = funcao(df, *args, **kwargs)
+        self.guardar(chave, _compactar(resultado, df))
+        return resultado
+
+    def obter(self, chave):
+        """(True, valor) se a chave estiver em memória ou em disco, senão (False, None)"""
+        with self._bloqueio:
+            if chave in self._entradas:
+                self._entradas.move_to_end(chave)
+                self.acertos += 1
+                return True, self._entradas[chave][0]
+        valor = self._ler_disco(chave)
+        with self._bloqueio:
+            if valor is None:
+                self.falhas += 1
+                return False, None
+            self.acertos_disco += 1
+        self._guardar_memoria(chave, valor, len(pickle.dumps(valor, pickle.HIGHEST_PROTOCOL)))
+        return True, valor
+
+    def guardar(self, chave, valor):
+        dados = pickle.dumps(valor, pickle.HIGHEST_PROTOCOL)
+        self._guardar_memoria(chave, valor, len(dados))
+        self._escrever_disco(chave, dados)
+
+    def _guardar_memoria(self, chave, valor, tamanho):
+        if tamanho > self.limite_bytes:
+            return
+        with self._bloqueio:
+            if chave in self._entradas:
+                self.bytes -= self._entradas.pop(chave)[1]
+            self._entradas[chave] = (valor, tamanho)
+            self.bytes += tamanho
+            while self.bytes > self.limite_bytes:
+                _, (_, removido) = self._entradas.popitem(last=False)
+                self.bytes -= removido
+                self.despejos += 1
+
+    def _caminho(self, chave):
+        return os.path.join(self.pasta, f"{chave}.pkl")
+
+    def _ler_disco(self, chave):
+        if self.pasta is None:
+            return None
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, 'rb') as f:
+                valor = pickle.load(f)
+            os.utime(caminho)
+            return valor
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+
+    def _escrever_disco(self, chave, dados):
+        if self.pasta is None or len(dados) > self.limite_disco:
+            return
+        os.makedirs(self.pasta, exist_ok=True)
+        temporario = f"{self._caminho(chave)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporario, 'wb') as f:
+            f.write(dados)
+        os.replace(temporario, self._caminho(chave))
+
+        # Acima do limite saem os ficheiros usados há mais tempo
+        ficheiros = []
+        for entrada in os.scandir(self.pasta):
+            if entrada.name.endswith('.pkl'):
+                estado = entrada.stat()
+                ficheiros.append((estado.st_mtime_ns, estado.st_size, entrada.path))
+        total = sum(tamanho for _, tamanho, _ in ficheiros)
+        for _, tamanho, caminho in sorted(ficheiros):
+            if total <= self.limite_disco:
+                break
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
+            total -= tamanho
+
+    def limpar(self):
+        """Esquece os resultados em memória e em disco"""
+        with self._bloqueio:
+            self._entradas.clear()
+            self.bytes = 0
+        if self.pasta is not None and os.path.isdir(self.pasta):
+            for entrada in os.scandir(self.pasta):
+                if entrada.name.endswith('.pkl'):
+                    os.remove(entrada.path)
+
+    def estatisticas(self):
+        with self._bloqueio:
+            consultas = self.acertos + self.acertos_disco + self.falhas
+            return {
+                'acertos': self.acertos,
+                'acertos_disco': self.acertos_disco,
+                'falhas': self.falhas,
+                'taxa_acerto': (self.acertos + self.acertos_disco) / consultas if consultas else 0.0,
+                'entradas': len(self._entradas),
+                'bytes': self.bytes,
+                'despejos': self.despejos,
+            }
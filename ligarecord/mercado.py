@@ -0,0 +1,172 @@
+"""Índices do mercado por posição, ordenados por preço.
+
+Para cada posição os candidatos são ordenados por preço e guarda-se o
+máximo acumulado do score (e onde ocorre), pelo que "melhor jogador com
+preço <= orçamento" é uma pesquisa binária. Os pontos onde o máximo
+acumulado sobe formam a fronteira preço/score: nenhum outro candidato é
+simultaneamente mais barato e melhor, e é só sobre ela que se procuram as
+melhores melhorias por euro.
+"""
+import numpy as np
+import pandas as pd
+
+from .taticas import POSICOES
+
+# Custo mínimo considerado no rácio ganho por euro (granularidade dos preços)
+UNIDADE_PRECO = 50_000
+
+
+def _sobe(score):
+    """Onde o máximo acumulado sobe (só um score estritamente maior o renova)"""
+    maximo = np.maximum.accumulate(score) if len(score) else score
+    anterior = np.concatenate(([-np.inf], maximo[:-1]))
+    return score > anterior
+
+
+class IndiceMercado:
+    """Candidatos de cada posição ordenados por preço, com máximo acumulado.
+
+    `scores` está alinhado com as linhas de `df`; só as linhas com
+    `candidatos` verdadeiro entram no índice.
+    """
+
+    def __init__(self, df, scores, candidatos):
+        self.scores = np.asarray(scores, dtype=float)
+        self.precos = df['Preço'].to_numpy(dtype=float)
+        self.posicoes = df['Posição'].to_numpy(dtype=object)
+        _, self.clubes = np.unique(df['Equipa'].to_numpy(dtype=str), return_inverse=True)
+        self.candidatos = np.asarray(candidatos, dtype=bool)
+        self.por_posicao = {pos: self._construir(pos) for pos in POSICOES}
+
+    def _construir(self, posicao):
+        linhas = np.flatnonzero(self.candidatos & (self.posicoes == posicao))
+        ordem = linhas[np.lexsort((-self.scores[linhas], self.precos[linhas]))]
+        score = self.scores[ordem]
+        maximo = np.maximum.accumulate(score) if len(score) else score
+        # Em empate fica o mais barato
+        sobe = _sobe(score)
+        onde = np.maximum.accumulate(np.where(sobe, np.arange(len(score)), 0))
+        return {
+            'linhas': ordem,
+            'precos': self.precos[ordem],
+            'maximo': maximo,
+            'onde': onde,
+            'fronteira': ordem[sobe],
+        }
+
+    def melhor(self, posicao, orcamentos, clubes_bloqueados=None):
+        """Melhor candidato da posição com preço <= cada orçamento.
+
+        Devolve (linhas, scores); -1 e -inf onde nenhum cabe. Com
+        `clubes_bloqueados` (array booleano por código de clube) os
+        candidatos desses clubes são ignorados; só as consultas cujo melhor
+        está bloqueado recorrem a uma pesquisa direta.
+        """
+        indice = self.por_posicao[posicao]
+        orcamentos = np.asarray(orcamentos, dtype=float)
+        k = np.searchsorted(indice['precos'], orcamentos, side='right') - 1
+        cabe = k >= 0
+        linhas = np.full(orcamentos.shape, -1, dtype=np.intp)
+        scores = np.full(orcamentos.shape, -np.inf)
+        linhas[cabe] = indice['linhas'][indice['onde'][k[cabe]]]
+        scores[cabe] = indice['maximo'][k[cabe]]
+
+        if clubes_bloqueados is not None and clubes_bloqueados.any():
+            bloqueado = cabe.copy()
+            bloqueado[cabe] = clubes_bloqueados[self.clubes[linhas[cabe]]]
+            if bloqueado.any():
+                permitidos = indice['linhas'][~clubes_bloqueados[self.clubes[indice['linhas']]]]
+                for i in zip(*np.nonzero(bloqueado)):
+                    opcoes = permitidos[self.precos[permitidos] <= orcamentos[i]]
+                    if len(opcoes):
+                        escolhido = opcoes[np.argmax(self.scores[opcoes])]
+                        linhas[i], scores[i] = escolhido, self.scores[escolhido]
+                    else:
+                        linhas[i], scores[i] = -1, -np.inf
+        return linhas, scores
+
+    def fronteira(self, posicao, clubes_bloqueados=None):
+        """Fronteira preço/score da posição, sem os candidatos de `clubes_bloqueados`.
+
+        Só se algum ponto da fronteira for de um clube bloqueado é que ela é
+        refeita a partir dos candidatos permitidos (já ordenados por preço).
+        """
+        indice = self.por_posicao[posicao]
+        if clubes_bloqueados is None or not clubes_bloqueados[self.clubes[indice['fronteira']]].any():
+            return indice['fronteira']
+        linhas = indice['linhas'][~clubes_bloqueados[self.clubes[indice['linhas']]]]
+        return linhas[_sobe(self.scores[linhas])]
+
+
+def melhores_trocas(indice, plantel, orcamentos, max_por_clube=3):
+    """Melhor compra para cada jogador do plantel e cada orçamento em banco.
+
+    `plantel` são posições (linhas) de `df`; `orcamentos` uma lista de valores
+    em banco. O dinheiro da venda soma ao banco e o limite por clube é
+    respeitado. Devolve um DataFrame com uma linha por (venda, orçamento).
+    """
+    plantel = np.asarray(plantel, dtype=np.intp)
+    orcamentos = np.asarray(orcamentos, dtype=float)
+    contagem = np.bincount(indice.clubes[plantel], minlength=indice.clubes.max() + 1)
+    partes = []
+
+    for posicao in POSICOES:
+        vendas = plantel[indice.posicoes[plantel] == posicao]
+        for clube in np.unique(indice.clubes[vendas]):
+            grupo = vendas[indice.clubes[vendas] == clube]
+            # Vender um jogador liberta uma vaga no seu próprio clube
+            bloqueados = contagem - np.bincount([clube], minlength=len(contagem)) >= max_por_clube
+            limites = orcamentos[None, :] + indice.precos[grupo][:, None]
+            compras, scores = indice.melhor(posicao, limites, bloqueados)
+            partes.append(pd.DataFrame({
+                'venda': np.repeat(grupo, len(orcamentos)),
+                'orcamento': np.tile(orcamentos, len(grupo)),
+                'compra': compras.ravel(),
+                'ganho': (scores - indice.scores[grupo][:, None]).ravel(),
+            }))
+
+    if not partes:
+        return pd.DataFrame(columns=['venda', 'orcamento', 'compra', 'ganho'])
+    trocas = pd.concat(partes, ignore_index=True)
+    return trocas[trocas['compra'] >= 0].reset_index(drop=True)
+
+
+def melhorias_por_euro(indice, plantel, orcamento, limite=20, max_por_clube=3):
+    """Melhores melhorias da liga por euro gasto.
+
+    Para cada jogador do plantel avalia os candidatos da fronteira
+    preço/score da sua posição que cabem no orçamento e têm score superior;
+    a fronteira é a dos candidatos que não excedem o limite por clube (ver
+    `IndiceMercado.fronteira`). O rácio é ganho / max(custo líquido,
+    `UNIDADE_PRECO`), pelo que trocas que libertam dinheiro ficam à frente.
+    Fica a melhor troca de cada jogador do plantel.
+    """
+    plantel = np.asarray(plantel, dtype=np.intp)
+    contagem = np.bincount(indice.clubes[plantel], minlength=indice.clubes.max() + 1)
+    partes = []
+
+    for posicao in POSICOES:
+        vendas = plantel[indice.posicoes[plantel] == posicao]
+        for clube in np.unique(indice.clubes[vendas]):
+            grupo = vendas[indice.clubes[vendas] == clube]
+            # Vender um jogador liberta uma vaga no seu próprio clube
+            bloqueados = contagem - np.bincount([clube], minlength=len(contagem)) >= max_por_clube
+            fronteira = indice.fronteira(posicao, bloqueados)
+            if len(fronteira) == 0:
+                continue
+            custo = indice.precos[fronteira][None, :] - indice.precos[grupo][:, None]
+            ganho = indice.scores[fronteira][None, :] - indice.scores[grupo][:, None]
+            i, j = np.nonzero((custo <= orcamento) & (ganho > 0))
+            partes.append(pd.DataFrame({
+                'venda': grupo[i],
+                'compra': fronteira[j],
+                'ganho': ganho[i, j],
+                'custo': custo[i, j],
+                'ganho_por_euro': ganho[i, j] / np.maximum(custo[i, j], UNIDADE_PRECO),
+            }))
+
+    if not partes:
+        return pd.DataFrame(columns=['venda', 'compra', 'ganho', 'custo', 'ganho_por_euro'])
+    tabela = pd.concat(partes, ignore_index=True)
+    tabela = tabela.sort_values('ganho_por_euro', ascending=False, kind='stable').drop_duplicates('venda')
+    return tabela.head(limite).reset_index(drop=True)
@@ -0,0 +1,175 @@
+"""Motor de cálculo sem interface gráfica.
+
+Todas as funções recebem o DataFrame de jogadores; nada aqui depende de
+tkinter, para que a GUI, a linha de comandos e os processos em lote partilhem
+a mesma lógica.
+"""
+import numpy as np
+import pandas as pd
+
+from .historico import ALFA_EWMA, JANELA_FORMA, escrever_forma
+from .mercado import IndiceMercado
+from .otimizador import otimizar_plantel
+from .perf import medir
+from .pontuacao import COLUNA_RECENTE, PERFIL_PADRAO, MotorPontuacao, score_avancado
+from .simulacao import AMOSTRAS, ajustar_distribuicoes, simular_capitao
+from .taticas import quotas_formacao, ranking_formacoes, somas_prefixo, todas_formacoes
+
+# Segundos de pesquisa do plantel ótimo antes de ficar com o melhor encontrado
+TEMPO_LIMITE_PLANTEL = 2.0
+
+
+def criar_pontuacao(df, perfil=PERFIL_PADRAO, historico=None, janela=JANELA_FORMA, alfa=ALFA_EWMA):
+    """Motor de pontuação do perfil (coluna 'perfil'), já escrito no DataFrame.
+
+    Com `historico` (ver `historico.HistoricoJornadas.ler`) junta as colunas
+    de forma ao DataFrame e o peso `ultima` passa a aplicar-se à média das
+    últimas `janela` jornadas em vez de só à última. O motor pode depois ser
+    atualizado de forma incremental (ver `ingestao.ingerir`).
+    """
+    recente = COLUNA_RECENTE
+    if historico is not None and not historico.empty:
+        escrever_forma(df, historico, janela, alfa)
+        recente = 'Forma'
+    pontuacao = MotorPontuacao(df, {'perfil': perfil}, recente=recente)
+    pontuacao.escrever(df, 'perfil')
+    return pontuacao
+
+
+@medir()
+def calcular_metricas(df, perfil=PERFIL_PADRAO, historico=None, janela=JANELA_FORMA, alfa=ALFA_EWMA):
+    """Calcula 'Score Ajustado' e 'Score Capitão' com os pesos do perfil (ver `criar_pontuacao`)"""
+    criar_pontuacao(df, perfil, historico, janela, alfa)
+    return df
+
+
+def plantel_atual(df):
+    """Posições no DataFrame dos jogadores do plantel (Titular, Suplente ou Reserva)"""
+    return np.flatnonzero((df['Titular'] | df['Suplente'] | df['Reserva']).to_numpy(dtype=bool))
+
+
+def indice_mercado(df, perfil=PERFIL_PADRAO):
+    """Índice por posição, ordenado por preço, dos jogadores que se podem comprar.
+
+    O score é o Score Avançado do perfil, calculado para toda a liga; ficam
+    de fora o plantel atual e os lesionados.
+    """
+    scores = score_avancado(
+        df['Pontos Última Jornada'].to_numpy(dtype=float),
+        df['Dificuldade do Jogo'].to_numpy(dtype=float),
+        df['Score Ajustado'].to_numpy(dtype=float),
+        perfil,
+    )
+    candidatos = np.ones(len(df), dtype=bool)
+    candidatos[plantel_atual(df)] = False
+    candidatos &= ~df['Lesionado'].to_numpy(dtype=bool)
+    return IndiceMercado(df, scores, candidatos)
+
+
+def jogadores_disponiveis(df):
+    """Jogadores do plantel atual que não estão lesionados"""
+    return df[(df['Titular'] | df['Suplente'] | df['Reserva']) & ~df['Lesionado']]
+
+
+@medir()
+def selecionar_melhor_onze(df, formacao, orcamento=None, tempo_limite=TEMPO_LIMITE_PLANTEL, progresso=None):
+    """Melhor onze para a formação.
+
+    Sem orçamento escolhe entre os jogadores do plantel atual; com orçamento
+    monta o plantel ótimo de 15 jogadores a partir de todo o mercado,
+    respeitando preço, quotas por posição e o limite de jogadores por clube.
+    A pesquisa para ao fim de `tempo_limite` segundos com o melhor plantel
+    encontrado (None para esperar sempre pelo ótimo); `progresso` segue para
+    `otimizar_plantel`.
+    """
+    if orcamento is not None:
+        mercado = df[~df['Lesionado']]
+        resultado = otimizar_plantel(mercado, quotas_formacao(formacao), orcamento, tempo_limite=tempo_limite,
+                                     progresso=progresso)
+        return df.loc[resultado['onze']]
+
+    disponiveis = jogadores_disponiveis(df)
+    equipe = pd.DataFrame()
+
+    for pos, qtd in quotas_formacao(formacao).items():
+        jogadores_pos = disponiveis[disponiveis['Posição'] == pos].nlargest(qtd, 'Score Ajustado')
+        equipe = pd.concat([equipe, jogadores_pos])
+
+    return equipe
+
+
+@medir()
+def comparar_taticas(df):
+    """Ordena todas as formações legais com uma única ordenação por posição"""
+    prefixos = somas_prefixo(jogadores_disponiveis(df))
+    return ranking_formacoes(prefixos, todas_formacoes())
+
+
+@medir()
+def sugerir_capitao(df, n=5):
+    """Titulares com maior Score Capitão"""
+    return df[df['Titular']].nlargest(n, 'Score Capitão')
+
+
+@medir()
+def simular_capitaes(df, amostras=AMOSTRAS, historico=None, processos=1, semente=None, progresso=None):
+    """Titulares com pontos esperados, variância e P(ótimo) como capitão, por Monte Carlo"""
+    media, desvio = ajustar_distribuicoes(df, historico)
+    titulares = df['Titular'].to_numpy()
+    resultado = df[titulares].copy()
+    if resultado.empty:
+        return resultado
+
+    sim = simular_capitao(media[titulares], desvio[titulares], amostras, semente=semente, processos=processos,
+                          progresso=progresso)
+    resultado['Pontos Esperados'] = sim['esperado']
+    resultado['Variância'] = sim['variancia']
+    resultado['P(Ótimo)'] = sim['prob_otimo']
+    resultado['Equipa Esperada'] = sim['equipa_esperada']
+    return resultado.sort_values('P(Ótimo)', ascending=False)
+
+
+@medir()
+def sugerir_transferencias(df, posicao, orcamento, perfil=PERFIL_PADRAO):
+    """Sugere transferências com comparação de jogadores e gestão de orçamento dinâmico"""
+    # Identificar jogadores atuais na posição
+    jogadores_atuais = df[
+        (df['Posição'] == posicao) &
+        (df['Titular'] | df['Suplente'] | df['Reserva'])
+    ]
+
+    # Encontrar o jogador mais substituível
+    jogador_substituivel = jogadores_atuais.nsmallest(1, 'Score Ajustado')
+    bonus_venda = jogador_substituivel['Preço'].values[0] if not jogador_substituivel.empty else 0
+    orcamento_total = orcamento + bonus_venda
+
+    # Calcular score aprimorado
+    df_filtrado = df[
+        (df['Posição'] == posicao) &
+        (~df['Titular']) &
+        (df['Preço'] <= orcamento_total)
+    ].copy()
+
+    df_filtrado['Score Avançado'] = score_avancado(
+        df_filtrado['Pontos Última Jornada'],
+        df_filtrado['Dificuldade do Jogo'],
+        df_filtrado['Score Ajustado'],
+        perfil,
+    )
+
+    # Comparar com jogadores atuais
+    if not jogadores_atuais.empty:
+        score_minimo = jogadores_atuais['Score Ajustado'].min() * 1.2
+        df_filtrado = df_filtrado[df_filtrado['Score Avançado'] > score_minimo]
+
+    # Gerar sugestões estratificadas
+    sugestoes = {
+        'top_performers': df_filtrado.nlargest(3, 'Score Avançado'),
+        'custo_beneficio': df_filtrado[df_filtrado['Preço'] <= orcamento].nlargest(3, 'Score Avançado')
+    }
+
+    return {
+        'sugestoes': sugestoes,
+        'jogador_venda': jogador_substituivel,
+        'orcamento_ajustado': orcamento_total
+    }
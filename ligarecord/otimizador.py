@@ -0,0 +1,406 @@
+import time
+
+import numpy as np
+
+# Composição do plantel de 15 jogadores (onze inicial + 4 suplentes)
+QUOTAS_PLANTEL = {'Goleiro': 2, 'Defesa': 5, 'Médio': 5, 'Avançado': 3}
+
+# Resolução mínima da tabela de orçamento usada nos limites superiores
+NIVEIS_ORCAMENTO = 1024
+# Células (float64) de todas as tabelas; dentro deste limite o orçamento usa
+# a grelha exata dos preços, o que torna os limites muito mais apertados
+MAX_CELULAS = 16_000_000
+
+# Iterações de subgradiente para os multiplicadores do limite por clube;
+# param antes se o limite não melhorar em ITERACOES_SEM_MELHORIA seguidas
+ITERACOES_LAGRANGE = 15
+ITERACOES_SEM_MELHORIA = 3
+# Jogadores percorridos na poda entre cada filtro vetorial pelo top de clubes
+BLOCO_PODA = 256
+# Nós da pesquisa entre verificações do tempo limite e chamadas de `progresso`
+NOS_ENTRE_VERIFICACOES = 1024
+
+
+class _TempoEsgotado(Exception):
+    pass
+
+
+def _podar_dominados(preco, score, clube, k, folga):
+    """Remove jogadores que nunca podem estar num plantel ótimo.
+
+    Um jogador é dominado quando existe sempre um substituto da mesma posição
+    mais barato e com score igual ou superior que pode entrar no plantel: ou
+    k dominadores do mesmo clube, ou dominadores em k + folga clubes distintos
+    (folga = número máximo de clubes que podem estar cheios).
+    """
+    ordem = np.lexsort((-score, preco))
+    manter = []
+    topo_clube = {}
+    maximos = {}
+    top_clubes = []
+    tamanho_top = k + folga + 1
+
+    inicio = 0
+    while inicio < len(ordem):
+        for idx in ordem[inicio:inicio + BLOCO_PODA]:
+            s = score[idx]
+            c = clube[idx]
+
+            proprios = topo_clube.setdefault(c, [])
+            dominado = len(proprios) >= k and proprios[k - 1] >= s
+            if not dominado:
+                outros = sum(1 for m, cl in top_clubes if cl != c and m >= s)
+                dominado = outros >= k + folga
+            if not dominado:
+                manter.append(idx)
+
+            # Atualizar estruturas com o jogador atual
+            if len(proprios) < k or s > proprios[-1]:
+                proprios.append(s)
+                proprios.sort(reverse=True)
+                del proprios[k:]
+
+            if s > maximos.get(c, -np.inf):
+                maximos[c] = s
+                top_clubes = [(m, cl) for m, cl in top_clubes if cl != c]
+                top_clubes.append((s, c))
+                top_clubes.sort(reverse=True)
+                del top_clubes[tamanho_top:]
+
+        inicio += BLOCO_PODA
+        if len(top_clubes) == tamanho_top:
+            # Com o top cheio, quem não passa do último tem dominadores em
+            # k + folga clubes distintos; esse mínimo só sobe, por isso os
+            # restantes abaixo dele saem já (e não dominam ninguém que não
+            # estivesse também abaixo dele)
+            restantes = ordem[inicio:]
+            ordem = np.concatenate([ordem[:inicio], restantes[score[restantes] > top_clubes[-1][0]]])
+
+    return np.array(manter, dtype=np.intp)
+
+
+def _maximo_plantel(contagens, quotas, max_por_clube):
+    """Maior plantel que se consegue montar só com quotas e limite por clube.
+
+    `contagens` é uma matriz posições x clubes com o número de jogadores
+    disponíveis. É um fluxo máximo (origem -> posição -> clube -> destino),
+    calculado por caminhos de aumento; como o fluxo não passa do tamanho do
+    plantel bastam poucas pesquisas em largura.
+    """
+    n_pos, n_clubes = contagens.shape
+    fluxo = np.zeros_like(contagens)
+    por_posicao = np.zeros(n_pos, dtype=np.intp)
+    por_clube = np.zeros(n_clubes, dtype=np.intp)
+    while True:
+        # Pesquisa em largura alternando posições e clubes; guarda de onde se chegou
+        origem_pos = np.full(n_pos, -2, dtype=np.intp)
+        origem_clube = np.full(n_clubes, -1, dtype=np.intp)
+        fila = [p for p in range(n_pos) if por_posicao[p] < quotas[p]]
+        origem_pos[fila] = -1
+        destino = -1
+        while fila and destino < 0:
+            seguintes = []
+            for p in fila:
+                novos = np.flatnonzero((fluxo[p] < contagens[p]) & (origem_clube < 0))
+                origem_clube[novos] = p
+                livres = novos[por_clube[novos] < max_por_clube]
+                if len(livres):
+                    destino = livres[0]
+                    break
+                for c in novos:
+                    # Desfazer uma escolha de outra posição neste clube
+                    for q in np.flatnonzero((fluxo[:, c] > 0) & (origem_pos == -2)):
+                        origem_pos[q] = c
+                        seguintes.append(q)
+            fila = seguintes
+        if destino < 0:
+            return int(por_posicao.sum())
+        por_clube[destino] += 1
+        c = destino
+        while True:
+            p = origem_clube[c]
+            fluxo[p, c] += 1
+            if origem_pos[p] == -1:
+                por_posicao[p] += 1
+                break
+            c = origem_pos[p]
+            fluxo[p, c] -= 1
+
+
+def _tabela_posicao(custos, scores, penalidades, quota, titulares, peso_suplentes, seguinte):
+    """Knapsack por posição encadeado com as posições seguintes.
+
+    T[i, t, b] = melhor valor a escolher quota - t jogadores entre os
+    candidatos i.. e completar as posições seguintes com custo <= b. O limite
+    por clube entra apenas através das penalidades (relaxação lagrangiana).
+    `seguinte` é a linha T[0, 0] da posição seguinte.
+    """
+    n = len(custos)
+    niveis = len(seguinte) - 1
+    tabela = np.full((n + 1, quota + 1, niveis + 1), -np.inf)
+    tabela[n, quota, :] = seguinte
+    pesos = np.where(np.arange(quota) < titulares, 1.0, peso_suplentes)
+
+    for i in range(n - 1, -1, -1):
+        tabela[i] = tabela[i + 1]
+        c = custos[i]
+        if c > niveis:
+            continue
+        for t in range(quota):
+            candidato = tabela[i + 1, t + 1, :niveis + 1 - c] + (pesos[t] * scores[i] - penalidades[i])
+            np.maximum(tabela[i, t, c:], candidato, out=tabela[i, t, c:])
+    return tabela, pesos
+
+
+def _unidade_orcamento(precos, orcamento, celulas_por_nivel):
+    """Unidade de discretização do orçamento e número de níveis.
+
+    Usa o máximo divisor comum dos preços quando os níveis cabem em
+    MAX_CELULAS (limite exato); caso contrário divide o orçamento no maior
+    número de níveis que cabe e arredonda os custos para baixo, o que mantém
+    os limites válidos mas menos apertados.
+    """
+    max_niveis = max(NIVEIS_ORCAMENTO, MAX_CELULAS // max(celulas_por_nivel, 1))
+    if orcamento <= 0:
+        return 1.0, 0
+    valores = np.append(precos, orcamento)
+    if np.all(valores == np.round(valores)):
+        divisor = int(np.gcd.reduce(valores.astype(np.int64)))
+        if divisor > 0 and orcamento / divisor <= max_niveis:
+            return float(divisor), int(orcamento / divisor + 1e-9)
+    return orcamento / max_niveis, max_niveis
+
+
+def _construir_tabelas(grupos, lambdas, quotas_onze, peso_suplentes, niveis):
+    """Recalcula as tabelas de todas as posições e devolve o limite na raiz."""
+    seguinte = np.zeros(niveis + 1)
+    for g in reversed(grupos):
+        g['tabela'], g['pesos'] = _tabela_posicao(g['custos'], g['score'], lambdas[g['clube']], g['quota'],
+                                                  quotas_onze.get(g['pos'], 0), peso_suplentes, seguinte)
+        seguinte = g['tabela'][0, 0]
+    return seguinte[niveis]
+
+
+def _solucao_relaxada(grupos, niveis):
+    """Reconstrói a solução ótima da relaxação como lista de (p, i, t)."""
+    escolha = []
+    b = niveis
+    for p, g in enumerate(grupos):
+        tabela = g['tabela']
+        t = 0
+        for i in range(len(g['custos'])):
+            if t == g['quota']:
+                break
+            if tabela[i, t, b] != tabela[i + 1, t, b]:
+                escolha.append((p, i, t))
+                b -= g['custos'][i]
+                t += 1
+    return escolha
+
+
+def otimizar_plantel(df, quotas_onze, orcamento, max_por_clube=3,
+                     quotas_plantel=QUOTAS_PLANTEL, peso_suplentes=0.1,
+                     coluna_score='Score Ajustado', tempo_limite=None, progresso=None):
+    """Escolhe o plantel e o onze inicial ótimos dentro do orçamento.
+
+    Maximiza a soma do score do onze (mais peso_suplentes vezes o score dos
+    suplentes) respeitando o preço total, as quotas por posição do plantel e
+    da formação e o número máximo de jogadores por clube. A solução é exata:
+    poda de dominados seguida de branch-and-bound com limites de knapsack
+    e relaxação lagrangiana do limite por clube. Com `tempo_limite` (em
+    segundos) a pesquisa para quando o tempo se esgota e já há um plantel
+    válido, e devolve o melhor encontrado até aí. `progresso`, se dado, é
+    chamado a cada iteração lagrangiana e a cada NOS_ENTRE_VERIFICACOES nós
+    com a fração do tempo limite já gasta (0 sem limite); pode lançar uma
+    exceção para abandonar o cálculo.
+
+    Devolve um dicionário com os índices do plantel e do onze, a pontuação,
+    o custo total e 'completo' (falso se a pesquisa parou antes de provar
+    que o plantel é ótimo). Lança ValueError se não existir plantel válido.
+    """
+    posicoes = [pos for pos in quotas_plantel if quotas_plantel[pos] > 0]
+    for pos, qtd in quotas_onze.items():
+        if qtd > quotas_plantel.get(pos, 0):
+            raise ValueError(f"Formação pede {qtd} jogadores de {pos}, mais do que o plantel permite")
+
+    tamanho_plantel = sum(quotas_plantel[pos] for pos in posicoes)
+    if max_por_clube is None or 'Equipa' not in df.columns:
+        max_por_clube = tamanho_plantel
+    folga = (tamanho_plantel - 1) // max_por_clube if max_por_clube < tamanho_plantel else 0
+
+    indices = df.index.to_numpy()
+    preco_total = df['Preço'].to_numpy(dtype=float)
+    score_total = df[coluna_score].to_numpy(dtype=float)
+    posicao_total = df['Posição'].to_numpy()
+    if max_por_clube < tamanho_plantel:
+        _, clube_total = np.unique(df['Equipa'].to_numpy().astype(str), return_inverse=True)
+    else:
+        clube_total = np.arange(len(df))
+
+    disponiveis = {}
+    for pos in posicoes:
+        linhas = np.flatnonzero(posicao_total == pos)
+        disponiveis[pos] = linhas[preco_total[linhas] <= orcamento]
+        if len(disponiveis[pos]) < quotas_plantel[pos]:
+            raise ValueError(f"Jogadores insuficientes para a posição {pos}")
+    if max_por_clube < tamanho_plantel:
+        # Sem clubes suficientes a pesquisa percorreria a árvore toda sem encontrar plantel
+        contagens = np.array([np.bincount(clube_total[disponiveis[pos]], minlength=clube_total.max() + 1)
+                              for pos in posicoes])
+        if _maximo_plantel(contagens, [quotas_plantel[pos] for pos in posicoes], max_por_clube) < tamanho_plantel:
+            raise ValueError(f"Não há clubes suficientes para um plantel com no máximo "
+                             f"{max_por_clube} jogadores por clube")
+
+    grupos = []
+    for pos in posicoes:
+        quota = quotas_plantel[pos]
+        linhas = disponiveis[pos]
+        linhas = linhas[_podar_dominados(preco_total[linhas], score_total[linhas], clube_total[linhas], quota, folga)]
+        linhas = linhas[np.argsort(-score_total[linhas], kind='stable')]
+        grupos.append({
+            'pos': pos, 'linhas': linhas, 'preco': preco_total[linhas], 'score': score_total[linhas],
+            'clube': clube_total[linhas], 'quota': quota,
+        })
+
+    # Todos os planteis têm `quota` jogadores de cada posição: o preço mínimo
+    # da posição é um custo fixo e as tabelas só contam o que passa dele
+    fixo_seguinte = 0.0
+    for g in reversed(grupos):
+        g['minimo'] = g['preco'].min()
+        g['excedente'] = g['preco'] - g['minimo']
+        # Dinheiro que tem de sobrar com t jogadores da posição já escolhidos
+        g['reserva'] = (g['quota'] - np.arange(g['quota'] + 1)) * g['minimo'] + fixo_seguinte
+        fixo_seguinte = g['reserva'][0]
+    # Preços não inteiros acumulam erros de arredondamento no saldo: um plantel
+    # que custa exatamente o orçamento não pode ficar de fora por isso
+    tolerancia = 1e-9 * max(abs(orcamento), 1.0)
+    if orcamento - fixo_seguinte < -tolerancia:
+        raise ValueError("Nenhum plantel cabe no orçamento indicado")
+    # Acima do plantel mais caro o orçamento não pesa: menos níveis nas tabelas
+    livre = min(max(orcamento - fixo_seguinte, 0.0),
+                sum(np.sort(g['excedente'])[-g['quota']:].sum() for g in grupos))
+    unidade, niveis = _unidade_orcamento(np.concatenate([g['excedente'] for g in grupos]), livre,
+                                         sum((len(g['linhas']) + 1) * (g['quota'] + 1) for g in grupos))
+
+    for g in grupos:
+        g['custos'] = np.floor(g['excedente'] / unidade + 1e-9).astype(np.intp)
+
+    # Multiplicadores de Lagrange para o limite por clube (subgradiente)
+    n_clubes = clube_total.max() + 1 if len(clube_total) else 1
+    lambdas = np.zeros(n_clubes)
+    melhores_lambdas, melhor_limite = lambdas, np.inf
+    melhor = {'valor': -np.inf, 'escolha': None}
+    passo = 0.05 * max(score_total.max(initial=0.0), 1e-9)
+    sem_melhoria = 0
+    inicio = time.perf_counter()
+
+    def avisar():
+        if progresso is not None:
+            gasto = 0.0 if tempo_limite is None else (time.perf_counter() - inicio) / max(tempo_limite, 1e-9)
+            progresso(min(gasto, 1.0))
+
+    for iteracao in range(ITERACOES_LAGRANGE if max_por_clube < tamanho_plantel else 1):
+        avisar()
+        limite = _construir_tabelas(grupos, lambdas, quotas_onze, peso_suplentes, niveis)
+        if limite == -np.inf:
+            raise ValueError("Nenhum plantel cabe no orçamento indicado")
+        limite += max_por_clube * lambdas.sum()
+        if limite < melhor_limite - 1e-12:
+            melhores_lambdas, melhor_limite = lambdas, limite
+            sem_melhoria = 0
+        else:
+            sem_melhoria += 1
+        relaxada = _solucao_relaxada(grupos, niveis)
+        excesso = np.bincount([grupos[p]['clube'][i] for p, i, _ in relaxada], minlength=n_clubes) - max_por_clube
+        if not (excesso > 0).any():
+            # Solução admissível: serve de incumbente inicial para a pesquisa
+            if sum(grupos[p]['preco'][i] for p, i, _ in relaxada) <= orcamento + tolerancia:
+                valor = sum(grupos[p]['pesos'][t] * grupos[p]['score'][i] for p, i, t in relaxada)
+                if valor > melhor['valor']:
+                    melhor['valor'], melhor['escolha'] = valor, relaxada
+            if lambdas.sum() == 0:
+                break
+        if melhor['valor'] >= melhor_limite - 1e-12 or sem_melhoria >= ITERACOES_SEM_MELHORIA:
+            break
+        lambdas = np.maximum(0.0, lambdas + passo / np.sqrt(iteracao + 1) * excesso)
+
+    # O incumbente já atinge o limite superior: é ótimo e não há nada a procurar
+    completo = melhor['valor'] >= melhor_limite - 1e-12
+    if not completo and lambdas is not melhores_lambdas:
+        _construir_tabelas(grupos, melhores_lambdas, quotas_onze, peso_suplentes, niveis)
+    for g in grupos:
+        g['penalidade'] = melhores_lambdas[g['clube']]
+    constante = max_por_clube * melhores_lambdas.sum()
+
+    escolha = []
+    contagem_clube = np.zeros(n_clubes, dtype=np.intp)
+    prazo = None if tempo_limite is None else inicio + tempo_limite
+    nos = [0]
+
+    # `ajustado` = valor real menos as penalidades dos escolhidos; somado à
+    # tabela e à constante dá um limite superior válido para o nó
+    def procurar(p, i, t, valor, ajustado, saldo):
+        nos[0] += 1
+        if nos[0] % NOS_ENTRE_VERIFICACOES == 0:
+            avisar()
+            if prazo is not None and melhor['escolha'] is not None and time.perf_counter() > prazo:
+                raise _TempoEsgotado
+        if p == len(grupos):
+            if valor > melhor['valor']:
+                melhor['valor'] = valor
+                melhor['escolha'] = list(escolha)
+            return
+        g = grupos[p]
+        if t == g['quota']:
+            procurar(p + 1, 0, 0, valor, ajustado, saldo)
+            return
+
+        tabela = g['tabela']
+        b = min(int(max(saldo - g['reserva'][t] + tolerancia, 0.0) / unidade + 1e-9), niveis)
+        limites = tabela[:, t, b]
+        ganho = g['pesos'][t] * g['score']
+        ultimo = len(g['linhas']) - (g['quota'] - t)
+        for j in range(i, ultimo + 1):
+            if ajustado + limites[j] + constante <= melhor['valor'] + 1e-12:
+                break
+            clube = g['clube'][j]
+            novo_saldo = saldo - g['preco'][j]
+            resto = novo_saldo - g['reserva'][t + 1]
+            if resto < -tolerancia or contagem_clube[clube] >= max_por_clube:
+                continue
+            novo_ajustado = ajustado + ganho[j] - g['penalidade'][j]
+            b2 = min(int(max(resto + tolerancia, 0.0) / unidade + 1e-9), niveis)
+            if novo_ajustado + tabela[j + 1, t + 1, b2] + constante <= melhor['valor'] + 1e-12:
+                continue
+            escolha.append((p, j, t))
+            contagem_clube[clube] += 1
+            procurar(p, j + 1, t + 1, valor + ganho[j], novo_ajustado, novo_saldo)
+            contagem_clube[clube] -= 1
+            escolha.pop()
+
+    if not completo:
+        try:
+            procurar(0, 0, 0, 0.0, 0.0, float(orcamento))
+            completo = True
+        except _TempoEsgotado:
+            pass
+
+    if melhor['escolha'] is None:
+        raise ValueError("Nenhum plantel válido respeita o limite por clube")
+
+    plantel, onze, custo = [], [], 0.0
+    for p, j, t in melhor['escolha']:
+        g = grupos[p]
+        linha = g['linhas'][j]
+        plantel.append(indices[linha])
+        custo += g['preco'][j]
+        if t < quotas_onze.get(g['pos'], 0):
+            onze.append(indices[linha])
+
+    return {
+        'plantel': plantel,
+        'onze': onze,
+        'pontuacao': float(melhor['valor']),
+        'custo': custo,
+        'completo': completo,
+    }
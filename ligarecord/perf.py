@@ -0,0 +1,77 @@
+"""Medição opcional do tempo e da memória de cada chamada.
+
+Ativa-se com a variável de ambiente LIGARECORD_PERF antes de arrancar:
+'1' mede só o tempo, 'memoria' mede também o pico de memória alocada
+durante a chamada (tracemalloc, que torna tudo mais lento). Desativada,
+`medir` devolve a própria função e não há custo nenhum.
+
+Cada medição vai para o logger 'ligarecord.perf' (nível DEBUG, escrito em
+stderr se ninguém configurou o logger) e fica nas últimas `MAX_MEDICOES`,
+que o painel Perf da GUI mostra. Com chamadas aninhadas ou em paralelo o
+pico de memória é aproximado.
+"""
+import functools
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+MODO = os.environ.get('LIGARECORD_PERF', '').strip().lower()
+ATIVO = MODO not in ('', '0', 'nao', 'não')
+MEMORIA = MODO == 'memoria'
+MAX_MEDICOES = 200
+
+registo = logging.getLogger('ligarecord.perf')
+_medicoes = deque(maxlen=MAX_MEDICOES)
+_bloqueio = threading.Lock()
+
+if ATIVO and not registo.handlers:
+    _saida = logging.StreamHandler()
+    _saida.setFormatter(logging.Formatter('%(asctime)s %(name)s %(message)s'))
+    registo.addHandler(_saida)
+    registo.setLevel(logging.DEBUG)
+
+
+def medir(nome=None):
+    """Decorador que regista a duração (e a memória, se pedida) de cada chamada"""
+    def decorar(funcao):
+        if not ATIVO:
+            return funcao
+        rotulo = nome or funcao.__qualname__
+
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            if MEMORIA:
+                with _bloqueio:
+                    if not tracemalloc.is_tracing():
+                        tracemalloc.start()
+                    base = tracemalloc.get_traced_memory()[0]
+                    tracemalloc.reset_peak()
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                segundos = time.perf_counter() - inicio
+                memoria = max(tracemalloc.get_traced_memory()[1] - base, 0) if MEMORIA else None
+                _registar(rotulo, segundos, memoria)
+        return medida
+    return decorar
+
+
+def _registar(rotulo, segundos, memoria):
+    _medicoes.append({'funcao': rotulo, 'segundos': segundos, 'memoria': memoria, 'quando': time.time()})
+    if memoria is None:
+        registo.debug("%s: %.1f ms", rotulo, segundos * 1e3)
+    else:
+        registo.debug("%s: %.1f ms, %.1f MB", rotulo, segundos * 1e3, memoria / 1e6)
+
+
+def ultimas(n=MAX_MEDICOES):
+    """Últimas `n` medições, da mais recente para a mais antiga"""
+    return list(_medicoes)[::-1][:n]
+
+
+def limpar():
+    _medicoes.clear()
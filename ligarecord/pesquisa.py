@@ -0,0 +1,187 @@
+import unicodedata
+
+import numpy as np
+
+# A partir desta fração de nomes alterados o índice é reconstruído
+RECONSTRUIR_APOS = 0.1
+# Listas de ocorrências (as mais curtas) intersectadas por pesquisa; o resto
+# dos n-gramas fica para a confirmação, que é vetorial
+MAX_LISTAS = 2
+
+
+def normalizar(texto):
+    """Minúsculas e sem acentos: 'João' -> 'joao'"""
+    texto = str(texto)
+    if texto.isascii():
+        return texto.lower()
+    decomposto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+
+def ngramas(texto):
+    """Códigos inteiros dos bigramas e trigramas de um texto (21 bits por carácter)"""
+    codigos = [ord(c) for c in texto]
+    bigramas = {(a << 21) | b for a, b in zip(codigos, codigos[1:])}
+    trigramas = {(a << 42) | (b << 21) | c for a, b, c in zip(codigos, codigos[1:], codigos[2:])}
+    return bigramas | trigramas
+
+
+def _trigramas(texto):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndiceNomes:
+    """Índice de n-gramas (bigramas e trigramas) sobre os nomes normalizados.
+
+    As listas de ocorrências de cada n-grama são arrays NumPy ordenados; uma
+    pesquisa por substring intersecta as listas mais curtas dos n-gramas da
+    consulta e confirma os candidatos no nome atual. Renomear um jogador só
+    acrescenta os novos n-gramas a um pequeno índice incremental: as
+    ocorrências antigas ficam obsoletas mas são eliminadas pela confirmação,
+    e o índice é reconstruído quando a parte incremental cresce demasiado.
+    A confirmação corre sobre a matriz de nomes da última reconstrução; só os
+    jogadores alterados desde então são confirmados um a um.
+    """
+
+    def __init__(self, ids, nomes):
+        self.ids = np.asarray(ids)
+        self.slot_id = {int(id_jogador): slot for slot, id_jogador in enumerate(self.ids.tolist())}
+        self.normalizados = [normalizar(nome) for nome in nomes]
+        self._construir()
+
+    def _construir(self):
+        """Extrai todos os n-gramas de uma vez a partir da matriz de códigos"""
+        self.array_nomes = np.array(self.normalizados, dtype=str)
+        self.incremental = {}
+        self.alterados = set()
+        self.ocorrencias = {}
+        self.n_trigramas = np.zeros(len(self.normalizados), dtype=np.intp)
+        largura = self.array_nomes.dtype.itemsize // 4
+        if len(self.normalizados) == 0 or largura < 2:
+            return
+
+        matriz = self.array_nomes.view(np.uint32).reshape(len(self.normalizados), largura).astype(np.uint64)
+        slots = np.broadcast_to(np.arange(len(self.normalizados), dtype=np.int32)[:, None], matriz.shape)
+        bigramas = (matriz[:, :-1] << 21) | matriz[:, 1:]
+        validos_bi = matriz[:, 1:] != 0
+        codigos = [bigramas[validos_bi]]
+        posicoes = [slots[:, 1:][validos_bi]]
+        if largura >= 3:
+            trigramas = (matriz[:, :-2] << 42) | (bigramas[:, 1:])
+            validos_tri = matriz[:, 2:] != 0
+            codigos.append(trigramas[validos_tri])
+            posicoes.append(slots[:, 2:][validos_tri])
+        codigos, posicoes = np.concatenate(codigos), np.concatenate(posicoes)
+
+        # Dentro de cada bloco os slots já estão por ordem: basta uma ordenação estável
+        ordem = np.argsort(codigos, kind='stable')
+        codigos, posicoes = codigos[ordem], posicoes[ordem]
+        novos = np.ones(len(codigos), dtype=bool)
+        novos[1:] = (codigos[1:] != codigos[:-1]) | (posicoes[1:] != posicoes[:-1])
+        codigos, posicoes = codigos[novos], posicoes[novos]
+
+        # Trigramas distintos de cada nome, para a semelhança de Jaccard
+        self.n_trigramas = np.bincount(posicoes[codigos >> 42 != 0], minlength=len(self.normalizados))
+        unicos, inicios = np.unique(codigos, return_index=True)
+        fins = np.append(inicios[1:], len(codigos))
+        self.ocorrencias = {codigo: posicoes[i:f] for codigo, i, f in zip(unicos.tolist(), inicios, fins)}
+
+    def _lista(self, codigo):
+        base = self.ocorrencias.get(codigo)
+        extra = self.incremental.get(codigo)
+        if extra is None:
+            return base if base is not None else np.empty(0, dtype=np.int32)
+        extra = np.fromiter(extra, dtype=np.int32, count=len(extra))
+        return np.union1d(base, extra) if base is not None else np.sort(extra)
+
+    def atualizar(self, id_jogador, nome):
+        """Acrescenta um jogador novo ou muda o nome de um existente"""
+        id_jogador = int(id_jogador)
+        normalizado = normalizar(nome)
+        slot = self.slot_id.get(id_jogador)
+        if slot is None:
+            slot = len(self.normalizados)
+            self.slot_id[id_jogador] = slot
+            self.ids = np.append(self.ids, id_jogador)
+            self.normalizados.append(normalizado)
+        elif self.normalizados[slot] == normalizado:
+            return
+        else:
+            self.normalizados[slot] = normalizado
+
+        for codigo in ngramas(normalizado):
+            self.incremental.setdefault(codigo, set()).add(slot)
+        self.alterados.add(slot)
+        if len(self.alterados) > RECONSTRUIR_APOS * len(self.normalizados):
+            self._construir()
+
+    def _confirmar(self, slots, consulta):
+        """Máscara dos slots cujo nome atual contém a consulta"""
+        slots = np.asarray(slots, dtype=np.intp)
+        if not self.alterados:
+            return np.char.find(self.array_nomes[slots], consulta) >= 0
+        alterados = np.fromiter(self.alterados, dtype=np.intp, count=len(self.alterados))
+        um_a_um = np.isin(slots, alterados)
+        contem = np.zeros(len(slots), dtype=bool)
+        contem[~um_a_um] = np.char.find(self.array_nomes[slots[~um_a_um]], consulta) >= 0
+        contem[um_a_um] = [consulta in self.normalizados[slot] for slot in slots[um_a_um].tolist()]
+        return contem
+
+    def procurar(self, consulta):
+        """IDs dos jogadores cujo nome contém a consulta (sem acentos)"""
+        consulta = normalizar(consulta)
+        if not consulta:
+            return self.ids.copy()
+
+        if len(consulta) == 1:
+            return self.ids[self._confirmar(np.arange(len(self.normalizados)), consulta)]
+
+        codigos = ngramas(consulta)
+        if len(consulta) > 3:
+            # Os trigramas já implicam os bigramas
+            codigos = {codigo for codigo in codigos if codigo >> 42}
+        listas = sorted((self._lista(codigo) for codigo in codigos), key=len)
+        candidatos = listas[0]
+        for lista in listas[1:MAX_LISTAS]:
+            if len(candidatos) == 0:
+                break
+            candidatos = np.intersect1d(candidatos, lista, assume_unique=True)
+        if len(consulta) > 3 or len(listas) > MAX_LISTAS or self.alterados:
+            candidatos = candidatos[self._confirmar(candidatos, consulta)]
+        return self.ids[candidatos]
+
+    def procurar_aproximado(self, consulta, limite=10, minimo=0.4):
+        """Pesquisa tolerante a erros por semelhança de trigramas.
+
+        A semelhança é a fração dos trigramas da consulta presentes no nome,
+        para que 'palinha' encontre 'João Palhinha'; empates são desfeitos pela
+        semelhança de Jaccard. Devolve [(id, semelhança)] por ordem decrescente.
+        """
+        consulta = normalizar(consulta)
+        tris_consulta = _trigramas(consulta)
+        if not tris_consulta:
+            return [(int(id_jogador), 1.0) for id_jogador in self.procurar(consulta)[:limite]]
+
+        listas = [self._lista(codigo) for codigo in ngramas(consulta) if codigo >> 42]
+        contagens = np.bincount(np.concatenate(listas), minlength=len(self.normalizados))
+        # Pré-seleção pelos trigramas partilhados; a semelhança exata usa o nome atual
+        candidatos = np.flatnonzero(contagens)
+        if len(candidatos) > 20 * limite:
+            candidatos = candidatos[np.argpartition(-contagens[candidatos], 20 * limite)[:20 * limite]]
+
+        # Fora dos alterados as listas estão certas: as contagens são os
+        # trigramas comuns; nos alterados conta-se no nome atual
+        comuns = contagens[candidatos].astype(float)
+        n_nome = np.zeros(len(candidatos))
+        fixos = candidatos < len(self.n_trigramas)
+        n_nome[fixos] = self.n_trigramas[candidatos[fixos]]
+        for k in np.flatnonzero(np.isin(candidatos, list(self.alterados))):
+            tris_nome = _trigramas(self.normalizados[candidatos[k]])
+            comuns[k] = len(tris_consulta & tris_nome)
+            n_nome[k] = len(tris_nome)
+
+        semelhanca = comuns / len(tris_consulta)
+        jaccard = comuns / (len(tris_consulta) + n_nome - comuns)
+        aceites = np.flatnonzero(semelhanca >= minimo)
+        ordem = aceites[np.lexsort((-jaccard[aceites], -semelhanca[aceites]))][:limite]
+        return [(int(self.ids[candidatos[k]]), float(semelhanca[k])) for k in ordem]
@@ -0,0 +1,284 @@
+"""Planeamento de transferências para as próximas K jornadas.
+
+Cada estado é (plantel, banco, transferências livres). Em cada jornada o
+estado pode fazer até `max_por_jornada` transferências (vender um jogador e
+comprar outro da mesma posição), pagando `custo_extra` pontos por cada uma
+acima das livres; depois soma os pontos do melhor onze dessa jornada (com o
+capitão a dobrar). A pesquisa é em feixe: os estados repetidos são fundidos
+e só os `largura` mais promissores passam à jornada seguinte, ordenados pelos
+pontos já somados mais o valor do plantel atual nas jornadas que faltam.
+O valor de cada plantel em todas as jornadas é memorizado.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from .ingestao import ler_fonte
+from .simulacao import pontos_esperados
+from .taticas import POSICOES, quotas_formacao, todas_formacoes
+
+LIVRES_POR_JORNADA = 1
+MAX_LIVRES = 2
+CUSTO_EXTRA = 4
+MAX_POR_JORNADA = 2
+LARGURA = 30
+CANDIDATOS_POR_POSICAO = 10
+DIFICULDADE_NEUTRA = 3
+COLUNAS_CALENDARIO = ['Equipa', 'Jornada', 'Dificuldade do Jogo']
+
+
+def carregar_calendario(fonte):
+    """Calendário de um CSV/JSON (ficheiro ou URL, ver `ingestao.ler_fonte`).
+
+    Uma linha por equipa e jornada, com as colunas de `COLUNAS_CALENDARIO`;
+    'Jornada' conta a partir da próxima (1) e a dificuldade vai de 1 a 5.
+    """
+    calendario = pd.DataFrame([linha for _, _, linha in ler_fonte(fonte)])
+    em_falta = [c for c in COLUNAS_CALENDARIO if c not in calendario.columns]
+    if em_falta:
+        raise ValueError(f"Colunas em falta no calendário: {', '.join(em_falta)}")
+    calendario = calendario[COLUNAS_CALENDARIO].copy()
+    calendario['Equipa'] = calendario['Equipa'].astype(str).str.strip()
+    for coluna, maximo in (('Jornada', np.inf), ('Dificuldade do Jogo', 5)):
+        valores = pd.to_numeric(calendario[coluna], errors='coerce').to_numpy(dtype=float)
+        invalidos = np.isnan(valores) | (valores % 1 != 0) | (valores < 1) | (valores > maximo)
+        if invalidos.any():
+            raise ValueError(f"{coluna} inválida no calendário: {calendario[coluna].to_numpy()[invalidos][0]!r}")
+        calendario[coluna] = valores.astype(np.intp)
+    return calendario
+
+
+def dificuldades_por_jornada(df, jornadas, calendario=None):
+    """Dificuldade de cada jogador em cada uma das próximas jornadas.
+
+    `calendario` tem colunas 'Equipa', 'Jornada' (1 = próxima) e
+    'Dificuldade do Jogo'. Sem calendário a próxima jornada usa a coluna
+    'Dificuldade do Jogo' e as restantes uma dificuldade neutra.
+    """
+    dificuldades = np.full((len(df), jornadas), DIFICULDADE_NEUTRA, dtype=np.intp)
+    dificuldades[:, 0] = df['Dificuldade do Jogo'].to_numpy(dtype=np.intp)
+    if calendario is None:
+        return dificuldades
+
+    for jornada, grupo in calendario.groupby('Jornada'):
+        if 1 <= jornada <= jornadas:
+            por_equipa = pd.Series(grupo['Dificuldade do Jogo'].to_numpy(), index=grupo['Equipa'].to_numpy())
+            valores = df['Equipa'].map(por_equipa).to_numpy(dtype=float)
+            conhecidas = ~np.isnan(valores)
+            dificuldades[conhecidas, jornada - 1] = valores[conhecidas]
+    return dificuldades
+
+
+class _Avaliador:
+    """Pontos do melhor onze (mais capitão) de um plantel, por jornada, memorizados"""
+
+    def __init__(self, pontos, codigos):
+        self.pontos = pontos
+        self.codigos = codigos
+        self.quotas = np.array(
+            [[quotas_formacao(f)[pos] for pos in POSICOES] for f in todas_formacoes()], dtype=np.intp
+        )
+        self.memoria = {}
+
+    def __call__(self, plantel):
+        chave = tuple(sorted(plantel))
+        valor = self.memoria.get(chave)
+        if valor is None:
+            valor = self._avaliar(np.array(chave, dtype=np.intp))
+            self.memoria[chave] = valor
+        return valor
+
+    def _prefixos(self, pontos):
+        """Somas acumuladas por ordem decrescente (linhas = melhores k)"""
+        ordenados = -np.sort(-pontos, axis=-2)
+        zeros = np.zeros(ordenados.shape[:-2] + (1, ordenados.shape[-1]))
+        return np.concatenate([zeros, np.cumsum(ordenados, axis=-2)], axis=-2)
+
+    def _avaliar(self, plantel):
+        pontos = self.pontos[plantel]
+        codigos = self.codigos[plantel]
+        totais = np.zeros((len(self.quotas), pontos.shape[1]))
+        for codigo in range(len(POSICOES)):
+            prefixo = self._prefixos(pontos[codigos == codigo])
+            totais += prefixo[np.minimum(self.quotas[:, codigo], len(prefixo) - 1)]
+        # Todas as formações têm pelo menos um jogador por linha, por isso o
+        # melhor jogador do plantel está sempre no onze e é o capitão
+        return totais.max(axis=0) + pontos.max(axis=0)
+
+    def trocas(self, plantel, codigo, saidas, entradas):
+        """Valor por jornada de cada plantel com saidas[i] trocado por entradas[i].
+
+        As trocas são todas na mesma posição, por isso só as somas acumuladas
+        dessa posição mudam; as restantes são calculadas uma vez.
+        """
+        plantel = np.asarray(plantel, dtype=np.intp)
+        codigos = self.codigos[plantel]
+        pontos = self.pontos[plantel]
+        fixos = np.zeros((len(self.quotas), pontos.shape[1]))
+        for outro in range(len(POSICOES)):
+            if outro != codigo:
+                prefixo = self._prefixos(pontos[codigos == outro])
+                fixos += prefixo[np.minimum(self.quotas[:, outro], len(prefixo) - 1)]
+        capitao_fixo = pontos[codigos != codigo].max(axis=0, initial=-np.inf)
+
+        membros = plantel[codigos == codigo]
+        linha = np.searchsorted(membros, saidas) if len(membros) else np.zeros(0, dtype=np.intp)
+        novos = np.repeat(self.pontos[membros][None], len(saidas), axis=0)
+        novos[np.arange(len(saidas)), linha] = self.pontos[entradas]
+        prefixo = self._prefixos(novos)
+        totais = fixos[None] + prefixo[:, np.minimum(self.quotas[:, codigo], len(membros))]
+        return totais.max(axis=1) + np.maximum(capitao_fixo, novos.max(axis=1))
+
+
+def planear_transferencias(df, orcamento, jornadas=5, calendario=None, historico=None,
+                           livres=LIVRES_POR_JORNADA, max_livres=MAX_LIVRES, custo_extra=CUSTO_EXTRA,
+                           max_por_jornada=MAX_POR_JORNADA, max_por_clube=3, largura=LARGURA,
+                           candidatos=CANDIDATOS_POR_POSICAO, tempo_limite=1.0, progresso=None):
+    """Melhor sequência de transferências para as próximas `jornadas`.
+
+    O plantel atual são os jogadores marcados como Titular, Suplente ou
+    Reserva; `orcamento` é o dinheiro em banco. Lesionados valem 0 pontos
+    em todas as jornadas e expulsos na próxima. Quando o `tempo_limite` (em
+    segundos) se esgota as jornadas que faltam são jogadas sem transferências.
+    `progresso`, se dado, é chamado com a fração de jornadas já planeadas.
+
+    Devolve {'jornadas': [{'vendas', 'compras', 'penalizacao', 'pontos',
+    'banco', 'livres'}], 'pontos', 'pontos_sem_transferencias', 'completo'},
+    com os jogadores como índices de `df`. O plano nunca vale menos do que
+    não fazer transferências.
+    """
+    inicio = time.perf_counter()
+    indices = df.index.to_numpy()
+    pontos = pontos_esperados(df, dificuldades_por_jornada(df, jornadas, calendario), historico)
+    pontos[df['Lesionado'].to_numpy(dtype=bool)] = 0.0
+    pontos[df['Expulso'].to_numpy(dtype=bool), 0] = 0.0
+
+    codigos = np.full(len(df), len(POSICOES))
+    posicoes = df['Posição'].to_numpy(dtype=object)
+    for codigo, pos in enumerate(POSICOES):
+        codigos[posicoes == pos] = codigo
+    precos = df['Preço'].to_numpy(dtype=float)
+    _, codigo_clube = np.unique(df['Equipa'].to_numpy(dtype=str), return_inverse=True)
+    n_clubes = codigo_clube.max() + 1
+    avaliar = _Avaliador(pontos, codigos)
+
+    plantel = np.flatnonzero((df['Titular'] | df['Suplente'] | df['Reserva']).to_numpy(dtype=bool))
+    if len(plantel) == 0:
+        raise ValueError("O plantel atual está vazio")
+
+    # Compras possíveis: os melhores no horizonte, por posição, fora do plantel
+    horizonte = np.cumsum(pontos[:, ::-1], axis=1)[:, ::-1]
+    livres_mercado = np.ones(len(df), dtype=bool)
+    livres_mercado[plantel] = False
+    compras = {}
+    for codigo in range(len(POSICOES)):
+        pool = np.flatnonzero((codigos == codigo) & livres_mercado)
+        compras[codigo] = pool[np.argsort(-horizonte[pool, 0], kind='stable')[:candidatos]]
+
+    def transferencias(estado, r, limite):
+        """As `limite` melhores trocas do estado, avaliadas da jornada r em diante"""
+        atual, banco = estado[0], estado[1]
+        plantel_arr = np.array(atual, dtype=np.intp)
+        no_plantel = np.zeros(len(df), dtype=bool)
+        no_plantel[plantel_arr] = True
+        cheio = np.bincount(codigo_clube[plantel_arr], minlength=n_clubes) >= max_por_clube
+
+        opcoes = []
+        for codigo in range(len(POSICOES)):
+            membros = plantel_arr[codigos[plantel_arr] == codigo]
+            mercado = compras[codigo][~no_plantel[compras[codigo]]]
+            if len(membros) == 0 or len(mercado) == 0:
+                continue
+            saidas = np.repeat(membros, len(mercado))
+            entradas = np.tile(mercado, len(membros))
+            validas = precos[entradas] <= banco + precos[saidas]
+            validas &= ~cheio[codigo_clube[entradas]] | (codigo_clube[entradas] == codigo_clube[saidas])
+            saidas, entradas = saidas[validas], entradas[validas]
+            if len(saidas):
+                valores = avaliar.trocas(plantel_arr, codigo, saidas, entradas)
+                opcoes.append((valores[:, r:].sum(axis=1), saidas, entradas))
+        if not opcoes:
+            return
+
+        valor, saidas, entradas = (np.concatenate(x) for x in zip(*opcoes))
+        conjunto = set(atual)
+        for k in np.argsort(-valor, kind='stable')[:limite]:
+            venda, compra = int(saidas[k]), int(entradas[k])
+            novo = tuple(sorted(conjunto - {venda} | {compra}))
+            yield novo, banco + precos[venda] - precos[compra], venda, compra, valor[k]
+
+    # estado: (plantel, banco, livres, acumulado, plano)
+    inicial = (tuple(sorted(int(i) for i in plantel)), float(orcamento), livres, 0.0, ())
+    feixe = [inicial]
+    completo = True
+
+    for r in range(jornadas):
+        candidatos_jornada = {}
+        geracao = [(estado, 0, ()) for estado in feixe]
+        for passo in range(max_por_jornada + 1):
+            for estado, feitas, movimentos in geracao:
+                livres_fim = min(max_livres, max(estado[2] - feitas, 0) + livres)
+                penalizacao = custo_extra * max(feitas - estado[2], 0)
+                chave = (estado[0], round(estado[1], 2), livres_fim)
+                acumulado = estado[3] - penalizacao
+                melhor = candidatos_jornada.get(chave)
+                if melhor is None or acumulado > melhor[3]:
+                    candidatos_jornada[chave] = (estado[0], estado[1], livres_fim, acumulado,
+                                                 estado[4] + ((movimentos, penalizacao),))
+            if passo == max_por_jornada or time.perf_counter() - inicio > tempo_limite:
+                completo = completo and passo == max_por_jornada
+                break
+
+            seguinte = {}
+            for estado, feitas, movimentos in geracao:
+                for novo, banco, venda, compra, futuro in transferencias(estado, r, largura):
+                    chave = (novo, round(banco, 2))
+                    penalizacao = custo_extra * max(feitas + 1 - estado[2], 0)
+                    valor = estado[3] - penalizacao + futuro
+                    if chave not in seguinte or valor > seguinte[chave][0]:
+                        seguinte[chave] = (valor, ((novo, banco) + estado[2:]), feitas + 1,
+                                           movimentos + ((venda, compra),))
+            melhores = sorted(seguinte.values(), key=lambda v: v[0], reverse=True)[:largura]
+            geracao = [(estado, feitas, movimentos) for _, estado, feitas, movimentos in melhores]
+
+        # Jogar a jornada r com o plantel de cada estado
+        jogados = [
+            (p, banco, livres_fim, acumulado + avaliar(p)[r], plano)
+            for p, banco, livres_fim, acumulado, plano in candidatos_jornada.values()
+        ]
+        jogados.sort(key=lambda e: e[3] + avaliar(e[0])[r + 1:].sum(), reverse=True)
+        feixe = jogados[:largura]
+        if progresso is not None:
+            progresso((r + 1) / jornadas)
+
+    base = float(avaliar(inicial[0]).sum())
+    melhor = max(feixe, key=lambda e: e[3])
+    if melhor[3] < base:
+        melhor = (inicial[0], inicial[1], livres, base, tuple(((), 0) for _ in range(jornadas)))
+
+    # Reconstruir o plano com banco, livres e pontos de cada jornada
+    plano = []
+    atual, banco, livres_atuais = inicial[0], float(orcamento), livres
+    for r, (movimentos, penalizacao) in enumerate(melhor[4]):
+        conjunto = set(atual)
+        for venda, compra in movimentos:
+            conjunto = conjunto - {venda} | {compra}
+            banco += precos[venda] - precos[compra]
+        atual = tuple(sorted(conjunto))
+        livres_atuais = min(max_livres, max(livres_atuais - len(movimentos), 0) + livres)
+        plano.append({
+            'vendas': [indices[v] for v, _ in movimentos],
+            'compras': [indices[c] for _, c in movimentos],
+            'penalizacao': float(penalizacao),
+            'pontos': float(avaliar(atual)[r]),
+            'banco': banco,
+            'livres': livres_atuais,
+        })
+
+    return {
+        'jornadas': plano,
+        'pontos': float(melhor[3]),
+        'pontos_sem_transferencias': base,
+        'completo': completo,
+    }
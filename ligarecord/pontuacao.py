@@ -0,0 +1,186 @@
+"""Motor de pontuação vetorizado com perfis de pesos configuráveis.
+
+Um perfil é um dict de pesos (ver `PERFIL_PADRAO`; chaves em falta ficam
+com o valor padrão). Os scores de vários perfis são calculados de uma vez,
+como matrizes jogadores × perfis:
+
+    bruto          = [Pontos Totais, Pontos Última Jornada, 1/(Dificuldade+1)] @ pesos
+    Score Ajustado = min-max de `bruto`, por perfil
+    Score Capitão  = capitao * Ajustado + capitao_dificuldade * facilidade
+    Score Avançado = recente * Última + avancado_dificuldade * facilidade
+                     + (1 - recente - avancado_dificuldade) * Ajustado
+
+A coluna do peso `ultima` é por omissão 'Pontos Última Jornada'; com
+histórico pode ser a forma recente ('Forma', ver `historico.escrever_forma`).
+"""
+import numpy as np
+
+PERFIL_PADRAO = {
+    # Score Ajustado (antes da normalização)
+    'total': 0.5,
+    'ultima': 0.3,
+    'dificuldade': 0.2,
+    # Score Capitão
+    'capitao': 0.7,
+    'capitao_dificuldade': 0.3,
+    # Score Avançado (transferências)
+    'recente': 0.4,
+    'avancado_dificuldade': 0.3,
+}
+
+PERFIS = {
+    'padrao': PERFIL_PADRAO,
+    'forma': {'total': 0.3, 'ultima': 0.5, 'recente': 0.5},
+    'calendario': {'dificuldade': 0.4, 'total': 0.4, 'ultima': 0.2,
+                   'capitao_dificuldade': 0.5, 'capitao': 0.5, 'avancado_dificuldade': 0.4},
+}
+
+
+def completar_perfil(perfil):
+    """Perfil com os pesos em falta preenchidos; rejeita chaves desconhecidas"""
+    desconhecidas = set(perfil) - set(PERFIL_PADRAO)
+    if desconhecidas:
+        raise ValueError(f"Pesos desconhecidos no perfil: {', '.join(sorted(desconhecidas))}")
+    return {**PERFIL_PADRAO, **perfil}
+
+
+def matrizes_pesos(perfis):
+    """Matrizes de pesos (uma coluna por perfil) para cada score"""
+    completos = [completar_perfil(p) for p in perfis]
+
+    def coluna(chave):
+        return np.array([p[chave] for p in completos], dtype=float)
+
+    return {
+        'ajustado': np.vstack([coluna('total'), coluna('ultima'), coluna('dificuldade')]),
+        'capitao': np.vstack([coluna('capitao'), coluna('capitao_dificuldade')]),
+        'avancado': np.vstack([
+            coluna('recente'),
+            coluna('avancado_dificuldade'),
+            1 - coluna('recente') - coluna('avancado_dificuldade'),
+        ]),
+    }
+
+
+_UNITARIOS = np.eye(3)
+COLUNA_RECENTE = 'Pontos Última Jornada'
+
+
+def _estatisticas(df, recente=COLUNA_RECENTE):
+    """Colunas de entrada como matriz jogadores × [total, última, facilidade]"""
+    return np.column_stack([
+        df['Pontos Totais'].to_numpy(dtype=float),
+        df[recente].to_numpy(dtype=float),
+        1 / (df['Dificuldade do Jogo'].to_numpy(dtype=float) + 1),
+    ])
+
+
+class MotorPontuacao:
+    """Scores de todos os jogadores para vários perfis, com atualização incremental.
+
+    `ajustado`, `capitao` e `avancado` são arrays (jogadores × perfis) alinhados
+    com as posições do DataFrame. `atualizar` recalcula apenas as linhas dadas;
+    só quando o mínimo ou o máximo de um perfil muda é que a normalização
+    dessa coluna é refeita para todos os jogadores.
+    """
+
+    def __init__(self, df, perfis=None, recente=COLUNA_RECENTE):
+        perfis = perfis if perfis is not None else {'padrao': PERFIL_PADRAO}
+        self.nomes = list(perfis)
+        self.recente = recente
+        self.pesos = matrizes_pesos(perfis.values())
+        self.recalcular(df)
+
+    def recalcular(self, df):
+        """Recalcula todos os scores (por exemplo quando entram jogadores novos)"""
+        self.x = _estatisticas(df, self.recente)
+        self.bruto = self.x @ self.pesos['ajustado']
+        self.minimo = np.nanmin(self.bruto, axis=0) if len(self.x) else np.zeros(len(self.nomes))
+        self.maximo = np.nanmax(self.bruto, axis=0) if len(self.x) else np.zeros(len(self.nomes))
+        self.ajustado = np.empty_like(self.bruto)
+        self.capitao = np.empty_like(self.bruto)
+        self.avancado = np.empty_like(self.bruto)
+        self._derivar(slice(None), slice(None))
+
+    def _afins(self, colunas):
+        """Cada score derivado como mapa afim das estatísticas: x @ M + c"""
+        amplitude = self.maximo[colunas] - self.minimo[colunas]
+        escala = 1 / np.where(amplitude > 0, amplitude, 1.0)
+        m_ajustado = self.pesos['ajustado'][:, colunas] * escala
+        c_ajustado = -self.minimo[colunas] * escala
+        pc, pa = self.pesos['capitao'][:, colunas], self.pesos['avancado'][:, colunas]
+        ultima, facilidade = _UNITARIOS[1][:, None], _UNITARIOS[2][:, None]
+        return [
+            (self.ajustado, m_ajustado, c_ajustado),
+            (self.capitao, m_ajustado * pc[0] + facilidade * pc[1], c_ajustado * pc[0]),
+            (self.avancado, m_ajustado * pa[2] + ultima * pa[0] + facilidade * pa[1], c_ajustado * pa[2]),
+        ]
+
+    def _derivar(self, linhas, colunas):
+        """Recalcula os scores derivados no bloco linhas × colunas.
+
+        `linhas` é um slice (todas) ou um array pequeno de posições; `colunas`
+        um slice ou um array de índices de perfis.
+        """
+        por_linha = isinstance(linhas, np.ndarray)
+        bloco = np.ix_(linhas, colunas) if por_linha else (linhas, colunas)
+        completo = not por_linha and not isinstance(colunas, np.ndarray)
+        x = self.x[linhas]
+        for destino, m, c in self._afins(colunas):
+            if completo:
+                np.matmul(x, m, out=destino)
+                destino += c
+            else:
+                valores = x @ m
+                valores += c
+                destino[bloco] = valores
+
+    def atualizar(self, df, posicoes):
+        """Relê as estatísticas das posições dadas e atualiza os scores.
+
+        Devolve as posições cujos scores mudaram: as próprias `posicoes`, ou
+        todas quando a escala de algum perfil teve de ser renormalizada.
+        """
+        posicoes = np.unique(np.asarray(posicoes, dtype=np.intp))
+        if len(posicoes) == 0:
+            return posicoes
+
+        antigo = self.bruto[posicoes]
+        self.x[posicoes] = _estatisticas(df.iloc[posicoes], self.recente)
+        novo = self.x[posicoes] @ self.pesos['ajustado']
+        self.bruto[posicoes] = novo
+
+        # Um extremo que estava numa linha alterada pode ter desaparecido
+        perdeu = (antigo == self.minimo).any(axis=0) | (antigo == self.maximo).any(axis=0)
+        minimo = np.fmin(self.minimo, np.nanmin(novo, axis=0))
+        maximo = np.fmax(self.maximo, np.nanmax(novo, axis=0))
+        if perdeu.any():
+            minimo[perdeu] = np.nanmin(self.bruto[:, perdeu], axis=0)
+            maximo[perdeu] = np.nanmax(self.bruto[:, perdeu], axis=0)
+        mudou = (minimo != self.minimo) | (maximo != self.maximo)
+        self.minimo, self.maximo = minimo, maximo
+
+        if mudou.all():
+            self._derivar(slice(None), slice(None))
+        elif mudou.any():
+            self._derivar(slice(None), np.flatnonzero(mudou))
+        if not mudou.all():
+            self._derivar(posicoes, np.flatnonzero(~mudou))
+        return np.arange(len(self.x)) if mudou.any() else posicoes
+
+    def coluna(self, perfil='padrao'):
+        """Índice da coluna do perfil nas matrizes de scores"""
+        return self.nomes.index(perfil)
+
+    def escrever(self, df, perfil='padrao'):
+        """Escreve 'Score Ajustado' e 'Score Capitão' do perfil no DataFrame"""
+        j = self.coluna(perfil)
+        df['Score Ajustado'] = self.ajustado[:, j]
+        df['Score Capitão'] = self.capitao[:, j]
+        return df
+
+
+def score_avancado(ultima, dificuldade, ajustado, perfil=PERFIL_PADRAO):
+    """Score Avançado de um só perfil, para um subconjunto de jogadores"""
+    pa = matrizes_pesos([perfil])['avancado'][:, 0]
+    return ultima * pa[0] + (1 / (dificuldade + 1)) * pa[1] + ajustado * pa[2]
@@ -0,0 +1,156 @@
+"""Simulação Monte Carlo da pontuação do capitão e do onze.
+
+Os pontos de cada jogador no próximo jogo seguem uma normal truncada em
+`PONTOS_MINIMOS`, com média e desvio ajustados por `ajustar_distribuicoes`
+e condicionados à 'Dificuldade do Jogo'. As amostras são geradas em blocos
+(memória limitada a bloco × jogadores) e, opcionalmente, repartidas por um
+conjunto de processos com sementes independentes.
+"""
+import numpy as np
+import pandas as pd
+
+AMOSTRAS = 100_000
+BLOCO = 20_000
+PONTOS_MINIMOS = -4
+# Jornadas já disputadas quando não há histórico (meio de uma época de 34)
+JORNADAS_PADRAO = 17
+# Peso (em jornadas) da média da posição na estimativa de cada jogador
+ENCOLHIMENTO = 5
+# Efeito da dificuldade em pontos, usado quando não há histórico para o estimar
+EFEITO_DIFICULDADE = {1: 1.0, 2: 0.5, 3: 0.0, 4: -0.5, 5: -1.0}
+
+
+def _efeito_padrao():
+    efeito = np.zeros(6)
+    for dificuldade, pontos in EFEITO_DIFICULDADE.items():
+        efeito[dificuldade] = pontos
+    return efeito
+
+
+def _modelo(df, historico, jornadas):
+    """Média base, variância por jogador e efeito (em pontos) de cada dificuldade"""
+    posicao = df['Posição'].to_numpy(dtype=object)
+
+    if historico is None or historico.empty:
+        media = df['Pontos Totais'].to_numpy(dtype=float) / jornadas
+        desvio2 = (df['Pontos Última Jornada'].to_numpy(dtype=float) - media) ** 2
+        variancia = pd.Series(desvio2).groupby(posicao).transform('mean').to_numpy()
+        return media, np.nan_to_num(variancia), _efeito_padrao()
+
+    pontos = historico['Pontos'].to_numpy(dtype=float)
+    media_jogador = historico.groupby('ID')['Pontos'].transform('mean').to_numpy()
+    residuo = pontos - media_jogador
+    nivel = historico['Dificuldade do Jogo'].to_numpy(dtype=np.intp).clip(1, 5)
+    contagem = np.maximum(np.bincount(nivel, minlength=6), 1)
+    efeito = np.bincount(nivel, residuo, minlength=6) / contagem
+
+    # Estatísticas por jogador já sem o efeito da dificuldade
+    limpo = pd.DataFrame({'ID': historico['ID'].to_numpy(), 'Pontos': pontos - efeito[nivel]})
+    por_jogador = limpo.groupby('ID')['Pontos'].agg(['count', 'mean', 'var'])
+    estat = por_jogador.reindex(df['ID'].to_numpy())
+    n = estat['count'].fillna(0).to_numpy()
+    media_obs = estat['mean'].fillna(0).to_numpy()
+    var_obs = estat['var'].fillna(0).to_numpy()
+
+    pos_hist = pd.Series(posicao, index=df['ID'].to_numpy()).reindex(limpo['ID']).to_numpy()
+    por_posicao = limpo.groupby(pos_hist)['Pontos'].agg(['mean', 'var'])
+    media_pos = por_posicao['mean'].reindex(posicao).fillna(limpo['Pontos'].mean()).to_numpy()
+    var_pos = por_posicao['var'].reindex(posicao).fillna(limpo['Pontos'].var()).to_numpy()
+
+    peso = n / (n + ENCOLHIMENTO)
+    media = peso * media_obs + (1 - peso) * media_pos
+    variancia = peso * var_obs + (1 - peso) * var_pos
+    return media, np.nan_to_num(variancia), efeito
+
+
+def ajustar_distribuicoes(df, historico=None, jornadas=JORNADAS_PADRAO):
+    """Média e desvio dos pontos de cada jogador no próximo jogo.
+
+    Com `historico` (colunas 'ID', 'Pontos' e 'Dificuldade do Jogo', uma linha
+    por jogador e jornada) o efeito de cada nível de dificuldade é estimado
+    dos resíduos face à média de cada jogador, e a média e a variância de
+    cada jogador são encolhidas para as da sua posição. Sem histórico usa-se
+    Pontos Totais / `jornadas` como média e a dispersão da última jornada em
+    torno dela, agregada por posição, como variância.
+
+    Devolve dois arrays alinhados com as linhas de `df`.
+    """
+    media, variancia, efeito = _modelo(df, historico, jornadas)
+    dificuldade = df['Dificuldade do Jogo'].to_numpy(dtype=np.intp).clip(1, 5)
+    return media + efeito[dificuldade], np.sqrt(variancia)
+
+
+def pontos_esperados(df, dificuldades, historico=None, jornadas=JORNADAS_PADRAO):
+    """Pontos esperados por jogador e jornada (jogadores × jornadas).
+
+    `dificuldades` é um array inteiro jogadores × jornadas com a dificuldade
+    de cada jogo; o modelo é o mesmo de `ajustar_distribuicoes`.
+    """
+    media, _, efeito = _modelo(df, historico, jornadas)
+    return media[:, None] + efeito[np.asarray(dificuldades, dtype=np.intp).clip(1, 5)]
+
+
+def _simular_blocos(media, desvio, amostras, bloco, semente, progresso=None):
+    """Acumuladores de `amostras` sorteios, gerados bloco a bloco"""
+    rng = np.random.default_rng(semente)
+    k = len(media)
+    soma = np.zeros(k)
+    soma2 = np.zeros(k)
+    vezes_melhor = np.zeros(k, dtype=np.int64)
+
+    feitas = 0
+    while feitas < amostras:
+        m = min(bloco, amostras - feitas)
+        pontos = rng.standard_normal((m, k))
+        pontos *= desvio
+        pontos += media
+        np.maximum(pontos, PONTOS_MINIMOS, out=pontos)
+
+        soma += pontos.sum(axis=0)
+        soma2 += np.einsum('ij,ij->j', pontos, pontos)
+        vezes_melhor += np.bincount(pontos.argmax(axis=1), minlength=k)
+        feitas += m
+        if progresso is not None:
+            progresso(feitas / amostras)
+
+    return soma, soma2, vezes_melhor
+
+
+def simular_capitao(media, desvio, amostras=AMOSTRAS, bloco=BLOCO, semente=None, processos=1,
+                    progresso=None):
+    """Simula os pontos do onze e avalia cada escolha de capitão.
+
+    `media` e `desvio` descrevem os k titulares. Devolve um dict com, por
+    jogador, 'esperado' (pontos esperados como capitão, i.e. a dobrar),
+    'variancia' (dos pontos como capitão), 'prob_otimo' (fração dos sorteios
+    em que foi o melhor do onze) e 'equipa_esperada' / 'equipa_desvio' (total
+    do onze com esse jogador como capitão; os jogadores são independentes).
+    `progresso`, se dado, é chamado com a fração de sorteios feita após cada
+    bloco (só no modo de um processo).
+    """
+    media = np.asarray(media, dtype=float)
+    desvio = np.asarray(desvio, dtype=float)
+    sementes = np.random.SeedSequence(semente).spawn(max(1, processos))
+    partes = np.diff(np.linspace(0, amostras, len(sementes) + 1).astype(np.int64))
+
+    if processos > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            resultados = list(executor.map(
+                _simular_blocos,
+                [media] * processos, [desvio] * processos, partes, [bloco] * processos, sementes,
+            ))
+    else:
+        resultados = [_simular_blocos(media, desvio, amostras, bloco, sementes[0], progresso)]
+
+    soma, soma2, vezes_melhor = (sum(r[i] for r in resultados) for i in range(3))
+    esperado = soma / amostras
+    variancia = np.maximum(soma2 / amostras - esperado ** 2, 0.0)
+
+    return {
+        'esperado': 2 * esperado,
+        'variancia': 4 * variancia,
+        'prob_otimo': vezes_melhor / amostras,
+        'equipa_esperada': esperado.sum() + esperado,
+        'equipa_desvio': np.sqrt(variancia.sum() + 3 * variancia),
+    }
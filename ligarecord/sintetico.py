@@ -0,0 +1,99 @@
+"""Ligas sintéticas com as colunas de jogadores.xlsx, para benchmarks.
+
+Cada jogador tem uma qualidade latente da qual derivam os pontos e o preço
+(com as mesmas escalas do ficheiro real: preços a partir de 0,5 M€ em
+passos de 50 mil, pontos totais negativos para quem quase não joga). Os
+clubes jogam aos pares na próxima jornada e a dificuldade do jogo vem da
+força do adversário. O plantel atual tem 15 jogadores (quotas de
+`QUOTAS_PLANTEL`, no máximo 3 por clube), 11 titulares num 4-4-2.
+"""
+import numpy as np
+import pandas as pd
+
+from .otimizador import QUOTAS_PLANTEL
+from .pontuacao import MotorPontuacao
+
+CLUBES = ['AVS', 'Arouca', 'Benfica', 'Boavista', 'Casa Pia', 'E. Amadora', 'Estoril', 'FC Porto',
+          'Famalicão', 'Farense', 'Gil Vicente', 'Moreirense', 'Nacional', 'Rio Ave', 'Santa Clara',
+          'Sp. Braga', 'Sporting', 'V. Guimarães']
+PROPORCAO_POSICOES = {'Goleiro': 0.11, 'Defesa': 0.35, 'Médio': 0.26, 'Avançado': 0.28}
+TITULARES_442 = {'Goleiro': 1, 'Defesa': 4, 'Médio': 4, 'Avançado': 2}
+COLUNAS_EXCEL = ['Nome', 'Equipa', 'Posição', 'Preço', 'Pontos Última Jornada', 'Pontos Totais',
+                 'Titular', 'Suplente', 'Reserva', 'Próximo Adversário', 'Dificuldade do Jogo',
+                 'Lesionado', 'Expulso', 'Score Ajustado', 'Score Capitão']
+PRECO_MINIMO = 500_000
+PASSO_PRECO = 50_000
+
+
+def _jornada(rng):
+    """Adversário e dificuldade (1 = fácil) de cada clube na próxima jornada"""
+    forca = rng.permutation(len(CLUBES))
+    ordem = rng.permutation(len(CLUBES))
+    adversario = np.empty(len(CLUBES), dtype=np.intp)
+    metade = len(CLUBES) // 2
+    adversario[ordem[:metade]] = ordem[metade:]
+    adversario[ordem[metade:]] = ordem[:metade]
+    dificuldade = 1 + forca[adversario] * 5 // len(CLUBES)
+    return adversario, dificuldade
+
+
+def _plantel(rng, posicoes, clubes, lesionado):
+    """Linhas do plantel (15 jogadores, no máximo 3 por clube) e os 11 titulares"""
+    por_clube = np.zeros(len(CLUBES), dtype=int)
+    plantel, titulares = [], []
+    for posicao, quantidade in QUOTAS_PLANTEL.items():
+        candidatos = rng.permutation(np.flatnonzero((posicoes == posicao) & ~lesionado))
+        escolhidos = []
+        for linha in candidatos:
+            if por_clube[clubes[linha]] < 3:
+                escolhidos.append(linha)
+                por_clube[clubes[linha]] += 1
+                if len(escolhidos) == quantidade:
+                    break
+        plantel.extend(escolhidos)
+        titulares.extend(escolhidos[:TITULARES_442[posicao]])
+    return np.array(plantel, dtype=np.intp), np.array(titulares, dtype=np.intp)
+
+
+def gerar_liga(n, semente=0):
+    """DataFrame de `n` jogadores com as colunas de jogadores.xlsx (sem 'ID').
+
+    Os scores vêm do perfil padrão, como no ficheiro exportado pela
+    aplicação; `armazenamento.sanitizar` acrescenta o ID ao importar.
+    """
+    rng = np.random.default_rng(semente)
+    posicoes = rng.choice(list(PROPORCAO_POSICOES), size=n, p=list(PROPORCAO_POSICOES.values()))
+    clubes = rng.integers(0, len(CLUBES), size=n)
+    qualidade = rng.gamma(1.2, 1.0, size=n)
+    adversario, dificuldade = _jornada(rng)
+    lesionado = rng.random(n) < 0.05
+
+    precos = PRECO_MINIMO + np.round(qualidade ** 2 * 300_000 / PASSO_PRECO) * PASSO_PRECO
+    totais = np.maximum(np.round(qualidade * 20 - 10 + rng.normal(0, 8, n)), -25)
+    ultima = np.clip(np.round(qualidade * 1.5 - 1 + rng.normal(0, 2, n)), -4, 20)
+    nomes_clubes = np.array(CLUBES, dtype=object)
+
+    df = pd.DataFrame({
+        'Nome': [f"Jogador {i}" for i in range(n)],
+        'Equipa': nomes_clubes[clubes],
+        'Posição': posicoes,
+        'Preço': np.minimum(precos, 9_000_000).astype(np.int64),
+        'Pontos Última Jornada': ultima.astype(np.int64),
+        'Pontos Totais': totais.astype(np.int64),
+        'Titular': False,
+        'Suplente': False,
+        'Reserva': False,
+        'Próximo Adversário': nomes_clubes[adversario[clubes]],
+        'Dificuldade do Jogo': dificuldade[clubes].astype(np.int64),
+        'Lesionado': lesionado,
+        'Expulso': rng.random(n) < 0.01,
+    })
+
+    plantel, titulares = _plantel(rng, posicoes, clubes, lesionado)
+    suplentes = np.setdiff1d(plantel, titulares)
+    df.loc[titulares, 'Titular'] = True
+    df.loc[suplentes[:2], 'Suplente'] = True
+    df.loc[suplentes[2:], 'Reserva'] = True
+
+    MotorPontuacao(df).escrever(df)
+    return df[COLUNAS_EXCEL]
@@ -0,0 +1,135 @@
+"""Agendador de tarefas em segundo plano para a interface gráfica.
+
+As tarefas correm num conjunto de threads e os resultados voltam por uma
+fila que é esvaziada na thread da interface, através da função `apos`
+(tipicamente `root.after`), pelo que os callbacks podem mexer nos widgets.
+Cada tarefa pertence a um canal (uma aba, por exemplo): submeter uma nova
+tarefa num canal torna obsoleta a anterior, que é cancelada se ainda não
+começou e cujo resultado é descartado se já estiver a correr.
+"""
+import inspect
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+INTERVALO_MS = 50
+
+
+class TarefaCancelada(Exception):
+    """Lançada pelo callback de progresso quando a tarefa ficou obsoleta"""
+
+
+class Agendador:
+    """Conjunto de threads com fila de resultados consultada via `apos(ms, funcao)`"""
+
+    def __init__(self, apos, trabalhadores=2, intervalo_ms=INTERVALO_MS):
+        self.apos = apos
+        self.intervalo_ms = intervalo_ms
+        self.executor = ThreadPoolExecutor(max_workers=trabalhadores, thread_name_prefix='ligarecord')
+        self.resultados = queue.Queue()
+        self.geracao = {}
+        self.futuros = {}
+        self.callbacks = {}
+        self.trava = threading.Lock()
+        self.a_sondar = False
+
+    def submeter(self, canal, funcao, *args, ao_terminar=None, ao_falhar=None, ao_progredir=None, **kwargs):
+        """Corre `funcao(*args, **kwargs)` em segundo plano e devolve a geração da tarefa.
+
+        Se `funcao` aceitar um argumento `progresso`, recebe um callback que
+        aceita uma fração entre 0 e 1 (entregue a `ao_progredir` na thread da
+        interface) e que lança TarefaCancelada quando a tarefa fica obsoleta.
+        """
+        with self.trava:
+            geracao = self.geracao.get(canal, 0) + 1
+            self.geracao[canal] = geracao
+        anterior = self.futuros.get(canal)
+        if anterior is not None:
+            anterior.cancel()
+        self.callbacks[canal] = (geracao, ao_terminar, ao_falhar, ao_progredir)
+
+        if 'progresso' in inspect.signature(funcao).parameters:
+            kwargs['progresso'] = lambda fracao: self._progresso(canal, geracao, fracao)
+
+        futuro = self.executor.submit(funcao, *args, **kwargs)
+        futuro.add_done_callback(lambda f: self._concluida(canal, geracao, f))
+        self.futuros[canal] = futuro
+        self._sondar_em_breve()
+        return geracao
+
+    def cancelar(self, canal):
+        """Torna obsoleta a tarefa do canal (sem submeter outra)"""
+        with self.trava:
+            self.geracao[canal] = self.geracao.get(canal, 0) + 1
+        futuro = self.futuros.pop(canal, None)
+        if futuro is not None:
+            futuro.cancel()
+        self.callbacks.pop(canal, None)
+
+    def ocupado(self, canal):
+        futuro = self.futuros.get(canal)
+        return futuro is not None and not futuro.done()
+
+    def obsoleta(self, canal, geracao):
+        with self.trava:
+            return self.geracao.get(canal) != geracao
+
+    def encerrar(self):
+        """Torna obsoletas todas as tarefas e fecha as threads sem esperar por elas.
+
+        As threads ainda são esperadas à saída do processo: as tarefas longas
+        devem aceitar `progresso` para pararem na chamada seguinte.
+        """
+        for canal in list(self.futuros):
+            self.cancelar(canal)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # ---------- Internos (threads de trabalho) ----------
+    def _progresso(self, canal, geracao, fracao):
+        if self.obsoleta(canal, geracao):
+            raise TarefaCancelada(canal)
+        self.resultados.put(('progresso', canal, geracao, fracao))
+
+    def _concluida(self, canal, geracao, futuro):
+        if futuro.cancelled():
+            return
+        erro = futuro.exception()
+        if erro is None:
+            self.resultados.put(('resultado', canal, geracao, futuro.result()))
+        elif not isinstance(erro, TarefaCancelada):
+            self.resultados.put(('erro', canal, geracao, erro))
+
+    # ---------- Internos (thread da interface) ----------
+    def _sondar_em_breve(self):
+        if not self.a_sondar:
+            self.a_sondar = True
+            self.apos(self.intervalo_ms, self.sondar)
+
+    def sondar(self):
+        """Entrega os resultados pendentes aos callbacks dos canais ainda atuais"""
+        self.a_sondar = False
+        while True:
+            try:
+                tipo, canal, geracao, valor = self.resultados.get_nowait()
+            except queue.Empty:
+                break
+            atual = self.callbacks.get(canal)
+            if atual is None or atual[0] != geracao:
+                continue
+            _, ao_terminar, ao_falhar, ao_progredir = atual
+            if tipo == 'progresso':
+                if ao_progredir is not None:
+                    ao_progredir(valor)
+                continue
+            del self.callbacks[canal]
+            self.futuros.pop(canal, None)
+            if tipo == 'resultado' and ao_terminar is not None:
+                ao_terminar(valor)
+            elif tipo == 'erro':
+                if ao_falhar is None:
+                    raise valor
+                ao_falhar(valor)
+
+        # Só as tarefas atuais têm callbacks, e todas acabam com resultado ou erro
+        if self.callbacks:
+            self._sondar_em_breve()
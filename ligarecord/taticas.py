@@ -0,0 +1,69 @@
+import numpy as np
+
+POSICOES = ['Goleiro', 'Defesa', 'Médio', 'Avançado']
+
+FORMACOES = {
+    "4-4-2": {'Goleiro':1, 'Defesa':4, 'Médio':4, 'Avançado':2},
+    "4-3-3": {'Goleiro':1, 'Defesa':4, 'Médio':3, 'Avançado':3},
+    "3-5-2": {'Goleiro':1, 'Defesa':3, 'Médio':5, 'Avançado':2},
+    "3-4-3": {'Goleiro':1, 'Defesa':3, 'Médio':4, 'Avançado':3},
+    "4-5-1": {'Goleiro':1, 'Defesa':4, 'Médio':5, 'Avançado':1},
+    "5-3-2": {'Goleiro':1, 'Defesa':5, 'Médio':3, 'Avançado':2}
+}
+
+
+def todas_formacoes():
+    """Todas as divisões D-M-A dos 10 jogadores de campo (mínimo 1 por linha),
+    começando pelas formações clássicas."""
+    outras = [f"{d}-{m}-{10 - d - m}" for d in range(1, 9) for m in range(1, 10 - d)]
+    return list(FORMACOES) + [f for f in outras if f not in FORMACOES]
+
+
+def quotas_formacao(formacao):
+    """Converte 'D-M-A' nas quotas por posição do onze."""
+    if formacao in FORMACOES:
+        return FORMACOES[formacao]
+    try:
+        defesas, medios, avancados = (int(parte) for parte in formacao.split('-'))
+    except ValueError:
+        raise ValueError(f"Formação inválida: {formacao}")
+    if min(defesas, medios, avancados) < 1 or defesas + medios + avancados != 10:
+        raise ValueError(f"Formação inválida: {formacao}")
+    return {'Goleiro': 1, 'Defesa': defesas, 'Médio': medios, 'Avançado': avancados}
+
+
+def somas_prefixo(df, coluna='Score Ajustado'):
+    """Ordena os jogadores uma única vez e devolve, por posição, as somas
+    acumuladas dos scores por ordem decrescente (índice k = melhores k)."""
+    codigos = np.full(len(df), len(POSICOES))
+    for codigo, pos in enumerate(POSICOES):
+        codigos[df['Posição'].to_numpy() == pos] = codigo
+    scores = df[coluna].to_numpy(dtype=float)
+    ordem = np.lexsort((-scores, codigos))
+    limites = np.searchsorted(codigos[ordem], np.arange(len(POSICOES) + 1))
+    scores = scores[ordem]
+
+    return {
+        pos: np.concatenate(([0.0], np.cumsum(scores[limites[codigo]:limites[codigo + 1]])))
+        for codigo, pos in enumerate(POSICOES)
+    }
+
+
+def ranking_formacoes(prefixos, formacoes):
+    """Pontuação de cada formação com uma consulta O(1) por posição.
+
+    Formações que o plantel não consegue preencher ficam de fora. Devolve
+    [(formação, total)] por ordem decrescente de pontuação.
+    """
+    quotas = np.array([[quotas_formacao(f)[pos] for pos in POSICOES] for f in formacoes], dtype=np.intp)
+    if len(quotas) == 0:
+        return []
+    disponiveis = np.array([len(prefixos[pos]) - 1 for pos in POSICOES])
+    validas = (quotas <= disponiveis).all(axis=1)
+
+    totais = np.zeros(len(formacoes))
+    for coluna, pos in enumerate(POSICOES):
+        totais += prefixos[pos][np.minimum(quotas[:, coluna], disponiveis[coluna])]
+
+    ordem = np.argsort(-totais, kind='stable')
+    return [(formacoes[i], totais[i]) for i in ordem if validas[i]]
@@ -1,9 +1,30 @@
+import os
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog, simpledialog
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
-import os
+
+from ligarecord import motor, perf
+from ligarecord.armazenamento import DiarioAlteracoes, carregar_jogadores, exportar_excel
+from ligarecord.equipas import (CODIGOS_STATUS, Equipas, PoolJogadores, caminho_equipas, carregar_equipas,
+                                guardar_equipas)
+from ligarecord.historico import HistoricoJornadas, caminho_historico, escrever_forma
+from ligarecord.memoizacao import CacheResultados, caminho_resultados
+from ligarecord.mercado import melhores_trocas, melhorias_por_euro
+from ligarecord.perf import medir
+from ligarecord.pesquisa import IndiceNomes
+from ligarecord.planeamento import carregar_calendario, planear_transferencias
+from ligarecord.pontuacao import MotorPontuacao
+from ligarecord.taticas import todas_formacoes
+from ligarecord.tarefas import Agendador
+from tabela_virtual import TabelaVirtual
+
+STATUS = ['Não Utilizado', 'Titular', 'Suplente', 'Reserva']
+ATRASO_FILTRO_MS = 200
+ATUALIZAR_PERF_MS = 1000
+# Equipa das colunas de estado do Excel; as outras ficam em caminho_equipas(Excel)
+EQUIPA_PRINCIPAL = "Plantel do Excel"
 
 class LigaRecordApp:
     def __init__(self, root):
@@ -14,45 +35,80 @@ class LigaRecordApp:
         self.style.configure("Treeview", rowheight=30)
         
         self.caminho_excel = "jogadores.xlsx"
+        self.agendador = Agendador(self.root.after)
+        # Resultados das consultas por impressão digital dos dados, também entre sessões
+        self.resultados = CacheResultados(pasta=caminho_resultados(self.caminho_excel))
+        self.barras = {}
+        # Dificuldades das próximas jornadas para o plano (ver escolher_calendario)
+        self.calendario = None
         self.carregar_dados()
         self.criar_gui()
+        self.root.protocol("WM_DELETE_WINDOW", self.fechar)
+    
+    def fechar(self):
+        self.agendador.encerrar()
+        self.root.destroy()
     
     # ==================== [Funções de Dados] ====================
+    @medir()
     def carregar_dados(self):
-        """Carrega e sanitiza os dados do Excel"""
+        """Carrega os dados (da cache colunar, ou do Excel se mudou)"""
         try:
-            if not os.path.exists(self.caminho_excel):
-                raise FileNotFoundError("Arquivo jogadores.xlsx não encontrado!")
-            
-            self.df = pd.read_excel(self.caminho_excel)
-            
-            colunas_necessarias = ['Nome', 'Posição', 'Titular', 'Suplente', 'Reserva',
-                                   'Pontos Totais', 'Pontos Última Jornada', 'Dificuldade do Jogo',
-                                   'Preço', 'Lesionado', 'Expulso', 'Próximo Adversário']
-            for col in colunas_necessarias:
-                if col not in self.df.columns:
-                    self.df[col] = False if col in ['Titular', 'Suplente', 'Reserva', 'Lesionado', 'Expulso'] else 0
-            
-            for col in ['Titular', 'Suplente', 'Reserva', 'Lesionado', 'Expulso']:
-                self.df[col] = self.df[col].astype(bool)
-            
+            self.df = carregar_jogadores(self.caminho_excel)
+            self.indice_id = pd.Index(self.df['ID'])
+            self.diario = DiarioAlteracoes(self.caminho_excel)
+            self.vistas_sujas = set()
+            self.indice_mercado = None
+            self.versao_plantel = 0
+            self.historico = HistoricoJornadas(caminho_historico(self.caminho_excel)).ler()
             self.calcular_metricas()
+            self.preparar_colunas_filtro()
+            self.carregar_equipas()
             
         except Exception as e:
             messagebox.showerror("Erro Fatal", f"{str(e)}")
             self.root.destroy()
     
+    @medir()
     def calcular_metricas(self):
-        """Calcula scores e normaliza dados"""
-        self.df['Score Ajustado'] = (
-            self.df['Pontos Totais'] * 0.5 + 
-            self.df['Pontos Última Jornada'] * 0.3 + 
-            1/(self.df['Dificuldade do Jogo'] + 1) * 0.2
-        )
-        
-        scaler = MinMaxScaler()
-        self.df['Score Ajustado'] = scaler.fit_transform(self.df[['Score Ajustado']])
-        self.df['Score Capitão'] = self.df['Score Ajustado'] * 0.7 + (1/(self.df['Dificuldade do Jogo']+1)) * 0.3
+        """Calcula scores e normaliza dados (mantém o motor para atualizações incrementais)"""
+        if self.historico.empty:
+            self.pontuacao = MotorPontuacao(self.df)
+        else:
+            # Com histórico por jornada o peso da última jornada passa para a forma recente
+            escrever_forma(self.df, self.historico)
+            self.pontuacao = MotorPontuacao(self.df, recente='Forma')
+        self.pontuacao.escrever(self.df)
+
+    @medir()
+    def preparar_colunas_filtro(self):
+        """Colunas pré-calculadas (uma vez) para a tabela virtual e os filtros"""
+        self.nomes = self.df['Nome'].to_numpy(dtype=object)
+        self.indice_nomes = IndiceNomes(self.df['ID'].to_numpy(), self.nomes)
+        self.posicoes = self.df['Posição'].to_numpy(dtype=object)
+        self.codigo_status = np.select(
+            [self.df['Titular'], self.df['Suplente'], self.df['Reserva']], [1, 2, 3], 0
+        ).astype(np.int8)
+
+    def carregar_equipas(self):
+        """Equipas sobre a mesma liga, uma linha de `Equipas.estados` cada; começa na principal"""
+        pool = PoolJogadores(self.df)
+        self.equipas = Equipas(pool)
+        self.equipas.adicionar_dataframe(EQUIPA_PRINCIPAL, self.df)
+        self.equipa_ativa = EQUIPA_PRINCIPAL
+        self.equipas_sujas = False
+        caminho = caminho_equipas(self.caminho_excel)
+        if os.path.exists(caminho):
+            try:
+                carregar_equipas(caminho, pool, self.equipas)
+            except (OSError, ValueError, KeyError) as e:
+                # Melhor só a principal do que parte do ficheiro
+                messagebox.showwarning("Equipas", f"Não foi possível ler {caminho}:\n{e}")
+                self.equipas = Equipas(pool)
+                self.equipas.adicionar_dataframe(EQUIPA_PRINCIPAL, self.df)
+
+    def estado_principal(self):
+        return self.equipas.estados[self.equipas.linha(EQUIPA_PRINCIPAL)]
 
     # ==================== [Interface Gráfica] ====================
     def criar_gui(self):
@@ -80,6 +136,11 @@ class LigaRecordApp:
         self.criar_aba_capitao()
         self.criar_aba_transferencias()
 
+        # Painel escondido com as últimas medições (ver ligarecord.perf)
+        self.janela_perf = None
+        self.perf_pendente = None
+        self.root.bind("<Control-P>", self.mostrar_perf)
+
     # ==================== [Aba Seleção de Equipa] ====================
     def criar_aba_selecao(self):
         """Cria a interface de seleção de jogadores"""
@@ -93,32 +154,35 @@ class LigaRecordApp:
         ttk.Label(frame_filtros, text="Filtrar por Nome:").grid(row=0, column=0, padx=5)
         self.filtro_nome = ttk.Entry(frame_filtros)
         self.filtro_nome.grid(row=0, column=1, padx=5)
+        self.filtro_nome.bind("<KeyRelease>", self.agendar_filtros)
+        self.filtro_pendente = None
         
         ttk.Label(frame_filtros, text="Posição:").grid(row=0, column=2, padx=5)
         self.filtro_posicao = ttk.Combobox(frame_filtros, values=["", "Goleiro", "Defesa", "Médio", "Avançado"], state="readonly")
         self.filtro_posicao.grid(row=0, column=3, padx=5)
+        self.filtro_posicao.bind("<<ComboboxSelected>>", lambda e: self.aplicar_filtros())
         
         ttk.Label(frame_filtros, text="Status:").grid(row=0, column=4, padx=5)
         self.filtro_status = ttk.Combobox(frame_filtros, values=["", "Titular", "Suplente", "Reserva"], state="readonly")
         self.filtro_status.grid(row=0, column=5, padx=5)
+        self.filtro_status.bind("<<ComboboxSelected>>", lambda e: self.aplicar_filtros())
         
         ttk.Button(frame_filtros, text="Aplicar Filtros", command=self.aplicar_filtros).grid(row=0, column=6, padx=5)
+        
+        ttk.Label(frame_filtros, text="Equipa:").grid(row=0, column=7, padx=5)
+        self.combo_equipa = ttk.Combobox(frame_filtros, values=self.equipas.nomes, state="readonly")
+        self.combo_equipa.set(self.equipa_ativa)
+        self.combo_equipa.grid(row=0, column=8, padx=5)
+        self.combo_equipa.bind("<<ComboboxSelected>>", self.trocar_equipa)
+        ttk.Button(frame_filtros, text="Nova Equipa", command=self.nova_equipa).grid(row=0, column=9, padx=5)
 
         # Tabela de jogadores
         frame_tabela = ttk.Frame(frame_principal)
         frame_tabela.pack(fill='both', expand=True)
         
         colunas = ('Nome', 'Posição', 'Status')
-        self.treeview = ttk.Treeview(frame_tabela, columns=colunas, show='headings', height=15)
-        
-        for col in colunas:
-            self.treeview.heading(col, text=col)
-            self.treeview.column(col, anchor='center', width=200)
-        
-        scrollbar = ttk.Scrollbar(frame_tabela, orient='vertical', command=self.treeview.yview)
-        scrollbar.pack(side='right', fill='y')
-        self.treeview.configure(yscrollcommand=scrollbar.set)
-        self.treeview.pack(side='left', fill='both', expand=True)
+        self.tabela_jogadores = TabelaVirtual(frame_tabela, colunas, self.valores_linha)
+        self.treeview = self.tabela_jogadores.treeview
         
         self.preencher_tabela()
         
@@ -129,15 +193,19 @@ class LigaRecordApp:
         
         self.treeview.bind("<Button-3>", self.mostrar_menu_contexto)
         
-        # Botão de salvar
-        ttk.Button(frame_principal, text="Salvar Alterações", command=self.salvar_alteracoes).pack(pady=10)
+        # Botões de salvar e exportar
+        frame_botoes = ttk.Frame(frame_principal)
+        frame_botoes.pack(pady=10)
+        ttk.Button(frame_botoes, text="Salvar Alterações", command=self.salvar_alteracoes).pack(side=tk.LEFT, padx=5)
+        ttk.Button(frame_botoes, text="Exportar Excel", command=self.exportar_excel).pack(side=tk.LEFT, padx=5)
+        self.criar_barra(frame_botoes, 'exportar').pack(side=tk.LEFT, padx=5)
 
+    @medir()
     def preencher_tabela(self):
-        for item in self.treeview.get_children():
-            self.treeview.delete(item)
-        for idx, row in self.df.iterrows():
-            status = 'Titular' if row['Titular'] else 'Suplente' if row['Suplente'] else 'Reserva' if row['Reserva'] else 'Não Utilizado'
-            self.treeview.insert('', 'end', iid=f"{row['Nome']}_{idx}", values=(row['Nome'], row['Posição'], status))
+        self.tabela_jogadores.definir_linhas(np.arange(len(self.df)))
+
+    def valores_linha(self, posicao):
+        return (self.nomes[posicao], self.posicoes[posicao], STATUS[self.codigo_status[posicao]])
 
     def mostrar_menu_contexto(self, event):
         item = self.treeview.identify_row(event.y)
@@ -146,39 +214,227 @@ class LigaRecordApp:
             self.menu_contexto.post(event.x_root, event.y_root)
 
     def mudar_status(self, novo_status):
+        """Altera o status do jogador selecionado (procura pelo ID, não pelo nome)"""
         item = self.treeview.selection()[0]
-        valores = list(self.treeview.item(item, 'values'))
-        valores[2] = novo_status
-        self.treeview.item(item, values=valores)
-        nome = valores[0]
-        mask = self.df['Nome'] == nome
-        self.df.loc[mask, 'Titular'] = (novo_status == 'Titular')
-        self.df.loc[mask, 'Suplente'] = (novo_status == 'Suplente')
-        self.df.loc[mask, 'Reserva'] = (novo_status == 'Reserva')
+        posicao = self.tabela_jogadores.posicao_do_item(item)
+        status_anterior = STATUS[self.codigo_status[posicao]]
+        self.codigo_status[posicao] = STATUS.index(novo_status)
+        self.equipas.estados[self.equipas.linha(self.equipa_ativa), posicao] = STATUS.index(novo_status)
+        self.tabela_jogadores.atualizar()
+        
+        linha = self.df.index[posicao]
+        novos = {
+            'Titular': novo_status == 'Titular',
+            'Suplente': novo_status == 'Suplente',
+            'Reserva': novo_status == 'Reserva',
+        }
+        self.df.loc[linha, list(novos)] = list(novos.values())
+        # Só a equipa principal vai para o diário (e para o Excel); as outras para o JSON das equipas
+        if self.equipa_ativa == EQUIPA_PRINCIPAL:
+            self.diario.registar(self.df['ID'].iat[posicao], novos)
+        else:
+            self.equipas_sujas = True
+        
+        # O plantel mudou: só o capitão depende exclusivamente dos titulares
+        self.vistas_sujas.update({'equipa', 'taticas'})
+        if 'Titular' in (status_anterior, novo_status):
+            self.vistas_sujas.add('capitao')
+        # Os candidatos do mercado excluem o plantel: o índice é refeito quando for preciso
+        self.indice_mercado = None
+        self.versao_plantel += 1
+
+    def trocar_equipa(self, _evento=None):
+        """Mostra o plantel da equipa escolhida; as consultas passam a ser sobre ele"""
+        nome = self.combo_equipa.get()
+        if nome == self.equipa_ativa:
+            return
+        self.equipa_ativa = nome
+        self.codigo_status = self.equipas.estados[self.equipas.linha(nome)].copy()
+        for coluna, codigo in CODIGOS_STATUS.items():
+            self.df[coluna] = self.codigo_status == codigo
+        self.aplicar_filtros()
+        
+        self.vistas_sujas.update({'equipa', 'taticas', 'capitao'})
+        self.indice_mercado = None
+        self.versao_plantel += 1
+        self.atualizar_vistas()
+
+    def nova_equipa(self):
+        """Cria uma equipa vazia e passa a editá-la"""
+        nome = simpledialog.askstring("Nova Equipa", "Nome da equipa:", parent=self.root)
+        if not nome or not nome.strip():
+            return
+        nome = nome.strip()
+        if nome in self.equipas.nomes:
+            messagebox.showerror("Erro", f"Já existe uma equipa chamada {nome}!")
+            return
+        self.equipas.adicionar(nome)
+        self.equipas_sujas = True
+        self.combo_equipa.config(values=self.equipas.nomes)
+        self.combo_equipa.set(nome)
+        self.trocar_equipa()
 
+    def agendar_filtros(self, _evento=None):
+        """Filtra enquanto o utilizador escreve, com debounce"""
+        if self.filtro_pendente is not None:
+            self.root.after_cancel(self.filtro_pendente)
+        self.filtro_pendente = self.root.after(ATRASO_FILTRO_MS, self.aplicar_filtros)
+
+    @medir()
     def aplicar_filtros(self):
-        nome = self.filtro_nome.get().lower()
+        """Filtra com uma máscara NumPy sobre as colunas pré-calculadas"""
+        self.filtro_pendente = None
+        nome = self.filtro_nome.get().strip()
         posicao = self.filtro_posicao.get()
         status = self.filtro_status.get()
         
-        for item in self.treeview.get_children():
-            self.treeview.delete(item)
-            
-        for idx, row in self.df.iterrows():
-            jogador_status = 'Titular' if row['Titular'] else 'Suplente' if row['Suplente'] else 'Reserva' if row['Reserva'] else 'Não Utilizado'
-            if (nome in row['Nome'].lower() or not nome) and (posicao == row['Posição'] or not posicao) and (status == jogador_status or not status):
-                self.treeview.insert('', 'end', iid=f"{row['Nome']}_{idx}", values=(row['Nome'], row['Posição'], jogador_status))
+        mascara = np.ones(len(self.df), dtype=bool)
+        if nome:
+            encontrados = np.zeros(len(self.df), dtype=bool)
+            encontrados[self.indice_id.get_indexer(self.indice_nomes.procurar(nome))] = True
+            mascara &= encontrados
+        if posicao:
+            mascara &= self.posicoes == posicao
+        if status:
+            mascara &= self.codigo_status == STATUS.index(status)
+        self.tabela_jogadores.definir_linhas(np.flatnonzero(mascara))
 
     def salvar_alteracoes(self):
+        """Grava no diário apenas as linhas alteradas e atualiza as vistas afetadas"""
+        if self.agendador.ocupado('exportar'):
+            # A exportação apaga o diário ao terminar: o que fosse gravado agora perdia-se
+            messagebox.showinfo("Salvar", "Aguarde o fim da exportação para salvar as alterações.")
+            return
         try:
-            self.df.to_excel(self.caminho_excel, index=False)
+            self.diario.gravar()
+            if self.equipas_sujas:
+                outras = [nome for nome in self.equipas.nomes if nome != EQUIPA_PRINCIPAL]
+                guardar_equipas(self.equipas, caminho_equipas(self.caminho_excel), outras)
+                self.equipas_sujas = False
             messagebox.showinfo("Sucesso", "Alterações salvas com sucesso!")
-            self.preencher_tabela()
+            self.atualizar_vistas()
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao salvar: {str(e)}")
+
+    def atualizar_vistas(self):
+        """Recalcula só as abas cujos dados de entrada mudaram"""
+        if 'equipa' in self.vistas_sujas and not self.entrada_orcamento_equipa.get().strip():
             self.atualizar_melhor_equipa()
+        if 'taticas' in self.vistas_sujas:
             self.comparar_taticas()
+        if 'capitao' in self.vistas_sujas:
             self.sugerir_capitao()
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao salvar: {str(e)}")
+        self.vistas_sujas.clear()
+
+    def exportar_excel(self):
+        """Exporta uma cópia dos dados em segundo plano"""
+        if self.agendador.ocupado('exportar'):
+            messagebox.showinfo("Exportar", "Já há uma exportação em curso.")
+            return
+        copia = self.df.copy()
+        if self.equipa_ativa != EQUIPA_PRINCIPAL:
+            # O Excel guarda sempre o plantel da equipa principal
+            for coluna, codigo in CODIGOS_STATUS.items():
+                copia[coluna] = self.estado_principal() == codigo
+        self.em_segundo_plano(
+            'exportar', exportar_excel, copia, self.caminho_excel,
+            ao_terminar=lambda _: self.exportacao_concluida(copia),
+            ao_falhar=lambda e: messagebox.showerror("Erro", f"Erro ao exportar: {str(e)}"),
+        )
+
+    def exportacao_concluida(self, copia):
+        """O Excel tem a cópia exportada: só as alterações feitas entretanto ficam por gravar"""
+        self.diario.descartar()
+        colunas = list(CODIGOS_STATUS)
+        atual = np.column_stack([self.estado_principal() == CODIGOS_STATUS[c] for c in colunas])
+        for posicao in np.flatnonzero((atual != copia[colunas].to_numpy(dtype=bool)).any(axis=1)):
+            self.diario.registar(self.df['ID'].iat[posicao], dict(zip(colunas, atual[posicao])))
+        messagebox.showinfo("Sucesso", f"Dados exportados para {self.caminho_excel}")
+
+    # ==================== [Painel Perf] ====================
+    def mostrar_perf(self, _evento=None):
+        """Abre (ou traz para a frente) o painel com as últimas medições e a cache de resultados"""
+        if self.janela_perf is not None and self.janela_perf.winfo_exists():
+            self.janela_perf.lift()
+            return
+        self.janela_perf = tk.Toplevel(self.root)
+        self.janela_perf.title("Perf")
+        self.janela_perf.geometry("600x400")
+
+        self.label_cache = ttk.Label(self.janela_perf)
+        self.label_cache.pack(padx=10, pady=(10, 0), anchor='w')
+        self.treeview_perf = None
+        if not perf.ATIVO:
+            ttk.Label(self.janela_perf, text="Medição desativada: arranque com LIGARECORD_PERF=1 "
+                                             "(ou =memoria para medir também a memória).").pack(padx=10, pady=10)
+        else:
+            colunas = ('Função', 'ms', 'Memória MB', 'Hora')
+            self.treeview_perf = ttk.Treeview(self.janela_perf, columns=colunas, show='headings')
+            for col in colunas:
+                self.treeview_perf.heading(col, text=col)
+                self.treeview_perf.column(col, anchor='center', width=120)
+            self.treeview_perf.column('Função', anchor='w', width=240)
+            self.treeview_perf.pack(fill='both', expand=True, padx=10, pady=10)
+        if self.perf_pendente is not None:
+            self.root.after_cancel(self.perf_pendente)
+        self.atualizar_perf()
+
+    def atualizar_perf(self):
+        self.perf_pendente = None
+        if self.janela_perf is None or not self.janela_perf.winfo_exists():
+            return
+        e = self.resultados.estatisticas()
+        self.label_cache.configure(
+            text=f"Cache de resultados: {e['acertos']} acertos em memória, {e['acertos_disco']} em disco, "
+                 f"{e['falhas']} falhas ({e['taxa_acerto']:.0%}); {e['entradas']} entradas, "
+                 f"{e['bytes'] / 1e6:.1f} MB, {e['despejos']} despejos")
+        if self.treeview_perf is not None:
+            for item in self.treeview_perf.get_children():
+                self.treeview_perf.delete(item)
+            for medicao in perf.ultimas():
+                memoria = '-' if medicao['memoria'] is None else f"{medicao['memoria'] / 1e6:.1f}"
+                hora = time.strftime('%H:%M:%S', time.localtime(medicao['quando']))
+                self.treeview_perf.insert('', 'end', values=(medicao['funcao'], f"{medicao['segundos'] * 1e3:.1f}",
+                                                             memoria, hora))
+        self.perf_pendente = self.root.after(ATUALIZAR_PERF_MS, self.atualizar_perf)
+
+    # ==================== [Tarefas em Segundo Plano] ====================
+    def criar_barra(self, pai, canal):
+        """Barra de progresso das tarefas de um canal (por posicionar)"""
+        self.barras[canal] = ttk.Progressbar(pai, mode='determinate', length=150, maximum=1.0)
+        return self.barras[canal]
+
+    def em_segundo_plano(self, canal, funcao, *args, ao_terminar, ao_falhar=None, **kwargs):
+        """Corre `funcao` no agendador, com a barra do canal a mostrar o progresso.
+
+        Uma nova tarefa no mesmo canal substitui a anterior. Os erros sem
+        `ao_falhar` são mostrados numa caixa de diálogo.
+        """
+        barra = self.barras[canal]
+        barra.configure(mode='indeterminate', value=0)
+        barra.start(20)
+
+        def progredir(fracao):
+            barra.stop()
+            barra.configure(mode='determinate', value=fracao)
+
+        def parar():
+            barra.stop()
+            barra.configure(mode='determinate', value=0)
+
+        def terminar(resultado):
+            parar()
+            ao_terminar(resultado)
+
+        def falhar(erro):
+            parar()
+            if ao_falhar is None:
+                messagebox.showerror("Erro", str(erro))
+            else:
+                ao_falhar(erro)
+
+        return self.agendador.submeter(canal, funcao, *args, ao_terminar=terminar, ao_falhar=falhar,
+                                       ao_progredir=progredir, **kwargs)
 
     # ==================== [Aba Melhor Equipa] ====================
     def criar_aba_equipa(self):
@@ -186,21 +442,47 @@ class LigaRecordApp:
         frame_controles.pack(pady=10)
         
         ttk.Label(frame_controles, text="Formação Tática:").pack(side=tk.LEFT, padx=5)
-        self.combo_formacao = ttk.Combobox(frame_controles, values=["4-4-2", "4-3-3", "3-5-2", "3-4-3", "4-5-1", "5-3-2"], state="readonly")
+        self.combo_formacao = ttk.Combobox(frame_controles, values=todas_formacoes(), state="readonly")
         self.combo_formacao.set("4-4-2")
         self.combo_formacao.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(frame_controles, text="Orçamento (€):").pack(side=tk.LEFT, padx=5)
+        self.entrada_orcamento_equipa = ttk.Entry(frame_controles)
+        self.entrada_orcamento_equipa.pack(side=tk.LEFT, padx=5)
         ttk.Button(frame_controles, text="Atualizar Equipa", command=self.atualizar_melhor_equipa).pack(side=tk.LEFT)
+        self.criar_barra(frame_controles, 'equipa').pack(side=tk.LEFT, padx=5)
         
         self.frame_tabela_equipa = ttk.Frame(self.aba_equipa)
         self.frame_tabela_equipa.pack(fill='both', expand=True, padx=10, pady=10)
         self.atualizar_melhor_equipa()
 
     def atualizar_melhor_equipa(self):
+        formacao = self.combo_formacao.get()
+        orcamento = None
+        if self.entrada_orcamento_equipa.get().strip():
+            try:
+                orcamento = float(self.entrada_orcamento_equipa.get())
+            except ValueError:
+                messagebox.showerror("Erro", "Orçamento inválido!")
+                return
+        
+        resultados = self.resultados
+        
+        def calcular(df, progresso):
+            # Com `progresso` uma pesquisa obsoleta é abandonada e não prende a thread
+            return resultados.chamar(motor.selecionar_melhor_onze, df, formacao, orcamento, progresso=progresso)
+        
+        self.em_segundo_plano('equipa', calcular, self.df.copy(),
+                              ao_terminar=self.mostrar_melhor_equipa, ao_falhar=self.mostrar_erro_equipa)
+
+    def mostrar_erro_equipa(self, erro):
+        for widget in self.frame_tabela_equipa.winfo_children():
+            widget.destroy()
+        ttk.Label(self.frame_tabela_equipa, text=str(erro)).pack()
+
+    def mostrar_melhor_equipa(self, melhor_onze):
         for widget in self.frame_tabela_equipa.winfo_children():
             widget.destroy()
-            
-        formacao = self.combo_formacao.get()
-        melhor_onze = self.selecionar_melhor_onze(formacao)
         
         colunas = ('Posição', 'Nome', 'Score Ajustado', 'Preço')
         tabela = ttk.Treeview(self.frame_tabela_equipa, columns=colunas, show='headings')
@@ -219,25 +501,6 @@ class LigaRecordApp:
         
         tabela.pack(fill='both', expand=True)
 
-    def selecionar_melhor_onze(self, formacao):
-        mapeamento = {
-            "4-4-2": {'Goleiro':1, 'Defesa':4, 'Médio':4, 'Avançado':2},
-            "4-3-3": {'Goleiro':1, 'Defesa':4, 'Médio':3, 'Avançado':3},
-            "3-5-2": {'Goleiro':1, 'Defesa':3, 'Médio':5, 'Avançado':2},
-            "3-4-3": {'Goleiro':1, 'Defesa':3, 'Médio':4, 'Avançado':3},
-            "4-5-1": {'Goleiro':1, 'Defesa':4, 'Médio':5, 'Avançado':1},
-            "5-3-2": {'Goleiro':1, 'Defesa':5, 'Médio':3, 'Avançado':2}
-        }
-        
-        disponiveis = self.df[(self.df['Titular'] | self.df['Suplente'] | self.df['Reserva']) & ~self.df['Lesionado']]
-        equipe = pd.DataFrame()
-        
-        for pos, qtd in mapeamento[formacao].items():
-            jogadores_pos = disponiveis[disponiveis['Posição'] == pos].nlargest(qtd, 'Score Ajustado')
-            equipe = pd.concat([equipe, jogadores_pos])
-            
-        return equipe
-
     # ==================== [Aba Táticas] ====================
     def criar_aba_taticas(self):
         frame_principal = ttk.Frame(self.aba_taticas)
@@ -254,18 +517,14 @@ class LigaRecordApp:
             
         self.treeview_taticas.pack(fill='both', expand=True)
         ttk.Button(frame_principal, text="Comparar Táticas", command=self.comparar_taticas).pack(pady=10)
+        self.criar_barra(frame_principal, 'taticas').pack()
 
     def comparar_taticas(self):
-        formacoes = ["4-4-2", "4-3-3", "3-5-2", "3-4-3", "4-5-1", "5-3-2"]
-        resultados = []
-        
-        for formacao in formacoes:
-            melhor_onze = self.selecionar_melhor_onze(formacao)
-            total = melhor_onze['Score Ajustado'].sum()
-            resultados.append((formacao, total))
-        
-        resultados.sort(key=lambda x: x[1], reverse=True)
-        
+        """Ordena todas as formações legais com uma única ordenação por posição"""
+        self.em_segundo_plano('taticas', self.resultados.chamar, motor.comparar_taticas, self.df.copy(),
+                              ao_terminar=self.mostrar_taticas)
+
+    def mostrar_taticas(self, resultados):
         for item in self.treeview_taticas.get_children():
             self.treeview_taticas.delete(item)
             
@@ -279,28 +538,45 @@ class LigaRecordApp:
         
         ttk.Label(frame_principal, text="Melhores Candidatos a Capitão", font=("Helvetica", 16)).pack(pady=10)
         
-        colunas = ('Nome', 'Posição', 'Score Capitão', 'Próximo Adversário', 'Dificuldade')
+        colunas = ('Nome', 'Posição', 'Score Capitão', 'Próximo Adversário', 'Dificuldade',
+                   'Pontos Esperados', 'Variância', 'P(Ótimo)')
         self.treeview_capitaes = ttk.Treeview(frame_principal, columns=colunas, show='headings', height=10)
         
         for col in colunas:
             self.treeview_capitaes.heading(col, text=col)
-            self.treeview_capitaes.column(col, anchor='center', width=150)
+            self.treeview_capitaes.column(col, anchor='center', width=130)
             
         self.treeview_capitaes.pack(fill='both', expand=True)
         ttk.Button(frame_principal, text="Atualizar Sugestões", command=self.sugerir_capitao).pack(pady=10)
+        self.criar_barra(frame_principal, 'capitao').pack()
 
     def sugerir_capitao(self):
+        historico = self.historico
+        resultados = self.resultados
+        
+        def calcular(df, progresso):
+            # Simulação Monte Carlo de todo o onze, mostrada ao lado do ranking determinístico
+            simulacao = resultados.chamar(motor.simular_capitaes, df, historico=historico, progresso=progresso)
+            return resultados.chamar(motor.sugerir_capitao, df), simulacao.set_index('ID')
+        
+        self.em_segundo_plano('capitao', calcular, self.df.copy(), ao_terminar=self.mostrar_capitaes)
+
+    def mostrar_capitaes(self, resultado):
+        titulares, simulacao = resultado
         for item in self.treeview_capitaes.get_children():
             self.treeview_capitaes.delete(item)
             
-        titulares = self.df[self.df['Titular']].nlargest(5, 'Score Capitão')
         for _, capitao in titulares.iterrows():
+            sim = simulacao.loc[capitao['ID']]
             self.treeview_capitaes.insert('', 'end', values=(
                 capitao['Nome'],
                 capitao['Posição'],
                 f"{capitao['Score Capitão']:.2f}",
                 capitao['Próximo Adversário'],
-                capitao['Dificuldade do Jogo']
+                capitao['Dificuldade do Jogo'],
+                f"{sim['Pontos Esperados']:.1f}",
+                f"{sim['Variância']:.1f}",
+                f"{sim['P(Ótimo)']:.1%}"
             ))
 
     # ==================== [Aba Transferências] ====================
@@ -324,9 +600,186 @@ class LigaRecordApp:
         
         ttk.Button(frame_selecao, text="Buscar Sugestões", command=self.buscar_transferencias).grid(row=0, column=4, padx=5)
         
+        ttk.Button(frame_selecao, text="Todas as Posições", command=self.analisar_mercado).grid(row=1, column=4, padx=5, pady=5)
+        
+        ttk.Label(frame_selecao, text="Jornadas:").grid(row=0, column=5, padx=5)
+        self.entrada_jornadas = ttk.Entry(frame_selecao, width=5)
+        self.entrada_jornadas.insert(0, "5")
+        self.entrada_jornadas.grid(row=0, column=6, padx=5)
+        ttk.Button(frame_selecao, text="Planear Jornadas", command=self.planear_transferencias).grid(row=0, column=7, padx=5)
+        ttk.Button(frame_selecao, text="Calendário...", command=self.escolher_calendario).grid(row=0, column=8, padx=5)
+        self.rotulo_calendario = ttk.Label(frame_selecao, text="Sem calendário")
+        self.rotulo_calendario.grid(row=1, column=8, padx=5)
+        self.criar_barra(frame_selecao, 'transferencias').grid(row=1, column=5, columnspan=3, padx=5, pady=5)
+        
+        # Pesquisa de jogadores por nome
+        frame_pesquisa = ttk.Frame(frame_principal)
+        frame_pesquisa.pack(fill='x', pady=5)
+        
+        ttk.Label(frame_pesquisa, text="Procurar Jogador:").pack(side=tk.LEFT, padx=5)
+        self.entrada_pesquisa = ttk.Entry(frame_pesquisa)
+        self.entrada_pesquisa.pack(side=tk.LEFT, padx=5)
+        self.entrada_pesquisa.bind("<KeyRelease>", self.agendar_pesquisa)
+        self.pesquisa_pendente = None
+        
+        colunas = ('Nome', 'Equipa', 'Posição', 'Preço', 'Score Ajustado')
+        self.treeview_pesquisa = ttk.Treeview(frame_principal, columns=colunas, show='headings', height=5)
+        for col in colunas:
+            self.treeview_pesquisa.heading(col, text=col)
+            self.treeview_pesquisa.column(col, anchor='center', width=150)
+        self.treeview_pesquisa.pack(fill='x', padx=10)
+        
         self.frame_sugestoes = ttk.Frame(frame_principal)
         self.frame_sugestoes.pack(fill='both', expand=True)
 
+    def procurar_jogadores(self, texto, limite=20):
+        """Jogadores cujo nome contém o texto (sem acentos); se não houver
+        nenhum, os nomes mais parecidos"""
+        ids = self.indice_nomes.procurar(texto)[:limite]
+        if len(ids) == 0:
+            ids = [id_jogador for id_jogador, _ in self.indice_nomes.procurar_aproximado(texto, limite)]
+        return self.df.iloc[self.indice_id.get_indexer(ids)]
+
+    def agendar_pesquisa(self, _evento=None):
+        if self.pesquisa_pendente is not None:
+            self.root.after_cancel(self.pesquisa_pendente)
+        self.pesquisa_pendente = self.root.after(ATRASO_FILTRO_MS, self.mostrar_pesquisa)
+
+    def mostrar_pesquisa(self):
+        self.pesquisa_pendente = None
+        for item in self.treeview_pesquisa.get_children():
+            self.treeview_pesquisa.delete(item)
+        
+        texto = self.entrada_pesquisa.get().strip()
+        if not texto:
+            return
+        for _, jogador in self.procurar_jogadores(texto).iterrows():
+            self.treeview_pesquisa.insert('', 'end', values=(
+                jogador['Nome'],
+                jogador['Equipa'],
+                jogador['Posição'],
+                f"€{jogador['Preço']:.2f}",
+                f"{jogador['Score Ajustado']:.2f}"
+            ))
+
+    def analisar_mercado(self):
+        """Melhor troca de cada jogador do plantel e melhores melhorias por euro"""
+        try:
+            orcamento = float(self.entrada_orcamento.get())
+        except ValueError:
+            messagebox.showerror("Erro", "Orçamento inválido!")
+            return
+        
+        indice = self.indice_mercado
+        versao = self.versao_plantel
+        
+        def calcular(df):
+            indice_atual = indice if indice is not None else motor.indice_mercado(df)
+            plantel = motor.plantel_atual(df)
+            orcamentos = sorted({0.0, orcamento / 2, orcamento})
+            return (indice_atual,
+                    melhores_trocas(indice_atual, plantel, orcamentos),
+                    melhorias_por_euro(indice_atual, plantel, orcamento))
+        
+        self.em_segundo_plano('transferencias', calcular, self.df.copy(),
+                              ao_terminar=lambda resultado: self.mostrar_mercado(resultado, versao))
+
+    def mostrar_mercado(self, resultado, versao):
+        indice, trocas, melhorias = resultado
+        # O índice só é reaproveitado se o plantel não mudou entretanto
+        if versao == self.versao_plantel:
+            self.indice_mercado = indice
+        
+        for widget in self.frame_sugestoes.winfo_children():
+            widget.destroy()
+        
+        notebook = ttk.Notebook(self.frame_sugestoes)
+        notebook.pack(fill='both', expand=True)
+        nomes = self.df['Nome'].to_numpy(dtype=object)
+        posicoes = self.df['Posição'].to_numpy(dtype=object)
+        
+        frame_trocas = ttk.Frame(notebook)
+        notebook.add(frame_trocas, text="Melhor Troca por Jogador")
+        colunas = ('Vender', 'Posição', 'Banco', 'Comprar', 'Ganho')
+        tabela = ttk.Treeview(frame_trocas, columns=colunas, show='headings')
+        for col in colunas:
+            tabela.heading(col, text=col)
+            tabela.column(col, anchor='center', width=150)
+        for troca in trocas.itertuples():
+            tabela.insert('', 'end', values=(
+                nomes[troca.venda], posicoes[troca.venda], f"€{troca.orcamento:.2f}",
+                nomes[troca.compra], f"{troca.ganho:+.2f}"
+            ))
+        tabela.pack(fill='both', expand=True)
+        
+        frame_euro = ttk.Frame(notebook)
+        notebook.add(frame_euro, text="Melhor Upgrade por €")
+        colunas = ('Vender', 'Comprar', 'Ganho', 'Custo', 'Ganho por M€')
+        tabela = ttk.Treeview(frame_euro, columns=colunas, show='headings')
+        for col in colunas:
+            tabela.heading(col, text=col)
+            tabela.column(col, anchor='center', width=150)
+        for melhoria in melhorias.itertuples():
+            tabela.insert('', 'end', values=(
+                nomes[melhoria.venda], nomes[melhoria.compra], f"{melhoria.ganho:+.2f}",
+                f"€{melhoria.custo:.2f}", f"{melhoria.ganho_por_euro * 1e6:.2f}"
+            ))
+        tabela.pack(fill='both', expand=True)
+
+    def planear_transferencias(self):
+        """Plano de transferências para as próximas jornadas (pesquisa em feixe)"""
+        try:
+            orcamento = float(self.entrada_orcamento.get())
+            jornadas = int(self.entrada_jornadas.get())
+        except ValueError:
+            messagebox.showerror("Erro", "Orçamento ou número de jornadas inválido!")
+            return
+        
+        self.em_segundo_plano('transferencias', planear_transferencias, self.df.copy(), orcamento, jornadas,
+                              self.calendario, historico=self.historico, ao_terminar=self.mostrar_plano,
+                              ao_falhar=self.mostrar_erro_transferencias)
+
+    def escolher_calendario(self):
+        """Lê o calendário (CSV/JSON) usado pelo plano nas jornadas seguintes à próxima"""
+        caminho = filedialog.askopenfilename(
+            title="Calendário", filetypes=[("CSV ou JSON", "*.csv *.json *.jsonl"), ("Todos", "*.*")])
+        if not caminho:
+            return
+        try:
+            self.calendario = carregar_calendario(caminho)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Calendário", f"Não foi possível ler o calendário:\n{e}")
+            return
+        self.rotulo_calendario.config(
+            text=f"{os.path.basename(caminho)} ({self.calendario['Jornada'].max()} jornadas)")
+
+    def mostrar_erro_transferencias(self, erro):
+        for widget in self.frame_sugestoes.winfo_children():
+            widget.destroy()
+        ttk.Label(self.frame_sugestoes, text=str(erro)).pack()
+
+    def mostrar_plano(self, plano):
+        for widget in self.frame_sugestoes.winfo_children():
+            widget.destroy()
+        
+        ganho = plano['pontos'] - plano['pontos_sem_transferencias']
+        ttk.Label(self.frame_sugestoes,
+                  text=f"Pontos esperados: {plano['pontos']:.1f} ({ganho:+.1f} face a não transferir)",
+                  font=("Helvetica", 12, "bold")).pack(pady=5)
+        if not plano['completo']:
+            ttk.Label(self.frame_sugestoes, text="Tempo esgotado: plano parcial.", foreground="red").pack()
+        
+        nomes = self.df['Nome']
+        for jornada, passo in enumerate(plano['jornadas'], 1):
+            if passo['vendas']:
+                trocas = ", ".join(f"{nomes[v]} → {nomes[c]}" for v, c in zip(passo['vendas'], passo['compras']))
+            else:
+                trocas = "Sem transferências"
+            penalizacao = f" | Penalização: -{passo['penalizacao']:.0f}" if passo['penalizacao'] else ""
+            ttk.Label(self.frame_sugestoes,
+                      text=f"Jornada {jornada}: {trocas} | Pontos: {passo['pontos']:.1f}{penalizacao} | "
+                           f"Banco: €{passo['banco']:.2f}").pack(anchor='w', padx=10)
+
     def buscar_transferencias(self):
         posicao = self.combo_posicao_transf.get()
         try:
@@ -335,8 +788,10 @@ class LigaRecordApp:
             messagebox.showerror("Erro", "Orçamento inválido!")
             return
         
-        resultado = self.sugerir_transferencias(posicao, orcamento)
-        
+        self.em_segundo_plano('transferencias', self.resultados.chamar, motor.sugerir_transferencias,
+                              self.df.copy(), posicao, orcamento, ao_terminar=self.mostrar_transferencias)
+
+    def mostrar_transferencias(self, resultado):
         for widget in self.frame_sugestoes.winfo_children():
             widget.destroy()
             
@@ -385,53 +840,6 @@ class LigaRecordApp:
             ttk.Label(frame_sug, text=f"Jogador: {sug['Nome']}").pack()
             ttk.Label(frame_sug, text=f"Preço: €{sug['Preço']:.2f} | Score: {sug['Score Avançado']:.2f}").pack()
 
-    def sugerir_transferencias(self, posicao, orcamento):
-        """Sugere transferências com comparação de jogadores e gestão de orçamento dinâmico"""
-        # Identificar jogadores atuais na posição
-        jogadores_atuais = self.df[
-            (self.df['Posição'] == posicao) & 
-            (self.df['Titular'] | self.df['Suplente'] | self.df['Reserva'])
-        ]
-        
-        # Encontrar o jogador mais substituível
-        jogador_substituivel = jogadores_atuais.nsmallest(1, 'Score Ajustado')
-        bonus_venda = jogador_substituivel['Preço'].values[0] if not jogador_substituivel.empty else 0
-        orcamento_total = orcamento + bonus_venda
-        
-        # Fatores de ponderação
-        peso_recente = 0.4
-        peso_dificuldade = 0.3
-        
-        # Calcular score aprimorado
-        df_filtrado = self.df[
-            (self.df['Posição'] == posicao) &
-            (~self.df['Titular']) &
-            (self.df['Preço'] <= orcamento_total)
-        ].copy()
-        
-        df_filtrado['Score Avançado'] = (
-            df_filtrado['Pontos Última Jornada'] * peso_recente +
-            (1 / (df_filtrado['Dificuldade do Jogo'] + 1)) * peso_dificuldade +
-            df_filtrado['Score Ajustado'] * (1 - peso_recente - peso_dificuldade)
-        )
-        
-        # Comparar com jogadores atuais
-        if not jogadores_atuais.empty:
-            score_minimo = jogadores_atuais['Score Ajustado'].min() * 1.2
-            df_filtrado = df_filtrado[df_filtrado['Score Avançado'] > score_minimo]
-        
-        # Gerar sugestões estratificadas
-        sugestoes = {
-            'top_performers': df_filtrado.nlargest(3, 'Score Avançado'),
-            'custo_beneficio': df_filtrado[df_filtrado['Preço'] <= orcamento].nlargest(3, 'Score Avançado')
-        }
-        
-        return {
-            'sugestoes': sugestoes,
-            'jogador_venda': jogador_substituivel,
-            'orcamento_ajustado': orcamento_total
-        }
-
 if __name__ == "__main__":
     root = tk.Tk()
     app = LigaRecordApp(root)
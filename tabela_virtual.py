@@ -0,0 +1,96 @@
+from tkinter import ttk
+
+import numpy as np
+
+
+class TabelaVirtual:
+    """Treeview virtualizada: só existem itens Tk para as linhas visíveis.
+
+    As linhas a mostrar são um array de posições no DataFrame; os valores de
+    cada linha são pedidos a `obter_valores(posicao)` apenas quando a linha
+    entra na janela visível. Filtrar ou rolar custa O(linhas visíveis) chamadas
+    Tk, independentemente do número de jogadores.
+    """
+
+    def __init__(self, pai, colunas, obter_valores, altura_linha=30, folga=5):
+        self.obter_valores = obter_valores
+        self.altura_linha = altura_linha
+        self.folga = folga
+        self.linhas = np.empty(0, dtype=np.intp)
+        self.topo = 0
+        self.itens = []
+        self.posicao_item = {}
+
+        self.treeview = ttk.Treeview(pai, columns=colunas, show='headings', height=15)
+        for col in colunas:
+            self.treeview.heading(col, text=col)
+            self.treeview.column(col, anchor='center', width=200)
+
+        self.scrollbar = ttk.Scrollbar(pai, orient='vertical', command=self._rolar)
+        self.scrollbar.pack(side='right', fill='y')
+        self.treeview.pack(side='left', fill='both', expand=True)
+
+        self.treeview.bind('<Configure>', self._redimensionar)
+        self.treeview.bind('<MouseWheel>', lambda e: self.rolar_linhas(-1 if e.delta > 0 else 1))
+        self.treeview.bind('<Button-4>', lambda e: self.rolar_linhas(-1))
+        self.treeview.bind('<Button-5>', lambda e: self.rolar_linhas(1))
+
+    # ---------- API ----------
+    def definir_linhas(self, linhas):
+        """Substitui as linhas mostradas (posições no DataFrame)"""
+        self.linhas = np.asarray(linhas, dtype=np.intp)
+        self.topo = 0
+        self.atualizar()
+
+    def atualizar(self):
+        """Redesenha a janela visível com os valores atuais"""
+        self.topo = max(0, min(self.topo, len(self.linhas) - self._visiveis()))
+        self.posicao_item.clear()
+        janela = self.linhas[self.topo:self.topo + len(self.itens)]
+        for k, item in enumerate(self.itens):
+            if k < len(janela):
+                self.treeview.item(item, values=self.obter_valores(janela[k]))
+                self.posicao_item[item] = janela[k]
+                self.treeview.move(item, '', k)
+            else:
+                self.treeview.detach(item)
+        self._atualizar_scrollbar()
+
+    def posicao_do_item(self, item):
+        """Posição no DataFrame da linha mostrada no item"""
+        return self.posicao_item[item]
+
+    def rolar_linhas(self, n):
+        self.topo += n
+        self.atualizar()
+        return 'break'
+
+    # ---------- Internos ----------
+    def _visiveis(self):
+        altura = self.treeview.winfo_height()
+        if altura <= 1:
+            altura = int(self.treeview.cget('height')) * self.altura_linha
+        return max(1, altura // self.altura_linha - 1)
+
+    def _redimensionar(self, _evento=None):
+        necessarios = self._visiveis() + self.folga
+        while len(self.itens) < necessarios:
+            self.itens.append(self.treeview.insert('', 'end', iid=f"v{len(self.itens)}"))
+        while len(self.itens) > necessarios:
+            self.treeview.delete(self.itens.pop())
+        self.atualizar()
+
+    def _rolar(self, acao, *args):
+        if acao == 'moveto':
+            self.topo = int(float(args[0]) * len(self.linhas))
+        elif acao == 'scroll':
+            passo = int(args[0]) * (self._visiveis() if args[1] == 'pages' else 1)
+            self.topo += passo
+        self.atualizar()
+
+    def _atualizar_scrollbar(self):
+        total = len(self.linhas)
+        if total == 0:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        self.scrollbar.set(self.topo / total, min(1.0, (self.topo + self._visiveis()) / total))